@@ -9,50 +9,165 @@ Utile pour tester l'extraction avant de se connecter à IMAP
 import os
 import sys
 import email
-from pathlib import Path
+import heapq
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from email.header import decode_header as decode_header_func
-from email_reader import EventExtractor, HTMLGenerator
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+import commune_matcher
+import date_parser
+import digest_index
+import patterns
+import text_cleaner
+from date_parser import parse_french_date
+from email_reader import (EventExtractor, HTMLGenerator, HTML_TAG_RE, HTML_TEXT_BACKEND, decode_part, html_to_text,
+                          is_html_body)
+from extraction_ledger import ExtractionLedger, extraction_fingerprint
 
 
-def read_eml_files(folder_path: str, limit: int = 50) -> list:
-    """Lit les fichiers .eml d'un dossier"""
-    emails = []
+# En dessous de ce nombre de fichiers (ou avec un seul CPU), le démarrage des
+# processus coûte plus cher que la lecture elle-même : les fichiers sont lus
+# dans le processus courant
+PARALLEL_THRESHOLD = 20
+
+# Fichiers confiés à un processus par tâche (amortit les échanges entre processus)
+PARSE_CHUNK_SIZE = 16
+
+# Version de EventExtractor pour le registre : empreinte de son code, des modules
+# et fonctions utilisés, et de la bibliothèque d'extraction du texte HTML
+EVENT_EXTRACTOR_VERSION = extraction_fingerprint(
+    EventExtractor, is_html_body, html_to_text, HTML_TAG_RE, HTML_TEXT_BACKEND,
+    digest_index, patterns, text_cleaner, commune_matcher, date_parser
+)
+
+
+def list_eml_files(folder_path: str, limit: int = None) -> List[str]:
+    """
+    Liste les fichiers .eml d'un dossier, les plus récents en premier
+    
+    Un seul parcours du dossier (os.scandir) ; avec `limit`, seuls les
+    `limit` fichiers les plus récents sont conservés (tas borné).
+    """
+    def iter_entries():
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".eml") and entry.is_file():
+                    yield entry.stat().st_mtime, entry.path
+    
+    if limit is None:
+        newest = sorted(iter_entries(), reverse=True)
+    else:
+        newest = heapq.nlargest(limit, iter_entries())
+    return [path for _, path in newest]
+
+
+def parse_eml_file(path: str) -> Dict:
+    """Lit un fichier .eml et retourne le dictionnaire de l'email"""
+    with open(path, 'rb') as f:
+        msg = email.message_from_binary_file(f)
+    
+    body_part = get_body_part(msg)
+    return {
+        "subject": decode_header(msg.get("Subject", "")),
+        "from": decode_header(msg.get("From", "")),
+        "date": msg.get("Date", ""),
+        "body": decode_part(body_part),
+        "content_type": body_part.get_content_type(),
+        "message_id": msg.get("Message-ID", ""),
+        "filename": os.path.basename(path)
+    }
+
+
+def parse_eml_chunk(paths: List[str]) -> List[Tuple[str, Dict, str]]:
+    """
+    Lit un lot de fichiers .eml (tâche exécutée dans un processus du pool)
+    
+    Returns:
+        Tuples (chemin, email ou None, message d'erreur ou None)
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append((path, parse_eml_file(path), None))
+        except Exception as e:
+            results.append((path, None, str(e)))
+    return results
+
+
+def iter_eml_files(folder_path: str, limit: int = 50, workers: int = None, ordered: bool = True) -> Iterator[Dict]:
+    """
+    Lit les fichiers .eml d'un dossier au fil de l'eau
     
+    Les fichiers sont analysés par lots dans un pool de processus et les
+    emails sont produits dès qu'ils sont prêts : l'extraction peut commencer
+    avant la fin de la lecture du dossier. Au plus 2 lots par processus sont
+    en cours à un instant donné, la mémoire reste donc bornée quel que soit
+    le nombre de fichiers.
+    
+    Args:
+        folder_path: Dossier des fichiers .eml
+        limit: Nombre de fichiers à lire, les plus récents (None = tous)
+        workers: Nombre de processus (par défaut le nombre de CPU)
+        ordered: True pour produire les emails du plus récent au plus ancien,
+                 False pour les produire dans l'ordre où ils sont prêts
+    
+    Yields:
+        Dictionnaires {subject, from, date, body, message_id, filename}
+    """
     if not os.path.isdir(folder_path):
         print(f"❌ Le dossier n'existe pas: {folder_path}")
-        return emails
-    
-    eml_files = sorted(
-        Path(folder_path).glob("*.eml"),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True
-    )[:limit]
+        return
     
+    eml_files = list_eml_files(folder_path, limit)
     print(f"📂 Lecture de {len(eml_files)} fichier(s) EML...")
     
-    for eml_file in eml_files:
-        try:
-            with open(eml_file, 'rb') as f:
-                msg = email.message_from_binary_file(f)
-                
-            subject = decode_header(msg.get("Subject", ""))
-            sender = decode_header(msg.get("From", ""))
-            date_str = msg.get("Date", "")
-            body = get_body(msg)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(eml_files) < PARALLEL_THRESHOLD:
+        chunk_results = (parse_eml_chunk([path]) for path in eml_files)
+    else:
+        chunks = (eml_files[i:i + PARSE_CHUNK_SIZE] for i in range(0, len(eml_files), PARSE_CHUNK_SIZE))
+        chunk_results = _map_bounded(parse_eml_chunk, chunks, workers, ordered)
+    
+    for results in chunk_results:
+        for path, email_dict, error in results:
+            if error is not None:
+                print(f"⚠️  Erreur lors de la lecture de {os.path.basename(path)}: {error}")
+            else:
+                yield email_dict
+
+
+def _map_bounded(function, items: Iterator, workers: int, ordered: bool) -> Iterator:
+    """
+    Applique `function` aux éléments dans un pool de processus, en gardant
+    au plus 2 tâches par processus en cours (les suivantes sont soumises au
+    fur et à mesure que les résultats sont consommés)
+    """
+    max_pending = workers * 2
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(function, item) for item in islice(items, max_pending))
+        
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                for future in done:
+                    pending.remove(future)
             
-            emails.append({
-                "subject": subject,
-                "from": sender,
-                "date": date_str,
-                "body": body,
-                "message_id": msg.get("Message-ID", ""),
-                "filename": eml_file.name
-            })
+            # Remplace chaque tâche terminée par la suivante
+            for item in islice(items, len(done)):
+                pending.append(executor.submit(function, item))
             
-        except Exception as e:
-            print(f"⚠️  Erreur lors de la lecture de {eml_file.name}: {e}")
-            continue
-    
+            for future in done:
+                yield future.result()
+
+
+def read_eml_files(folder_path: str, limit: int = 50) -> list:
+    """Lit les fichiers .eml d'un dossier (les plus récents en premier)"""
+    emails = list(iter_eml_files(folder_path, limit))
     print(f"✓ {len(emails)} email(s) lu(s)")
     return emails
 
@@ -62,7 +177,11 @@ def decode_header(header: str) -> str:
     decoded_parts = []
     for part, encoding in decode_header_func(header):
         if isinstance(part, bytes):
-            decoded_parts.append(part.decode(encoding or "utf-8", errors="ignore"))
+            try:
+                decoded_parts.append(part.decode(encoding or "utf-8", errors="ignore"))
+            except LookupError:
+                # En-tête 8 bits brut ("unknown-8bit") ou charset inconnu de Python
+                decoded_parts.append(part.decode("utf-8", errors="replace"))
         else:
             decoded_parts.append(str(part) if part else "")
     return "".join(decoded_parts)
@@ -70,40 +189,42 @@ def decode_header(header: str) -> str:
 
 def get_body(msg: email.message.Message) -> str:
     """Extrait le corps du message (texte ou HTML)"""
-    body = ""
-    
+    return decode_part(get_body_part(msg))
+
+
+def get_body_part(msg: email.message.Message) -> email.message.Message:
+    """Partie contenant le corps du message : texte en priorité, sinon le message entier"""
     if msg.is_multipart():
         for part in msg.walk():
-            content_type = part.get_content_type()
             content_disposition = part.get("Content-Disposition", "")
             
-            if "attachment" not in content_disposition:
-                if content_type == "text/plain":
-                    try:
-                        payload = part.get_payload(decode=True)
-                        if isinstance(payload, bytes):
-                            body = payload.decode("utf-8", errors="ignore")
-                        else:
-                            body = str(payload)
-                        return body
-                    except:
-                        pass
-    
-    try:
-        payload = msg.get_payload(decode=True)
-        if isinstance(payload, bytes):
-            body = payload.decode("utf-8", errors="ignore")
-        else:
-            body = str(payload) if payload else ""
-    except:
-        body = msg.get_payload(decode=False)
-        if isinstance(body, bytes):
-            try:
-                body = body.decode("utf-8", errors="ignore")
-            except:
-                body = str(body)
+            if "attachment" not in content_disposition and part.get_content_type() == "text/plain":
+                return part
     
-    return body
+    return msg
+
+
+def extract_event_info_cached(extractor: EventExtractor, email_dict: Dict, ledger: ExtractionLedger) -> Dict | List[Dict]:
+    """
+    Extrait les événements d'un email, ou les reprend du registre si ce contenu
+    a déjà été extrait par la même version de EventExtractor
+    """
+    extractor_name = f"event_extractor:{email_dict.get('content_type') or ''}"
+    content = email_dict["subject"] + "\n" + email_dict["body"]
+
+    event_info = ledger.get(extractor_name, content)
+    if event_info is None:
+        event_info = extractor.extract_event_info(email_dict)
+        ledger.put(extractor_name, content, event_info)
+        return event_info
+
+    # Date de réception et expéditeur ne font pas partie du contenu hashé
+    email_datetime = parse_french_date(email_dict["date"])
+    for event in (event_info if isinstance(event_info, list) else [event_info]):
+        event["email_date"] = email_dict["date"]
+        event["email_datetime"] = email_datetime
+        event["from"] = email_dict.get("from", "")
+    return event_info
 
 
 def main():
@@ -118,21 +239,18 @@ def main():
     print(f"📧 Lecture des emails depuis: {os.path.abspath(email_folder)}\n")
     
     try:
-        # Étape 1: Lecture des fichiers .eml
-        emails = read_eml_files(email_folder, limit=50)
-        
-        if not emails:
-            print("❌ Aucun email trouvé")
-            return
-        
-        # Étape 2: Extraction des informations d'événement
+        # Étapes 1 et 2: Lecture des fichiers .eml et extraction des
+        # informations d'événement au fur et à mesure de la lecture
         print("\n🔍 Extraction des informations d'événement...")
         extractor = EventExtractor()
+        ledger = ExtractionLedger(version=EVENT_EXTRACTOR_VERSION)
         events = []
+        email_count = 0
         
-        for email_dict in emails:
+        for email_dict in iter_eml_files(email_folder, limit=50):
+            email_count += 1
             try:
-                event_info = extractor.extract_event_info(email_dict)
+                event_info = extract_event_info_cached(extractor, email_dict, ledger)
                 events.append(event_info)
                 
                 # Affiche les infos extraites
@@ -144,7 +262,13 @@ def main():
                 print(f"⚠️  Erreur lors de l'extraction: {e}")
                 continue
         
-        print(f"\n✓ {len(events)} événement(s) extrait(s)")
+        if not email_count:
+            print("❌ Aucun email trouvé")
+            return
+        
+        ledger.save()
+        print(f"\n✓ {email_count} email(s) lu(s) ({ledger.hits} déjà extrait(s) depuis le registre)")
+        print(f"✓ {len(events)} événement(s) extrait(s)")
         
         # Filtre les événements avec une date
         events_filtered = [e for e in events if e['date'] != 'Non spécifiée']
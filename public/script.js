@@ -161,61 +161,19 @@ document.addEventListener('DOMContentLoaded', function() {
     console.log('Date filter element:', dateFilter);
     console.log('Number of event cards:', eventCards.length);
     
-    // Fonction pour parser une date au format "samedi 13 décembre 2025" ou "décembre 2025"
-    function parseEventDate(dateStr) {
-        if (!dateStr) return null;
-        
-        // Mapping des mois français
-        const moisFr = {
-            "janvier": 0, "février": 1, "mars": 2, "avril": 3, "mai": 4, "juin": 5,
-            "juillet": 6, "août": 7, "septembre": 8, "octobre": 9, "novembre": 10, "décembre": 11
-        };
-        
-        // Enlève le jour de la semaine (ex: "samedi" dans "samedi 13 décembre 2025")
-        const withoutDay = dateStr.replace(/^(lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche)\s+/, '');
-        
-        // Enlève l'heure si elle est présente (ex: "22 décembre 2025 à 20:00" → "22 décembre 2025")
-        const withoutTime = withoutDay.replace(/\s+à\s+\d{1,2}:\d{2}$/, '');
-        
-        // Regex compatible avec:
-        // - "13 décembre 2025"
-        // - "décembre 2025" (période complète du mois)
-        // - "13 au 15 décembre 2025"
-        // - Avec ou sans heure (la partie heure est enlevée avant)
-        const periodMatch = withoutTime.match(/^(\d+)?\s*(?:au\s+\d+)?\s*(janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s+(\d{4})$/i);
-        
-        if (!periodMatch) return null;
-        
-        const day = periodMatch[1] ? parseInt(periodMatch[1]) : 1;
-        const month = moisFr[periodMatch[2].toLowerCase()];
-        const year = parseInt(periodMatch[3]);
-        
-        if (month === undefined) return null;
-        
-        // Retourne le 1er jour si pas de jour spécifique (ex: "décembre 2025")
-        return new Date(year, month, day);
+    // Date du jour au format ISO local (AAAA-MM-JJ), comparable aux attributs data-event-start/end
+    function todayIso() {
+        const today = new Date();
+        const month = String(today.getMonth() + 1).padStart(2, '0');
+        const day = String(today.getDate()).padStart(2, '0');
+        return `${today.getFullYear()}-${month}-${day}`;
     }
     
-    // Fonction pour vérifier si une date est "à venir" (aujourd'hui ou après)
-    function isUpcoming(dateStr) {
-        if (!dateStr) {
-            console.log('isUpcoming: dateStr is empty');
-            return false;
-        }
-        
-        const eventDate = parseEventDate(dateStr);
-        if (!eventDate) {
-            console.log(`isUpcoming: Failed to parse date: "${dateStr}"`);
-            return false;
-        }
-        
-        const today = new Date();
-        today.setHours(0, 0, 0, 0);  // Réinitialise l'heure à 00:00:00
-        
-        const isUp = eventDate >= today;
-        console.log(`isUpcoming: "${dateStr}" => ${eventDate.toLocaleDateString('fr-FR')} (today: ${today.toLocaleDateString('fr-FR')}) => ${isUp}`);
-        
-        return isUp;
+    // Un événement est "à venir" tant que sa date de fin (ou de début) n'est pas passée
+    // Les dates sont calculées à la génération de la page : aucune date n'est analysée ici
+    function isUpcoming(card, today) {
+        const lastDay = card.dataset.eventEnd || card.dataset.eventStart;
+        return Boolean(lastDay) && lastDay >= today;
     }
     
     // Fonction principale de filtrage
@@ -225,9 +183,10 @@ document.addEventListener('DOMContentLoaded', function() {
         
         console.log('Applying filters - Commune:', selectedCommune, 'Date filter:', selectedDateFilter);
         
+        const today = todayIso();
+        
         eventCards.forEach(card => {
             const cardCommune = card.getAttribute('data-commune');
-            const cardEventDate = card.getAttribute('data-event-date');
             
             // Filtre commune
             const communeMatch = !selectedCommune || cardCommune === selectedCommune;
@@ -235,7 +194,7 @@ document.addEventListener('DOMContentLoaded', function() {
             // Filtre date
             let dateMatch = true;
             if (selectedDateFilter === 'upcoming') {
-                dateMatch = isUpcoming(cardEventDate);
+                dateMatch = isUpcoming(card, today);
             }
             
             // Affiche la carte si elle passe tous les filtres
@@ -0,0 +1,20 @@
+#!/bin/bash
+# Script de lancement - mode veille (IDLE), traite les digests dès leur arrivée
+
+cd "$(dirname "$0")"
+
+# Active l'environnement virtuel
+source venv/bin/activate
+
+# Vérifie que .env existe
+if [ ! -f .env ]; then
+    echo "❌ Erreur: Fichier .env non trouvé!"
+    echo ""
+    echo "Créez un fichier .env en copiant .env.example:"
+    echo "  cp .env.example .env"
+    exit 1
+fi
+
+# Lance le mode veille (s'arrête avec Ctrl+C)
+cd src
+python3 main_watch.py
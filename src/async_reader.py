@@ -0,0 +1,102 @@
+"""
+Lecture IMAP concurrente de plusieurs dossiers
+Chaque dossier a sa propre session IMAP ; les sessions sont pilotées par
+asyncio pour que la durée totale soit celle du dossier le plus lent
+"""
+
+import asyncio
+from datetime import date
+from typing import Dict, List
+
+from email_reader import EmailReader
+from imap_state import ImapSyncState
+
+
+class AsyncEmailReader:
+    """Lit plusieurs dossiers IMAP en parallèle (une connexion par dossier)"""
+
+    def __init__(self, email_address: str, password: str, imap_server: str = "imap.free.fr", imap_port: int = 993,
+                 sync_state: ImapSyncState = None, store=None, max_connections: int = 4):
+        """
+        Args:
+            email_address: Adresse email
+            password: Mot de passe ou token d'application
+            imap_server: Serveur IMAP (par défaut Free)
+            imap_port: Port IMAP (par défaut 993 pour SSL)
+            sync_state: État de synchronisation pour le mode incrémental (optionnel)
+            store: Magasin local (MessageStore) où écrire les messages téléchargés (optionnel)
+            max_connections: Nombre maximal de sessions IMAP simultanées
+        """
+        self.email_address = email_address
+        self.password = password
+        self.imap_server = imap_server
+        self.imap_port = imap_port
+        self.sync_state = sync_state
+        self.store = store
+        self.max_connections = max_connections
+        self._semaphore = None
+
+    async def get_emails(self, folder: str = "INBOX", limit: int = 10, domain_filter: str = None,
+                         subject_filters: List[str] = None, since: date = None) -> List[Dict]:
+        """
+        Récupère les emails d'un dossier, avec le même contrat que EmailReader.get_emails
+
+        La session imaplib (bloquante) tourne dans un thread dédié, ce qui
+        laisse la boucle asyncio piloter les autres dossiers pendant les
+        attentes réseau.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+
+        async with self._semaphore:
+            return await asyncio.to_thread(
+                self._get_emails_blocking, folder, limit, domain_filter, subject_filters, since
+            )
+
+    async def get_emails_from_folders(self, folders: List[str], limit: int = 10, domain_filter: str = None,
+                                      subject_filters: List[str] = None, since: date = None) -> Dict[str, List[Dict]]:
+        """
+        Récupère les emails de plusieurs dossiers simultanément
+
+        Returns:
+            Dictionnaire {dossier: liste des emails}, dans l'ordre de `folders`
+        """
+        results = await asyncio.gather(*(
+            self.get_emails(folder, limit, domain_filter, subject_filters, since)
+            for folder in folders
+        ))
+        return dict(zip(folders, results))
+
+    def _get_emails_blocking(self, folder: str, limit: int, domain_filter: str,
+                             subject_filters: List[str], since: date) -> List[Dict]:
+        """Ouvre une session dédiée au dossier, récupère ses emails puis la ferme"""
+        reader = EmailReader(self.email_address, self.password, self.imap_server, self.imap_port,
+                             sync_state=self.sync_state, store=self.store)
+        try:
+            print(f"📂 Lecture du dossier '{folder}'...")
+            return reader.get_emails(folder=folder, limit=limit, domain_filter=domain_filter,
+                                     subject_filters=subject_filters, since=since)
+        finally:
+            reader.close()
+
+
+def get_emails_from_folders(email_address: str, password: str, imap_server: str, imap_port: int,
+                            folders: List[str], limit: int = 10, domain_filter: str = None,
+                            subject_filters: List[str] = None, since: date = None,
+                            sync_state: ImapSyncState = None, store=None) -> List[Dict]:
+    """
+    Façade synchrone de AsyncEmailReader pour les appelants existants
+
+    Returns:
+        Emails de tous les dossiers, dossier par dossier dans l'ordre de `folders`
+    """
+    reader = AsyncEmailReader(email_address, password, imap_server, imap_port,
+                              sync_state=sync_state, store=store)
+    emails_by_folder = asyncio.run(reader.get_emails_from_folders(
+        folders, limit, domain_filter, subject_filters, since
+    ))
+
+    emails = []
+    for folder in folders:
+        emails.extend(emails_by_folder[folder])
+    return emails
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark de l'extraction des annonces
+Mesure le temps moyen d'extraction par digest, avec les fonctions de main_v2
+et avec EventExtractor, sur les digests d'exemple du dépôt (test, test2, test3)
+ou sur les fichiers passés en argument.
+
+Avec --baseline, la même mesure est faite sur une autre révision (extraite
+dans un worktree git temporaire) et les deux séries sont affichées côte à côte :
+    python src/bench_extraction.py
+    python src/bench_extraction.py --baseline 32fb770
+    python src/bench_extraction.py --baseline HEAD~3 digest1.txt digest2.txt
+
+L'équivalence du nettoyage du texte est vérifiée par tests/test_text_cleaner.py
+"""
+
+import argparse
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# Nombre d'extractions par digest (la moyenne est affichée)
+REPEAT = 50
+
+# Sujets des quatre sources (la première sert par défaut)
+SOURCE_FILTERS = ('crieur-des-sorties', 'crieur-libre-expression', 'crieur-solidaire',
+                  'crieur-annonces-commerciales')
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_digests(paths: list) -> list:
+    """Charge les digests et détecte leur source d'après la première ligne"""
+    digests = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            body = f.read()
+
+        first_line = body.split('\n', 1)[0]
+        source_filter = next((name for name in SOURCE_FILTERS if name in first_line), SOURCE_FILTERS[0])
+        digests.append({'name': os.path.basename(path), 'body': body, 'source': source_filter,
+                        'subject': first_line})
+    return digests
+
+
+def time_per_call(function, repeat: int = REPEAT) -> float:
+    """Temps moyen d'un appel, en millisecondes"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def extract_v2(main_v2, body: str, source_filter: str) -> list:
+    """
+    Extraction de main_v2 avec les seules fonctions présentes dans toutes les
+    révisions (extract_email_events n'existe pas dans les plus anciennes)
+    """
+    if source_filter == 'crieur-libre-expression':
+        return main_v2.extract_libre_expression_events(body)
+
+    sommaire = main_v2.extract_sommaire(body)
+    if not sommaire:
+        return []
+    return main_v2.consolidate_events(main_v2.parse_events_from_sommaire(sommaire), main_v2.extract_messages(body))
+
+
+def measure(digests: list) -> dict:
+    """Temps d'extraction (ms) de chaque digest : {nom: [main_v2, EventExtractor]}"""
+    # Importés ici : avec --baseline, le processus fils les charge depuis le worktree
+    main_v2 = importlib.import_module('main_v2')
+    extractor = importlib.import_module('email_reader').EventExtractor()
+
+    timings = {}
+    for digest in digests:
+        email_dict = {'subject': digest['subject'], 'body': digest['body'], 'date': '', 'from': ''}
+        timings[digest['name']] = [
+            time_per_call(lambda: extract_v2(main_v2, digest['body'], digest['source'])),
+            time_per_call(lambda: extractor.extract_event_info(email_dict)),
+        ]
+    return timings
+
+
+def measure_revision(revision: str, paths: list) -> dict:
+    """Mesure une autre révision du dépôt, extraite dans un worktree temporaire"""
+    worktree = tempfile.mkdtemp(prefix='bench-')
+    try:
+        subprocess.run(['git', '-C', BASE_DIR, 'worktree', 'add', '--detach', '--quiet', worktree, revision],
+                       check=True)
+        # Les données non versionnées (communes...) sont celles du dépôt courant
+        data_dir = os.path.join(BASE_DIR, 'data')
+        if os.path.isdir(data_dir) and not os.path.exists(os.path.join(worktree, 'data')):
+            os.symlink(data_dir, os.path.join(worktree, 'data'))
+
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--json', '--src', os.path.join(worktree, 'src'), *paths],
+            cwd=worktree, check=True, capture_output=True, text=True
+        )
+        return json.loads(result.stdout.splitlines()[-1])
+    finally:
+        subprocess.run(['git', '-C', BASE_DIR, 'worktree', 'remove', '--force', worktree], check=False)
+        shutil.rmtree(worktree, ignore_errors=True)
+
+
+def print_table(digests: list, timings: dict, baseline: dict = None, revision: str = None):
+    """Affiche les temps par digest, et ceux de la révision de référence si fournis"""
+    if baseline is None:
+        print(f"{'Digest':<12} {'Source':<30} {'main_v2 (ms)':>13} {'EventExtractor (ms)':>20}")
+    else:
+        print(f"Référence: {revision}\n")
+        print(f"{'Digest':<12} {'Source':<30} {'main_v2 avant':>14} {'après':>9} "
+              f"{'EventExtractor avant':>21} {'après':>9}")
+
+    totals = [0.0] * 4
+    for digest in digests:
+        after = timings[digest['name']]
+        before = baseline[digest['name']] if baseline is not None else after
+        row = [before[0], after[0], before[1], after[1]]
+        totals = [total + value for total, value in zip(totals, row)]
+        print(format_row(digest['name'], digest['source'], row, baseline is not None))
+
+    count = len(digests)
+    print(format_row('Moyenne', '', [total / count for total in totals], baseline is not None))
+    if baseline is not None:
+        print(f"\nGain: main_v2 x{totals[0] / totals[1]:.2f}, EventExtractor x{totals[2] / totals[3]:.2f}")
+
+
+def format_row(name: str, source: str, row: list, with_baseline: bool) -> str:
+    """Ligne du tableau : [main_v2 avant, après, EventExtractor avant, après]"""
+    if not with_baseline:
+        return f"{name:<12} {source:<30} {row[1]:>13.3f} {row[3]:>20.3f}"
+    return f"{name:<12} {source:<30} {row[0]:>14.3f} {row[1]:>9.3f} {row[2]:>21.3f} {row[3]:>9.3f}"
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Micro-benchmark de l'extraction des annonces")
+    parser.add_argument('paths', nargs='*', help="Digests à mesurer (par défaut test, test2, test3)")
+    parser.add_argument('--baseline', metavar='REV', help="Révision git de référence (mesures avant/après)")
+    parser.add_argument('--json', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--src', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.src:
+        # Processus fils de --baseline : modules de la révision de référence
+        sys.path.insert(0, args.src)
+
+    paths = [os.path.abspath(path) for path in args.paths] or \
+        [os.path.join(BASE_DIR, name) for name in ("test", "test2", "test3")]
+
+    digests = load_digests(paths)
+    if not digests:
+        print("❌ Aucun digest à mesurer")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(measure(digests)))
+        return
+
+    print(f"⏱  Extraction de {len(digests)} digest(s), {REPEAT} répétitions\n")
+    baseline = measure_revision(args.baseline, paths) if args.baseline else None
+    print_table(digests, measure(digests), baseline, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
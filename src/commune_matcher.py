@@ -0,0 +1,139 @@
+"""
+Recherche des noms de communes dans un texte
+Un automate d'Aho-Corasick est construit une seule fois sur tous les noms :
+le texte est parcouru en un seul passage, quel que soit le nombre de communes
+"""
+
+import json
+import os
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+# Principales communes du secteur, toujours reconnues (même sans base de coordonnées)
+COMMUNES_DORDOGNE = [
+    "Nontron", "Thiviers", "Saint-Yrieix", "Périgueux", "Bergerac", "Sarlat", "Ribérac",
+    "Montbron", "Chalais", "Saint-Pardoux-la-Rivière", "Champs-Romain", "Soudat",
+    "Rudeau-Ladosse", "Saint-Saud-Lacoussière", "Saint-Jory", "Saint-Jory-de-Chalais",
+    "Marval", "Piégut-Pluviers", "Champniers-et-Reilhac", "Champagnac-la-Rivière",
+    "La Rochebeaucourt-et-Argentine", "Milhac-de-Nontron", "Chalard", "Saint-Estèphe",
+    "Saint-Mathieu", "Saint-Pierre-de-Frugie", "La Coquille", "Nexon", "Limoges"
+]
+
+
+class CommuneMatcher:
+    """
+    Automate d'Aho-Corasick sur les noms de communes (sans tenir compte de la casse)
+
+    Seules les correspondances qui forment des mots entiers sont retenues,
+    comme avec \\b dans une expression régulière.
+    """
+
+    def __init__(self, communes: Iterable[str]):
+        """
+        Args:
+            communes: Noms des communes, dans leur graphie de référence
+        """
+        # Transitions, lien d'échec et noms reconnus (longueur, nom) de chaque état
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs: List[List[Tuple[int, str]]] = [[]]
+        self.names = {}
+
+        for commune in communes:
+            key = commune.strip().lower()
+            if key and key not in self.names:
+                self.names[key] = commune.strip()
+                self._add(key)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _add(self, key: str):
+        """Ajoute un nom au trie"""
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(key), self.names[key]))
+
+    def _build_failure_links(self):
+        """Calcule les liens d'échec en largeur, et hérite des noms reconnus par ces liens"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Produit (début, fin, commune) pour chaque nom trouvé comme mot entier"""
+        lowered = text.lower()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+
+        state = 0
+        for position, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for length, commune in outputs[state]:
+                start = position - length + 1
+                end = position + 1
+                if _is_word_boundary(lowered, start) and _is_word_boundary(lowered, end):
+                    yield start, end, commune
+
+    def find_longest(self, text: str) -> Optional[str]:
+        """Commune au nom le plus long présente dans le texte (la première en cas d'égalité)"""
+        best = None
+        best_length = 0
+        for start, end, commune in self.iter_matches(text):
+            # Les correspondances arrivent par position de fin : à longueur égale, la première est gardée
+            if end - start > best_length:
+                best, best_length = commune, end - start
+        return best
+
+
+def _is_word_boundary(text: str, position: int) -> bool:
+    """Indique si la position sépare un caractère de mot et un caractère non-mot (\\b)"""
+    before = position > 0 and _is_word_char(text[position - 1])
+    after = position < len(text) and _is_word_char(text[position])
+    return before != after
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+_matcher = None
+
+
+def get_commune_matcher() -> CommuneMatcher:
+    """
+    Automate partagé, construit au premier appel : communes du secteur et
+    communes de la base de coordonnées (data/communes_coordinates.json)
+    """
+    global _matcher
+    if _matcher is None:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        coordinates_file = os.path.join(base_dir, "data", "communes_coordinates.json")
+        try:
+            with open(coordinates_file, 'r', encoding='utf-8') as f:
+                known_communes = [name for name in json.load(f) if not name.startswith('_')]
+        except (FileNotFoundError, json.JSONDecodeError):
+            known_communes = []
+
+        _matcher = CommuneMatcher(COMMUNES_DORDOGNE + known_communes)
+    return _matcher
@@ -0,0 +1,75 @@
+"""
+Analyse des dates françaises des annonces
+Chaque texte de date ("samedi 13 décembre 2025 à 19:05", "du ... au ...")
+n'est analysé qu'une seule fois : le résultat est mémorisé, et les étapes
+suivantes (tri, pages HTML) utilisent directement les datetime obtenus
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import patterns
+
+
+MOIS_NUMEROS = {
+    "janvier": 1, "février": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6,
+    "juillet": 7, "août": 8, "septembre": 9, "octobre": 10, "novembre": 11, "décembre": 12
+}
+
+# Textes de dates distincts mémorisés (les mêmes dates reviennent d'un digest à l'autre)
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_event_period(text: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Analyse la période d'un événement
+
+    Formats reconnus (jour de la semaine et heure facultatifs) :
+    - "du samedi 13 décembre 2025 à 19:05 au samedi 13 décembre 2025 à 23:00"
+    - "13 au 15 décembre 2025"
+    - "13 décembre 2025", "décembre 2025" (premier jour du mois)
+
+    Returns:
+        (début, fin) ; fin vaut None si le texte ne donne qu'une date
+        (None, None) si aucune date n'est reconnue
+    """
+    if not text:
+        return None, None
+
+    matches = list(patterns.FRENCH_DATE_RE.finditer(patterns.WHITESPACE_RE.sub(' ', text)))
+    if not matches:
+        return None, None
+
+    first = matches[0]
+    start = _build_datetime(first.group(1), first.group(3), first.group(4), first.group(5), first.group(6))
+    if start is None:
+        return None, None
+
+    if first.group(2):
+        # Plage de jours dans le même mois : "13 au 15 décembre 2025"
+        end = _build_datetime(first.group(2), first.group(3), first.group(4), None, None)
+    elif len(matches) > 1:
+        second = matches[1]
+        end = _build_datetime(second.group(1), second.group(3), second.group(4), second.group(5), second.group(6))
+    else:
+        end = None
+
+    if end is not None and end < start:
+        end = None
+    return start, end
+
+
+def parse_french_date(text: str) -> Optional[datetime]:
+    """Première date d'un texte ("10 décembre 2025 à 14:40"), ou None"""
+    return parse_event_period(text)[0]
+
+
+def _build_datetime(day: str, month: str, year: str, hours: str, minutes: str) -> Optional[datetime]:
+    """Construit la date à partir des groupes de FRENCH_DATE_RE (None si elle n'existe pas)"""
+    try:
+        return datetime(int(year), MOIS_NUMEROS[month.lower()], int(day) if day else 1,
+                        int(hours) if hours else 0, int(minutes) if minutes else 0)
+    except (KeyError, ValueError):
+        return None
@@ -0,0 +1,184 @@
+"""
+Index d'un digest du crieur
+Le corps est découpé une seule fois en entrées du sommaire et en sections
+Message-ID, avec leurs positions de lignes : les recherches faites pour
+chaque événement se limitent ensuite à la section qui lui correspond
+(ou, si le titre n'y figure pas, à tout ce qui suit le sommaire)
+"""
+
+import bisect
+from typing import Dict, List, Optional
+
+import patterns
+
+
+# Nombre maximal de lignes du contexte d'un événement
+CONTEXT_MAX_LINES = 50
+
+
+class DigestIndex:
+    """
+    Découpage d'un digest en entrées du sommaire et sections Message-ID
+
+    L'entrée n° N du sommaire correspond à la N-ième section Message-ID du
+    digest (même convention que consolidate_events dans main_v2).
+    """
+
+    def __init__(self, body_text: str):
+        """
+        Args:
+            body_text: Corps texte du digest
+        """
+        self.lines = body_text.split('\n')
+        self.lower_lines = [line.lower() for line in self.lines]
+        # Entrées du sommaire : {'numero', 'line', 'text', 'brackets'}
+        self.entries: List[Dict] = []
+        # Sections : {'message_id', 'start', 'end'} (lignes [start, end[)
+        self.sections: List[Dict] = []
+        # Fin du sommaire : première ligne "------" ou "Message-ID:"
+        self.sommaire_end = len(self.lines)
+        # Lignes qui terminent le contexte d'un événement
+        self.context_breaks = [False] * len(self.lines)
+        # En-têtes "Descriptif" suivis d'une ligne de tirets ou de "="
+        self.description_headers: List[int] = []
+
+        self._tokenize()
+
+    def _tokenize(self):
+        """Parcourt les lignes une seule fois pour construire l'index"""
+        lines = self.lines
+        underlined = [self._is_underline(line) for line in lines]
+
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            is_message_id = "Message-ID:" in line
+            is_entry = bool(patterns.DIGEST_ENTRY_RE.match(stripped))
+
+            if (is_message_id or line.startswith("------")) and self.sommaire_end == len(lines):
+                self.sommaire_end = i
+
+            self.context_breaks[i] = is_message_id or line.startswith("------") or is_entry
+
+            if is_message_id:
+                if self.sections:
+                    self.sections[-1]['end'] = i
+                message_id = line.split("Message-ID:", 1)[1].strip()
+                self.sections.append({'message_id': message_id, 'start': i, 'end': len(lines)})
+
+            entry_match = patterns.DIGEST_ENTRY_RE.match(line)
+            if entry_match:
+                first_line = patterns.WHITESPACE_RE.sub(' ', patterns.LINE_BREAKS_RE.sub(' ', line))
+                self.entries.append({
+                    'numero': int(entry_match.group(1)),
+                    'line': i,
+                    'text': self._entry_text(i, first_line),
+                    'brackets': patterns.BRACKETS_RE.findall(first_line)
+                })
+
+            if (i + 1 < len(lines) and underlined[i + 1]
+                    and patterns.DESCRIPTION_HEADER_START_RE.search(line)):
+                self.description_headers.append(i)
+
+    def _is_underline(self, line: str) -> bool:
+        """Ligne composée uniquement de tirets ou de "=" """
+        stripped = line.strip()
+        return bool(patterns.DASH_LINE_RE.match(stripped) or patterns.EQUALS_LINE_RE.match(stripped))
+
+    def _entry_text(self, start: int, first_line: str) -> str:
+        """
+        Texte complet d'une entrée du sommaire, souvent sur plusieurs lignes
+        (jusqu'à une ligne vide, des tirets, l'entrée suivante ou un Message-ID)
+        """
+        full_entry = first_line
+
+        j = start + 1
+        while (j < len(self.lines) and not patterns.DIGEST_ENTRY_START_RE.match(self.lines[j].strip())
+               and "Message-ID:" not in self.lines[j]):
+            next_line = self.lines[j].strip()
+            if not next_line or next_line.startswith('-'):
+                break
+            full_entry += " " + next_line
+            j += 1
+        return full_entry
+
+    def section_for(self, numero: int) -> Optional[Dict]:
+        """Section Message-ID de l'entrée n° `numero` du sommaire (ou None)"""
+        if 1 <= numero <= len(self.sections):
+            return self.sections[numero - 1]
+        return None
+
+    def _search_bounds(self, numero: int) -> List[tuple]:
+        """
+        Plages de lignes à explorer pour une entrée, dans l'ordre : sa section,
+        puis tout ce qui suit le sommaire (le découpage peut être décalé si une
+        ligne Message-ID manque ou si le sommaire ne suit pas l'ordre des messages)
+        """
+        whole_body = (self.sommaire_end, len(self.lines))
+        section = self.section_for(numero)
+        if section and (section['start'], section['end']) != whole_body:
+            return [(section['start'], section['end']), whole_body]
+        return [whole_body]
+
+    def find_event_context(self, title: str, numero: int) -> str:
+        """
+        Contexte d'un événement : la première ligne de sa section contenant le
+        titre, et les suivantes jusqu'au prochain Message-ID, séparateur ou
+        entrée du sommaire
+        """
+        if not title or len(title.strip()) < 3:
+            return ""
+
+        title_lower = title.strip().rstrip('-').strip().lower()
+
+        for start, end in self._search_bounds(numero):
+            for i in range(start, end):
+                if title_lower in self.lower_lines[i]:
+                    j = i + 1
+                    while j < len(self.lines) and j - i < CONTEXT_MAX_LINES and not self.context_breaks[j]:
+                        j += 1
+                    return '\n'.join(self.lines[i:j])
+
+        return ""
+
+    def find_description_starts(self, title: str, numero: int) -> List[int]:
+        """
+        Positions candidates du début du descriptif d'un événement, par ordre de
+        fiabilité : après le Subject contenant le titre, après une en-tête
+        "[...]" contenant le titre, puis après le titre souligné
+        """
+        if not title or len(title.strip()) < 3:
+            return []
+
+        title_lower = title.strip().rstrip('-').strip().lower()
+
+        for start, end in self._search_bounds(numero):
+            candidates = self._description_starts_between(title_lower, start, end)
+            if candidates:
+                return candidates
+        return []
+
+    def _description_starts_between(self, title_lower: str, start: int, end: int) -> List[int]:
+        """Débuts de descriptif candidats dans les lignes [start, end[ (voir find_description_starts)"""
+        lines, lower_lines = self.lines, self.lower_lines
+
+        candidates = []
+        # Stratégie 1 : titre dans un Subject:
+        for i in range(start, end):
+            if "Subject:" in lines[i] and title_lower in lower_lines[i]:
+                candidates.extend(self._headers_between(i, min(i + 80, end)))
+        # Stratégie 2 : titre dans une en-tête de section (ex: "[KAAG] - [Chalais]")
+        for i in range(start, end):
+            if lines[i].startswith("[") and title_lower in lower_lines[i]:
+                candidates.extend(self._headers_between(i, min(i + 80, end)))
+        # Stratégie 3 : titre seul sur sa ligne, souligné de tirets ou de "="
+        for i in range(start, end - 1):
+            if title_lower == lower_lines[i].strip() and self._is_underline(lines[i + 1]):
+                candidates.extend(self._headers_between(i + 2, min(i + 100, end)))
+
+        return [header + 2 for header in candidates]
+
+    def _headers_between(self, start: int, end: int) -> List[int]:
+        """En-têtes "Descriptif" situées dans les lignes [start, end["""
+        low = bisect.bisect_left(self.description_headers, start)
+        high = bisect.bisect_left(self.description_headers, end)
+        return self.description_headers[low:high]
@@ -7,101 +7,116 @@ import imaplib
 import email
 from email.message import Message
 from email.header import decode_header
-from datetime import datetime
+from datetime import datetime, date
 import re
 import json
-from typing import List, Dict, Tuple
+import select
+import ssl
+import threading
+import time
+import zlib
+from typing import List, Dict, Tuple, Iterator
+import bs4
 from bs4 import BeautifulSoup
-import os
+try:
+    import lxml.html
+except ImportError:  # lxml est optionnel : BeautifulSoup sert alors à extraire le texte
+    lxml = None
 from dotenv import load_dotenv
 import htmlmin
+from imap_state import ImapSyncState
+from digest_index import DigestIndex
+from commune_matcher import get_commune_matcher
+import patterns
+from text_cleaner import DISPLAY_TEXT_TABLE
+from date_parser import parse_event_period, parse_french_date
 
 load_dotenv()
 
 
-class EmailReader:
-    """Classe pour lire les emails via IMAP"""
-    
-    def __init__(self, email_address: str, password: str, imap_server: str = "imap.free.fr", imap_port: int = 993):
-        """
-        Initialise la connexion à la boîte aux lettres
-        
-        Args:
-            email_address: Adresse email
-            password: Mot de passe ou token d'application
-            imap_server: Serveur IMAP (par défaut Free)
-            imap_port: Port IMAP (par défaut 993 pour SSL)
-        """
-        self.email_address = email_address
-        self.imap_server = imap_server
-        self.imap_port = imap_port
-        self.connection = None
-        self.connect(email_address, password, imap_server, imap_port)
-    
-    def connect(self, email_address: str, password: str, imap_server: str, imap_port: int = 993):
-        """Établit la connexion IMAP"""
-        try:
-            self.connection = imaplib.IMAP4_SSL(imap_server, imap_port)
-            self.connection.login(email_address, password)
-            print(f"✓ Connecté à {email_address}")
-        except imaplib.IMAP4.error as e:
-            print(f"✗ Erreur de connexion: {e}")
-            raise
-    
-    def get_emails(self, folder: str = "INBOX", limit: int = 10, domain_filter: str = None) -> List[Dict]:
-        """
-        Récupère les emails d'un dossier
-        
-        Args:
-            folder: Nom du dossier (INBOX par défaut)
-            limit: Nombre d'emails à récupérer
-            domain_filter: Filtrer par domaine (ex: "gco.ouvaton.net")
-            
-        Returns:
-            Liste des emails avec métadonnées
-        """
+# Découpage des réponses FETCH multi-messages
+FETCH_RESPONSE_START_RE = re.compile(r"^\d+ \(")
+FETCH_UID_RE = re.compile(r"\bUID (\d+)")
+FETCH_LITERAL_ITEM_RE = re.compile(r"([A-Z0-9.]+(?:\[[^\]]*\])?(?:<\d+>)?) \{\d+\}$", re.IGNORECASE)
+FETCH_LITERAL_SIZE_RE = re.compile(r"\{\d+\}$")
+
+# Analyse de BODYSTRUCTURE
+BODYSTRUCTURE_RE = re.compile(r"\bBODYSTRUCTURE \(", re.IGNORECASE)
+IMAP_QUOTED_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+IMAP_ATOM_RE = re.compile(r'[^\s()"]+')
+MIME_HEADERS_RE = re.compile(rb"^(?:Content-Type|Content-Transfer-Encoding|MIME-Version):.*\r?\n(?:[ \t].*\r?\n)*",
+                             re.IGNORECASE | re.MULTILINE)
+
+# Balises HTML réelles (les adresses "<nom@domaine>" des sommaires n'en sont pas)
+HTML_TAG_RE = re.compile(
+    r"<(?:!doctype|/?(?:html|head|body|div|p|br|span|a|table|tr|td|th|ul|ol|li|font|b|i|u|strong|em|img|h[1-6])"
+    r"(?:\s[^>]*)?/?)>",
+    re.IGNORECASE
+)
+
+# Attente des nouveaux messages (IDLE) : relancée avant les 30 minutes
+# d'inactivité au-delà desquelles les serveurs peuvent couper la connexion
+IDLE_TIMEOUT = 29 * 60
+IDLE_EXISTS_RE = re.compile(rb"^\* \d+ EXISTS", re.IGNORECASE)
+
+
+def decode_part(part: Message) -> str:
+    """
+    Décode le contenu d'une partie MIME en texte
+
+    L'encodage de transfert (quoted-printable, base64...) puis le charset
+    déclarés par la partie sont appliqués une seule fois : le texte obtenu
+    est définitif, les extracteurs n'ont plus de séquences "=C3=A9" à corriger.
+    """
+    payload = part.get_payload(decode=True)
+    if not isinstance(payload, bytes):
+        return payload or ""
+
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        return payload.decode(charset, errors="ignore")
+    except LookupError:
+        # Charset inconnu de Python : UTF-8 par défaut
+        return payload.decode("utf-8", errors="ignore")
+
+
+def is_html_body(body: str, content_type: str = None) -> bool:
+    """
+    Indique si un corps de message est du HTML
+
+    Le type MIME de la partie fait foi s'il est connu ; sinon le corps doit
+    contenir de vraies balises HTML, un simple "<" ne suffit pas.
+    """
+    if "<" not in body:
+        return False
+    if content_type == "text/html":
+        return True
+    if content_type == "text/plain":
+        return False
+    return bool(HTML_TAG_RE.search(body))
+
+
+def html_to_text(html: str) -> str:
+    """Extrait le texte d'un document HTML (lxml si disponible, sinon BeautifulSoup)"""
+    if lxml is not None:
         try:
-            self.connection.select(folder)
-            status, messages = self.connection.search(None, "ALL")
-            
-            if status != "OK":
-                print(f"✗ Erreur lors de la recherche dans {folder}")
-                return []
-            
-            email_ids = messages[0].split()
-            # Récupère les derniers emails en priorité
-            email_ids = email_ids[-limit*2:]  # Récupère plus pour avoir assez après filtrage
-            
-            emails = []
-            for email_id in reversed(email_ids):
-                status, msg_data = self.connection.fetch(email_id, "(RFC822)")
-                
-                if status != "OK":
-                    continue
-                
-                msg = email.message_from_bytes(msg_data[0][1])
-                
-                # Filtre par domaine si demandé
-                if domain_filter:
-                    sender = self._decode_header(msg.get("From", ""))
-                    # Extrait le domaine de l'adresse email
-                    if "@" in sender:
-                        email_domain = sender.split("@")[-1].rstrip(">").strip()
-                        if domain_filter not in email_domain:
-                            continue
-                
-                email_dict = self._parse_email(msg)
-                emails.append(email_dict)
-                
-                if len(emails) >= limit:
-                    break
-            
-            print(f"✓ {len(emails)} email(s) récupéré(s)" + (f" du domaine {domain_filter}" if domain_filter else ""))
-            return emails
-            
-        except Exception as e:
-            print(f"✗ Erreur lors de la récupération: {e}")
-            return []
+            document = lxml.html.fromstring(html)
+            for element in document.xpath("//script|//style"):
+                element.drop_tree()
+            return document.text_content()
+        except (lxml.etree.ParserError, ValueError):
+            pass  # Document vide ou illisible pour lxml : repli sur BeautifulSoup
+
+    return BeautifulSoup(html, "html.parser").get_text()
+
+
+# Bibliothèque utilisée par html_to_text : le texte extrait en dépend, elle
+# fait donc partie de l'empreinte du registre d'extraction
+HTML_TEXT_BACKEND = f"lxml {lxml.etree.__version__}" if lxml is not None else f"beautifulsoup4 {bs4.__version__}"
+
+
+class MessageParser:
+    """Décode les messages email (commun aux lecteurs IMAP et hors ligne)"""
     
     def _parse_email(self, msg: Message) -> Dict:
         """Extrait les informations d'un email"""
@@ -113,13 +128,15 @@ class EmailReader:
         formatted_date = self._format_email_date(date_str)
         
         # Récupère le contenu
-        body = self._get_body(msg)
+        body_part = self._get_body_part(msg)
+        body = self._decode_payload(body_part) if body_part is not None else ""
         
         return {
             "subject": subject,
             "from": sender,
             "date": formatted_date,
             "body": body,
+            "content_type": body_part.get_content_type() if body_part is not None else "text/plain",
             "message_id": msg.get("Message-ID", "")
         }
     
@@ -160,46 +177,916 @@ class EmailReader:
         decoded_parts = []
         for part, encoding in decode_header(header):
             if isinstance(part, bytes):
-                decoded_parts.append(part.decode(encoding or "utf-8", errors="ignore"))
+                try:
+                    decoded_parts.append(part.decode(encoding or "utf-8", errors="ignore"))
+                except LookupError:
+                    # En-tête 8 bits brut ("unknown-8bit") ou charset inconnu de Python
+                    decoded_parts.append(part.decode("utf-8", errors="replace"))
             else:
                 decoded_parts.append(part)
         return "".join(decoded_parts)
     
     def _get_body(self, msg: Message) -> str:
         """Extrait le corps du message (HTML ou texte)"""
-        import quopri
+        body_part = self._get_body_part(msg)
+        return self._decode_payload(body_part) if body_part is not None else ""
+    
+    def _get_body_part(self, msg: Message) -> Message | None:
+        """Partie contenant le corps du message : HTML en priorité, sinon texte"""
+        if not msg.is_multipart():
+            return msg
+        
+        body_part = None
+        for part in msg.walk():
+            content_type = part.get_content_type()
+            content_disposition = part.get("Content-Disposition", "")
+            
+            if "attachment" not in content_disposition:
+                if content_type == "text/html":
+                    return part
+                elif content_type == "text/plain":
+                    body_part = part
         
-        body = ""
+        return body_part
+    
+    def _decode_payload(self, part: Message) -> str:
+        """Décode une partie selon son encodage de transfert et son charset déclarés"""
+        return decode_part(part)
+    
+    def _matches_filters(self, msg: Message, domain_filter: str = None, subject_filters: List[str] = None) -> bool:
+        """Vérifie le domaine d'expédition et le sujet d'un message à partir de ses en-têtes"""
+        # Filtre par domaine si demandé
+        if domain_filter:
+            sender = self._decode_header(msg.get("From", ""))
+            # Extrait le domaine de l'adresse email
+            if "@" in sender:
+                email_domain = sender.split("@")[-1].rstrip(">").strip()
+                if domain_filter not in email_domain:
+                    return False
+        
+        # Ne garde que les digests des listes demandées
+        if subject_filters:
+            subject = self._decode_header(msg.get("Subject", "")).lower()
+            if not any(subject_filter in subject for subject_filter in subject_filters):
+                return False
+        
+        return True
+
+
+class CompressedIMAP4_SSL(imaplib.IMAP4_SSL):
+    """
+    Connexion IMAP SSL pouvant activer la compression DEFLATE (RFC 4978)
+
+    Une fois la compression activée, tout ce qui est envoyé et reçu passe par
+    un flux zlib brut ; les réponses décompressées sont lues depuis un tampon.
+    """
+
+    # Taille maximale lue sur le socket à la fois
+    READ_CHUNK_SIZE = 65536
+
+    def __init__(self, *args, **kwargs):
+        self._compressor = None
+        self._decompressor = None
+        self._inbuf = bytearray()
+        self.compressed_bytes_received = 0
+        self.bytes_received = 0
+        super().__init__(*args, **kwargs)
+
+    @property
+    def compression_enabled(self) -> bool:
+        return self._decompressor is not None
+
+    def enable_compression(self) -> bool:
+        """
+        Négocie COMPRESS DEFLATE si le serveur l'annonce
+
+        Returns:
+            True si la compression est active
+        """
+        _, capabilities = self.capability()
+        if b"COMPRESS=DEFLATE" not in (capabilities[0] or b"").upper().split():
+            return False
+
+        status, _ = self.xatom("COMPRESS", "DEFLATE")
+        if status != "OK":
+            return False
+
+        self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return True
+
+    def send(self, data: bytes):
+        if self._compressor is not None:
+            data = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        super().send(data)
+
+    def read(self, size: int) -> bytes:
+        if self._decompressor is None:
+            return super().read(size)
+
+        while len(self._inbuf) < size and self._fill_inbuf():
+            pass
+        data = bytes(self._inbuf[:size])
+        del self._inbuf[:size]
+        return data
+
+    def readline(self) -> bytes:
+        if self._decompressor is None:
+            return super().readline()
+
+        searched = 0
+        while True:
+            end = self._inbuf.find(b"\n", searched)
+            if end != -1:
+                end += 1
+                break
+            searched = len(self._inbuf)
+            if searched > imaplib._MAXLINE:
+                raise self.error(f"got more than {imaplib._MAXLINE} bytes")
+            if not self._fill_inbuf():
+                end = len(self._inbuf)
+                break
+
+        line = bytes(self._inbuf[:end])
+        del self._inbuf[:end]
+        return line
+
+    def _fill_inbuf(self) -> bool:
+        """Lit et décompresse un bloc reçu (False en fin de connexion)"""
+        chunk = self.file.read1(self.READ_CHUNK_SIZE)
+        if not chunk:
+            return False
+        data = self._decompressor.decompress(chunk)
+        self.compressed_bytes_received += len(chunk)
+        self.bytes_received += len(data)
+        self._inbuf += data
+        return True
+
+    def has_buffered_data(self) -> bool:
+        """
+        Indique sans bloquer si des données reçues attendent d'être lues
+
+        imaplib lit le socket par blocs : des réponses déjà reçues peuvent se
+        trouver dans ses tampons (ou dans celui de SSL) sans que select ne
+        les voie.
+        """
+        if self._inbuf:
+            return True
+
+        previous_timeout = self.sock.gettimeout()
+        self.sock.setblocking(False)
+        try:
+            if self.file.peek(1):
+                return True
+        except (BlockingIOError, ssl.SSLWantReadError):
+            pass
+        finally:
+            self.sock.settimeout(previous_timeout)
+        return False
+
+    # IDLE (RFC 2177) n'est pas proposé par imaplib : les deux méthodes
+    # suivantes sont les seules à utiliser ses attributs internes des tags
+
+    def start_idle(self) -> bytes:
+        """
+        Envoie la commande IDLE et attend l'invitation du serveur ("+ idling")
+
+        Returns:
+            Tag de la commande, à passer à finish_idle
+
+        Raises:
+            imaplib.IMAP4.error: IDLE refusé par le serveur
+        """
+        tag = self._new_tag()
+        self.send(tag + b" IDLE\r\n")
+        line = self.readline()
+        if not line.startswith(b"+"):
+            self.tagged_commands.pop(tag, None)
+            raise self.error(f"IDLE refusé: {line.decode(errors='replace').strip()}")
+        return tag
+
+    def finish_idle(self, tag: bytes) -> List[bytes]:
+        """
+        Termine IDLE (DONE) et lit les réponses jusqu'à la fin de la commande
+
+        Returns:
+            Réponses non étiquetées reçues avant la fin de la commande
+
+        Raises:
+            imaplib.IMAP4.abort: connexion fermée avant la fin de la commande
+            imaplib.IMAP4.error: commande terminée par NO ou BAD
+        """
+        self.send(b"DONE\r\n")
+        lines = []
+        try:
+            while True:
+                line = self.readline()
+                if not line:
+                    raise self.abort("Connexion fermée pendant IDLE")
+                if line.startswith(tag + b" "):
+                    break
+                lines.append(line)
+        finally:
+            self.tagged_commands.pop(tag, None)
+
+        status = line[len(tag) + 1:].split(b" ", 1)[0].upper()
+        if status != b"OK":
+            raise self.error(f"IDLE terminé en erreur: {line.decode(errors='replace').strip()}")
+        return lines
+
+
+class EmailReader(MessageParser):
+    """Classe pour lire les emails via IMAP"""
+    
+    # Nombre d'UID demandés par commande FETCH
+    FETCH_BATCH_SIZE = 50
+    
+    # En-têtes suffisants pour trier les messages avant de télécharger les corps
+    HEADER_FETCH_ITEM = "BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)]"
+    
+    # Reprise après une coupure réseau : nombre de nouvelles tentatives et
+    # délai avant la première (doublé à chaque échec)
+    MAX_RETRIES = 5
+    RETRY_BASE_DELAY = 2
+    
+    # Inactivité (secondes) au-delà de laquelle un NOOP est envoyé pour que le
+    # serveur ne coupe pas la session pendant un long traitement de l'appelant
+    KEEPALIVE_INTERVAL = 5 * 60
+    
+    def __init__(self, email_address: str, password: str, imap_server: str = "imap.free.fr", imap_port: int = 993,
+                 sync_state: ImapSyncState = None, store=None, compress: bool = True):
+        """
+        Initialise la connexion à la boîte aux lettres
         
-        if msg.is_multipart():
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = part.get("Content-Disposition", "")
+        Args:
+            email_address: Adresse email
+            password: Mot de passe ou token d'application
+            imap_server: Serveur IMAP (par défaut Free)
+            imap_port: Port IMAP (par défaut 993 pour SSL)
+            sync_state: État de synchronisation pour le mode incrémental (optionnel)
+            store: Magasin local (MessageStore) où écrire les messages téléchargés (optionnel)
+            compress: Active la compression DEFLATE si le serveur la propose
+        """
+        self.email_address = email_address
+        self.imap_server = imap_server
+        self.imap_port = imap_port
+        self.sync_state = sync_state
+        self.store = store
+        self.compress = compress
+        self.connection = None
+        # Conservés pour rouvrir la session après une coupure
+        self._password = password
+        self._folder = None
+        self._uidvalidity = None
+        self._last_activity = 0
+        # Une seule commande à la fois sur la connexion (NOOP du thread de maintien compris)
+        self._lock = threading.RLock()
+        self._stop_keepalive = threading.Event()
+        self.connect(email_address, password, imap_server, imap_port)
+        threading.Thread(target=self._keepalive_loop, name="imap-keepalive", daemon=True).start()
+    
+    def connect(self, email_address: str, password: str, imap_server: str, imap_port: int = 993):
+        """Établit la connexion IMAP"""
+        try:
+            self.connection = CompressedIMAP4_SSL(imap_server, imap_port)
+            self.connection.login(email_address, password)
+            self._last_activity = time.monotonic()
+            print(f"✓ Connecté à {email_address}")
+            
+            # Les digests (texte répétitif, quoted-printable) se compressent très bien
+            if self.compress and self.connection.enable_compression():
+                print("✓ Compression DEFLATE activée")
+        except imaplib.IMAP4.error as e:
+            print(f"✗ Erreur de connexion: {e}")
+            raise
+    
+    def _reconnect(self):
+        """Rouvre la session et resélectionne le dossier en cours de lecture"""
+        try:
+            self.connection.shutdown()
+        except (imaplib.IMAP4.error, OSError):
+            pass
+        
+        self.connect(self.email_address, self._password, self.imap_server, self.imap_port)
+        if self._folder is None:
+            return
+        
+        status, _ = self.connection.select(self._folder)
+        if status != "OK":
+            raise imaplib.IMAP4.abort(f"Impossible de rouvrir le dossier {self._folder}")
+        
+        # Les UID déjà obtenus ne désignent plus les mêmes messages : pas de reprise possible
+        if self._uidvalidity is not None and self._get_uidvalidity(self._folder) != self._uidvalidity:
+            raise imaplib.IMAP4.error(f"UIDVALIDITY du dossier '{self._folder}' modifiée pendant la reconnexion")
+    
+    def _run_command(self, name: str, *args):
+        """
+        Exécute une commande IMAP, en se reconnectant si la connexion est coupée
+        
+        Après une coupure, la commande est renvoyée sur une nouvelle session,
+        avec un délai doublé à chaque échec (RETRY_BASE_DELAY, 2x, 4x...).
+        Les lots déjà reçus ne sont pas redemandés : la lecture reprend au lot
+        interrompu. Après MAX_RETRIES échecs, l'erreur est propagée.
+        
+        Args:
+            name: Méthode de imaplib.IMAP4 (ex: "uid", "select")
+            *args: Arguments de la commande
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                with self._lock:
+                    result = getattr(self.connection, name)(*args)
+                    self._last_activity = time.monotonic()
+                return result
+            except (imaplib.IMAP4.abort, OSError) as e:
+                if attempt == self.MAX_RETRIES:
+                    print(f"✗ Connexion perdue après {self.MAX_RETRIES} tentatives: {e}")
+                    raise
                 
-                if "attachment" not in content_disposition:
-                    if content_type == "text/html":
-                        body = part.get_payload(decode=True).decode("utf-8", errors="ignore")
-                        return body
-                    elif content_type == "text/plain":
-                        body = part.get_payload(decode=True).decode("utf-8", errors="ignore")
-        else:
-            body = msg.get_payload(decode=True)
-            if isinstance(body, bytes):
-                body = body.decode("utf-8", errors="ignore")
+                delay = self.RETRY_BASE_DELAY * 2 ** attempt
+                print(f"⚠ Connexion interrompue ({e}), nouvelle tentative dans {delay}s...")
+                time.sleep(delay)
+                try:
+                    with self._lock:
+                        self._reconnect()
+                except (imaplib.IMAP4.abort, OSError) as e:
+                    print(f"⚠ Reconnexion impossible: {e}")
+    
+    def _keepalive_loop(self):
+        """Thread de maintien : vérifie l'inactivité de la session jusqu'à close()"""
+        while not self._stop_keepalive.wait(self.KEEPALIVE_INTERVAL / 5):
+            self._keepalive()
+    
+    def _keepalive(self):
+        """
+        Envoie un NOOP si aucune commande n'a été envoyée depuis KEEPALIVE_INTERVAL
         
-        # Décode les encodages QUOTED-PRINTABLE restants
-        if "=" in body and body.count("=") > 3:
+        Appelé par le thread de maintien, y compris pendant que l'appelant
+        traite les emails déjà produits par iter_emails. Une erreur n'est pas
+        propagée : la commande suivante la retrouve et rouvre la session.
+        """
+        with self._lock:
+            if self.connection is None or time.monotonic() - self._last_activity <= self.KEEPALIVE_INTERVAL:
+                return
             try:
-                body = quopri.decodestring(body.encode()).decode("utf-8", errors="ignore")
-            except:
-                pass
+                self.connection.noop()
+            except (imaplib.IMAP4.error, OSError) as e:
+                print(f"⚠ NOOP de maintien en échec: {e}")
+            self._last_activity = time.monotonic()
+    
+    def get_emails(self, folder: str = "INBOX", limit: int = 10, domain_filter: str = None,
+                   subject_filters: List[str] = None, since: date = None) -> List[Dict]:
+        """Récupère les emails d'un dossier dans une liste (voir iter_emails)"""
+        emails = list(self.iter_emails(folder, limit, domain_filter, subject_filters, since))
+        print(f"✓ {len(emails)} email(s) récupéré(s)" + (f" du domaine {domain_filter}" if domain_filter else ""))
+        return emails
+    
+    def iter_emails(self, folder: str = "INBOX", limit: int = 10, domain_filter: str = None,
+                    subject_filters: List[str] = None, since: date = None) -> Iterator[Dict]:
+        """
+        Produit les emails d'un dossier un par un, au fil du téléchargement
+        
+        Chaque email est produit dès que son corps est téléchargé : l'appelant
+        peut le traiter puis le libérer avant que le suivant n'arrive.
+        
+        Les filtres (domaine, sujets, date) sont envoyés au serveur dans la
+        commande SEARCH. Les en-têtes des candidats sont ensuite récupérés seuls
+        et seuls les corps des messages retenus sont téléchargés.
+        
+        En mode incrémental (sync_state et store fournis), seuls les UID
+        supérieurs au dernier UID traité sont téléchargés ; ils sont fusionnés
+        avec la fenêtre des emails mémorisée lors des exécutions précédentes,
+        relue depuis le magasin local et limitée à `since`. Cette fenêtre
+        n'est mise à jour que si l'itération va jusqu'au bout.
+        
+        Args:
+            folder: Nom du dossier (INBOX par défaut)
+            limit: Nombre d'emails à récupérer
+            domain_filter: Filtrer par domaine (ex: "gco.ouvaton.net")
+            subject_filters: Garder les sujets contenant l'un de ces textes (ex: ["crieur-des-sorties"])
+            since: Ne garder que les messages reçus à partir de cette date
+            
+        Yields:
+            Emails avec métadonnées
+            
+        Raises:
+            imaplib.IMAP4.error, OSError: connexion perdue malgré les nouvelles
+            tentatives (plutôt qu'une liste vide qui produirait des pages vides)
+        """
+        try:
+            self._folder = None
+            status, _ = self._run_command("select", folder)
+            if status != "OK":
+                print(f"✗ Impossible d'ouvrir le dossier {folder}")
+                return
+            
+            # État de la synchronisation précédente (mode incrémental)
+            uidvalidity = self._get_uidvalidity(folder)
+            self._folder, self._uidvalidity = folder, uidvalidity
+            criteria = {"limit": limit, "domain_filter": domain_filter, "subject_filters": subject_filters}
+            # La fenêtre mémorisée est relue depuis le magasin local, indispensable ici
+            incremental = self.sync_state is not None and self.store is not None
+            if self.sync_state is not None and self.store is None:
+                print("⚠ Synchronisation incrémentale impossible sans magasin local (MESSAGE_STORE), lecture complète")
+            cached_window = []
+            last_uid = 0
+            if incremental:
+                folder_state = self.sync_state.get_folder(folder, uidvalidity, criteria, since)
+                if folder_state:
+                    cached_window = self._usable_window(folder_state["window"], since)
+                    if cached_window is None:
+                        print("⚠ Messages de la fenêtre absents du magasin local, resynchronisation complète")
+                        cached_window = []
+                    else:
+                        last_uid = folder_state["last_uid"]
+            
+            search_criteria = self._build_search_criteria(domain_filter, subject_filters, since, last_uid)
+            status, messages = self._run_command("uid", "SEARCH", None, search_criteria)
+            
+            if status != "OK":
+                print(f"✗ Erreur lors de la recherche dans {folder}")
+                return
+            
+            # "UID n:*" renvoie toujours le dernier message, même déjà traité
+            email_uids = [int(uid) for uid in messages[0].split() if int(uid) > last_uid]
+            
+            # Phase 1 : en-têtes et structure MIME seulement (quelques centaines
+            # d'octets par message) pour retenir les derniers emails pertinents,
+            # les plus récents en priorité
+            selected = []
+            phase1_items = f"({self.HEADER_FETCH_ITEM} BODYSTRUCTURE)"
+            for fetched in self._fetch_messages(list(reversed(email_uids)), phase1_items):
+                header_bytes = self._get_fetched_header(fetched)
+                if header_bytes is None:
+                    continue
+                
+                if not self._matches_filters(email.message_from_bytes(header_bytes), domain_filter, subject_filters):
+                    continue
+                
+                selected.append(fetched)
+                if len(selected) >= limit:
+                    break
+            
+            # Phase 2 : seule la partie texte des messages retenus est téléchargée
+            new_window = []
+            for email_uid, raw_message in self._fetch_text_messages(selected):
+                msg = email.message_from_bytes(raw_message)
+                
+                # Conserve le message pour les régénérations hors ligne
+                if self.store is not None:
+                    message_id = msg.get("Message-ID", "")
+                    digest = self.store.put(raw_message, message_id, msg.get("Date", ""), folder, email_uid)
+                    new_window.append({"message_id": message_id.strip() or digest, "uid": email_uid})
+                
+                email_dict = self._parse_email(msg)
+                email_dict["uid"] = email_uid
+                yield email_dict
+            
+            if self.store is not None:
+                self.store.save()
+            
+            if incremental:
+                print(f"✓ {len(new_window)} nouvel(s) email(s) depuis l'UID {last_uid}")
+                cached_window = cached_window[:max(limit - len(new_window), 0)]
+                for reference in cached_window:
+                    email_dict = self._parse_email(email.message_from_bytes(self.store.get(reference["message_id"])))
+                    email_dict["uid"] = reference["uid"]
+                    yield email_dict
+                self.sync_state.update_folder(folder, uidvalidity, max(email_uids, default=last_uid), criteria,
+                                              new_window + cached_window, since)
+                self.sync_state.save()
+            
+        except Exception as e:
+            print(f"✗ Erreur lors de la récupération: {e}")
+            raise
+    
+    def _usable_window(self, window: List[Dict], since: date = None) -> List[Dict] | None:
+        """
+        Références de la fenêtre mémorisée encore valables pour `since`
+
+        Returns:
+            Références des messages reçus à partir de `since`, ou None si un
+            message de la fenêtre manque au magasin (fenêtre irrécupérable)
+        """
+        if not all(self.store.has(reference["message_id"]) for reference in window):
+            return None
+        if since is None:
+            return list(window)
+        
+        since_timestamp = datetime(since.year, since.month, since.day).timestamp()
+        return [reference for reference in window
+                if self.store.timestamp(reference["message_id"]) >= since_timestamp]
+    
+    def _get_fetched_header(self, fetched: Dict) -> bytes:
+        """Retourne le littéral d'en-têtes d'une réponse FETCH (BODY[HEADER...])"""
+        for item_name, literal in fetched["items"].items():
+            if item_name.startswith("BODY[HEADER"):
+                return literal
+        return None
+    
+    def _fetch_text_messages(self, selected: List[Dict]) -> Iterator[Tuple[int, bytes]]:
+        """
+        Télécharge uniquement la partie texte de chaque message retenu
+        
+        La section à récupérer (BODY.PEEK[n]) est déduite de BODYSTRUCTURE,
+        les pièces jointes ne sont donc jamais transférées. Les messages sont
+        traités par lots de FETCH_BATCH_SIZE, regroupés par section à
+        l'intérieur d'un lot ; chaque lot est restitué avant de télécharger le
+        suivant, seuls les corps d'un lot sont donc en mémoire. Si aucune
+        partie texte n'est identifiable, le message complet (RFC822) est récupéré.
+        
+        Args:
+            selected: Réponses de la phase 1 (en-têtes + BODYSTRUCTURE)
+            
+        Yields:
+            Tuples (uid, message RFC822 réduit à sa partie texte), dans l'ordre de sélection
+        """
+        for start in range(0, len(selected), self.FETCH_BATCH_SIZE):
+            yield from self._fetch_text_batch(selected[start:start + self.FETCH_BATCH_SIZE])
+    
+    def _fetch_text_batch(self, batch: List[Dict]) -> Iterator[Tuple[int, bytes]]:
+        """Télécharge la partie texte d'un lot de messages (voir _fetch_text_messages)"""
+        uids_by_section = {}
+        text_parts = {}
+        full_uids = []
+        
+        for fetched in batch:
+            text_part = self._find_text_part(fetched)
+            if text_part:
+                text_parts[fetched["uid"]] = text_part
+                uids_by_section.setdefault(text_part[0], []).append(fetched["uid"])
+            else:
+                full_uids.append(fetched["uid"])
+        
+        part_by_uid = {}
+        for section, uids in uids_by_section.items():
+            for fetched in self._fetch_messages(uids, f"(BODY.PEEK[{section}])"):
+                part_bytes = fetched["items"].get(f"BODY[{section}]")
+                if part_bytes is not None:
+                    part_by_uid[fetched["uid"]] = part_bytes
+        
+        full_by_uid = {}
+        for fetched in self._fetch_messages(full_uids, "(RFC822)"):
+            raw_message = fetched["items"].get("RFC822")
+            if raw_message is not None:
+                full_by_uid[fetched["uid"]] = raw_message
+        
+        # Restitue les messages du lot dans l'ordre de sélection, en libérant
+        # chaque corps dès qu'il est transmis
+        for fetched in batch:
+            uid = fetched["uid"]
+            if uid in part_by_uid:
+                _, part_structure = text_parts[uid]
+                yield uid, self._build_text_message(self._get_fetched_header(fetched), part_structure,
+                                                    part_by_uid.pop(uid))
+            elif uid in full_by_uid:
+                yield uid, full_by_uid.pop(uid)
+    
+    def _find_text_part(self, fetched: Dict) -> Tuple[str, list]:
+        """
+        Choisit la partie à télécharger d'après BODYSTRUCTURE, comme _get_body :
+        la première partie text/html, sinon la dernière partie text/plain
+        (hors pièces jointes). Un message non multipart est toujours la section 1.
+        
+        Returns:
+            Tuple (section, structure de la partie) ou None
+        """
+        structure = self._parse_bodystructure(fetched["text"])
+        if not structure:
+            return None
+        
+        if not isinstance(structure[0], list):
+            return ("1", structure)
+        
+        text_part = None
+        for section, part in self._walk_bodystructure(structure, ""):
+            if self._get_part_disposition(part) == "attachment":
+                continue
+            content_type = f"{part[0]}/{part[1]}".lower()
+            if content_type == "text/html":
+                return (section, part)
+            elif content_type == "text/plain":
+                text_part = (section, part)
+        
+        return text_part
+    
+    def _walk_bodystructure(self, structure: list, section: str) -> Iterator[Tuple[str, list]]:
+        """Parcourt les parties feuilles de BODYSTRUCTURE avec leur numéro de section IMAP"""
+        if isinstance(structure[0], list):
+            # Multipart : les sous-parties précèdent le sous-type
+            for index, child in enumerate(self._bodystructure_children(structure), 1):
+                yield from self._walk_bodystructure(child, f"{section}.{index}" if section else str(index))
+            return
+        
+        section = section or "1"
+        yield section, structure
+        
+        # message/rfc822 encapsulé : ses parties sont numérotées sous la section
+        if f"{structure[0]}/{structure[1]}".lower() == "message/rfc822" and len(structure) > 8:
+            inner = structure[8]
+            if isinstance(inner, list) and inner:
+                yield from self._walk_bodystructure(inner, section if isinstance(inner[0], list) else f"{section}.1")
+    
+    def _bodystructure_children(self, structure: list) -> List[list]:
+        """Retourne les sous-parties d'un multipart (avant le sous-type)"""
+        children = []
+        for element in structure:
+            if not isinstance(element, list):
+                break
+            children.append(element)
+        return children
+    
+    def _get_part_disposition(self, part: list) -> str:
+        """Retourne la disposition (inline, attachment...) d'une partie feuille"""
+        content_type = f"{part[0]}/{part[1]}".lower()
+        if content_type.startswith("text/"):
+            index = 9
+        elif content_type == "message/rfc822":
+            index = 11
+        else:
+            index = 8
+        
+        if len(part) > index and isinstance(part[index], list) and part[index]:
+            return (part[index][0] or "").lower()
+        return ""
+    
+    def _build_text_message(self, header_bytes: bytes, part: list, part_bytes: bytes) -> bytes:
+        """
+        Reconstruit un message RFC822 réduit : en-têtes d'origine et partie texte
+        seule, avec le Content-Type (charset) et l'encodage déclarés pour cette partie
+        """
+        header_bytes = MIME_HEADERS_RE.sub(b"", header_bytes).rstrip(b"\r\n")
+        
+        content_type = f"{part[0]}/{part[1]}".lower()
+        params = part[2] if isinstance(part[2], list) else []
+        for name, value in zip(params[::2], params[1::2]):
+            if name and value is not None:
+                content_type += f'; {name.lower()}="{value}"'
+        encoding = part[5] or "7bit"
+        
+        mime_headers = (
+            "MIME-Version: 1.0\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Transfer-Encoding: {encoding.lower()}\r\n"
+        ).encode("utf-8")
+        
+        return header_bytes + b"\r\n" + mime_headers + b"\r\n" + part_bytes
+    
+    def _parse_bodystructure(self, text: str) -> list:
+        """Extrait et analyse la liste BODYSTRUCTURE d'une réponse FETCH"""
+        match = BODYSTRUCTURE_RE.search(text)
+        if not match:
+            return None
+        try:
+            structure, _ = self._parse_imap_list(text, match.end() - 1)
+            return structure
+        except (IndexError, ValueError):
+            return None
+    
+    def _parse_imap_list(self, text: str, pos: int) -> Tuple[list, int]:
+        """
+        Analyse une liste parenthésée IMAP à partir de `pos` (qui pointe sur "(")
+        
+        Returns:
+            Tuple (liste de chaînes / None / sous-listes, position après ")")
+        """
+        if text[pos] != "(":
+            raise ValueError(f"Liste IMAP attendue à la position {pos}")
+        
+        items = []
+        pos += 1
+        while True:
+            char = text[pos]
+            if char == ")":
+                return items, pos + 1
+            if char == " ":
+                pos += 1
+            elif char == "(":
+                sub_list, pos = self._parse_imap_list(text, pos)
+                items.append(sub_list)
+            elif char == '"':
+                match = IMAP_QUOTED_RE.match(text, pos)
+                if not match:
+                    raise ValueError(f"Chaîne IMAP non terminée à la position {pos}")
+                items.append(re.sub(r'\\(.)', r'\1', match.group(1)))
+                pos = match.end()
+            else:
+                match = IMAP_ATOM_RE.match(text, pos)
+                if not match:
+                    raise ValueError(f"Élément IMAP invalide à la position {pos}")
+                atom = match.group(0)
+                items.append(None if atom.upper() == "NIL" else atom)
+                pos = match.end()
+    
+    def _fetch_messages(self, uids: List[int], items: str, batch_size: int = None) -> Iterator[Dict]:
+        """
+        Récupère des messages par lots d'UID (une seule commande FETCH par lot)
+        
+        Args:
+            uids: UID à récupérer, dans l'ordre souhaité
+            items: Éléments FETCH demandés (ex: "(RFC822)")
+            batch_size: Nombre d'UID par commande (FETCH_BATCH_SIZE par défaut)
+            
+        Yields:
+            Dictionnaires {uid, items, text} dans l'ordre de `uids`
+        """
+        batch_size = batch_size or self.FETCH_BATCH_SIZE
+        
+        for start in range(0, len(uids), batch_size):
+            batch = uids[start:start + batch_size]
+            status, data = self._run_command("uid", "FETCH", self._format_uid_set(batch), items)
+            
+            if status != "OK":
+                print(f"✗ Erreur lors de la récupération du lot {self._format_uid_set(batch)}")
+                continue
+            
+            # Un même UID peut revenir dans une réponse non sollicitée (FLAGS) :
+            # ses éléments complètent la réponse déjà reçue au lieu de la remplacer
+            fetched_by_uid = {}
+            for fetched in self._parse_fetch_response(data):
+                previous = fetched_by_uid.get(fetched["uid"])
+                if previous is None:
+                    fetched_by_uid[fetched["uid"]] = fetched
+                else:
+                    previous["items"].update(fetched["items"])
+                    previous["text"] += " " + fetched["text"]
+            for uid in batch:
+                if uid in fetched_by_uid:
+                    yield fetched_by_uid[uid]
+    
+    def _parse_fetch_response(self, data: list) -> Iterator[Dict]:
+        """
+        Découpe la réponse d'un FETCH multi-messages, au fil de l'eau
+        
+        imaplib renvoie une liste où chaque littéral ({n}) est un tuple
+        (préfixe, contenu) et les fins de ligne sont des bytes, par exemple :
+            (b'1 (UID 5 RFC822 {1234}', b'...'), b')', (b'2 (UID 7 RFC822 {987}', b'...'), b')'
         
-        return body
+        Yields:
+            Dictionnaires {uid, items: {nom: bytes}, text: partie hors littéraux}
+        """
+        current = None
+        
+        for element in data:
+            if element is None:
+                continue
+            
+            prefix, literal = element if isinstance(element, tuple) else (element, None)
+            prefix = prefix.decode("utf-8", errors="ignore")
+            
+            # Une nouvelle réponse commence par son numéro de séquence: "12 (..."
+            if FETCH_RESPONSE_START_RE.match(prefix):
+                if current is not None:
+                    yield self._finalize_fetch(current)
+                current = {"items": {}, "text": ""}
+            elif current is None:
+                continue
+            
+            if literal is not None:
+                item_match = FETCH_LITERAL_ITEM_RE.search(prefix)
+                if item_match:
+                    current["items"][item_match.group(1).upper()] = literal
+                else:
+                    # Littéral à l'intérieur d'une liste (ex: nom de fichier dans
+                    # BODYSTRUCTURE) : réinjecté comme chaîne entre guillemets
+                    literal_text = literal.decode("utf-8", errors="ignore")
+                    quoted = '"' + literal_text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+                    prefix = FETCH_LITERAL_SIZE_RE.sub(lambda _: quoted, prefix)
+            current["text"] += prefix
+        
+        if current is not None:
+            yield self._finalize_fetch(current)
+    
+    def _finalize_fetch(self, fetched: Dict) -> Dict:
+        """Renseigne l'UID d'une réponse FETCH (il peut suivre les littéraux)"""
+        uid_match = FETCH_UID_RE.search(fetched["text"])
+        fetched["uid"] = int(uid_match.group(1)) if uid_match else None
+        return fetched
     
+    def _format_uid_set(self, uids: List[int]) -> str:
+        """Compacte une liste d'UID en ensemble IMAP (ex: [1, 2, 3, 7] → "1:3,7")"""
+        ranges = []
+        for uid in sorted(set(uids)):
+            if ranges and uid == ranges[-1][1] + 1:
+                ranges[-1][1] = uid
+            else:
+                ranges.append([uid, uid])
+        return ",".join(str(a) if a == b else f"{a}:{b}" for a, b in ranges)
+    
+    def _build_search_criteria(self, domain_filter: str = None, subject_filters: List[str] = None,
+                               since: date = None, last_uid: int = 0) -> str:
+        """
+        Construit les critères de la commande IMAP SEARCH
+        
+        Exemple: UID 42:* FROM "gco.ouvaton.net" OR SUBJECT "crieur-des-sorties" SUBJECT "crieur-solidaire"
+        """
+        criteria = []
+        
+        if last_uid:
+            criteria.append(f"UID {last_uid + 1}:*")
+        
+        if domain_filter:
+            criteria.append(f"FROM {self._quote_search_string(domain_filter)}")
+        
+        if subject_filters:
+            subject_terms = [f"SUBJECT {self._quote_search_string(s)}" for s in subject_filters]
+            # OR est binaire en IMAP : OR a OR b c
+            criteria.append("OR " * (len(subject_terms) - 1) + " ".join(subject_terms))
+        
+        if since:
+            # Format de date IMAP (indépendant de la locale) : 01-Dec-2025
+            mois_imap = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                         "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+            criteria.append(f"SINCE {since.day:02d}-{mois_imap[since.month - 1]}-{since.year}")
+        
+        return " ".join(criteria) if criteria else "ALL"
+    
+    def _quote_search_string(self, value: str) -> str:
+        """Entoure une chaîne de guillemets pour la commande SEARCH"""
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    
+    def _get_uidvalidity(self, folder: str) -> int:
+        """Retourne l'UIDVALIDITY du dossier sélectionné"""
+        with self._lock:
+            _, data = self.connection.response("UIDVALIDITY")
+            if not data or data[0] is None:
+                # Le serveur ne l'a pas annoncée au SELECT : la demande explicitement
+                _, data = self.connection.status(folder, "(UIDVALIDITY)")
+                match = re.search(rb"UIDVALIDITY (\d+)", data[0] or b"")
+                return int(match.group(1)) if match else 0
+            return int(data[0])
+
+    def idle(self, timeout: float = IDLE_TIMEOUT) -> bool:
+        """
+        Attend l'arrivée de nouveaux messages dans le dossier sélectionné (IDLE, RFC 2177)
+
+        La connexion reste ouverte sans aucun trafic jusqu'à ce que le serveur
+        annonce un changement ou que le délai expire ; IDLE est alors terminé
+        (DONE) pour pouvoir envoyer d'autres commandes.
+
+        Args:
+            timeout: Durée maximale d'attente en secondes (moins de 30 minutes,
+                     au-delà les serveurs peuvent couper la connexion)
+
+        Returns:
+            True si le serveur a annoncé de nouveaux messages (EXISTS)
+        """
+        if "IDLE" not in self.connection.capabilities:
+            raise imaplib.IMAP4.error("Le serveur ne supporte pas IDLE")
+
+        # La session est occupée par IDLE : le thread de maintien attend sa fin
+        with self._lock:
+            tag = self.connection.start_idle()
+
+            # En cas d'erreur pendant l'attente (socket, BYE), la connexion est
+            # inutilisable : l'erreur remonte telle quelle, sans envoyer DONE
+            has_new_messages = False
+            sock = self.connection.socket()
+            deadline = time.monotonic() + timeout
+            while not has_new_messages:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._wait_for_data(sock, remaining):
+                    break
+                has_new_messages = self._check_idle_line(self.connection.readline())
+
+            # Réponses restantes jusqu'à la fin de la commande IDLE
+            for line in self.connection.finish_idle(tag):
+                has_new_messages = self._check_idle_line(line) or has_new_messages
+
+            self._last_activity = time.monotonic()
+            return has_new_messages
+
+    def _wait_for_data(self, sock, timeout: float) -> bool:
+        """Attend qu'une réponse du serveur soit lisible (tampons d'abord, puis socket)"""
+        if self.connection.has_buffered_data():
+            return True
+        return bool(select.select([sock], [], [], timeout)[0])
+
+    def _check_idle_line(self, line: bytes) -> bool:
+        """Indique si une réponse reçue pendant IDLE annonce de nouveaux messages"""
+        if not line:
+            raise imaplib.IMAP4.abort("Connexion fermée pendant IDLE")
+        if line.startswith(b"* BYE"):
+            raise imaplib.IMAP4.abort(line.decode(errors="replace").strip())
+        return IDLE_EXISTS_RE.match(line) is not None
+
     def close(self):
-        """Ferme la connexion IMAP"""
+        """Ferme le dossier et la session IMAP (sans erreur si la connexion est déjà coupée)"""
+        self._stop_keepalive.set()
         if self.connection:
-            self.connection.close()
+            if getattr(self.connection, "compression_enabled", False) and self.connection.bytes_received:
+                print(f"🗜  {self.connection.compressed_bytes_received // 1024} Ko reçus "
+                      f"pour {self.connection.bytes_received // 1024} Ko de données")
+            try:
+                if self.connection.state == "SELECTED":
+                    self.connection.close()
+                self.connection.logout()
+            except (imaplib.IMAP4.error, OSError):
+                # Connexion déjà coupée : libère seulement le socket
+                try:
+                    self.connection.shutdown()
+                except OSError:
+                    pass
             print("✓ Connexion fermée")
 
 
@@ -207,31 +1094,9 @@ class EventExtractor:
     """Classe pour extraire les informations d'événement des emails"""
     
     def __init__(self):
-        # Patterns regex pour extraire informations
-        # Format Zimbra: "Quand : du samedi 13 décembre 2025 à 19:05"
-        self.date_patterns = [
-            # Patterns avec 4 chiffres d'année (2025) EN PREMIER car plus spécifiques
-            r"(?:dimanche|lundi|mardi|mercredi|jeudi|vendredi|samedi)\s+(\d{1,2}\s+\w+\s+\d{4})(?:\s|$)",
-            r"Quand\s*(?::|=)\s*du\s+(?:\w+\s+)?(\d{1,2}\s+(?:janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s+\d{4})",
-            r"(?:Quand|QUAND|quand)\s*(?::|=)\s*du\s+(?:\w+\s+)?(\d{1,2}\s+[a-zàâäéèêëïîôöùûüœæç]+\s+\d{4})",
-            # Patterns avec années 2-4 chiffres (moins spécifiques, pour compatibilité)
-            r"(?:date|Date|DATE|le|le\s):\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
-            r"(\d{1,2}\s+(?:janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s+\d{4})(?:\s|$)",  # 4 chiffres avec limite
-            r"(\d{1,2}\s+(?:janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s+\d{2})(?:\s|$)",  # 2 chiffres avec limite
-            r"(?:samedi|dimanche|lundi|mardi|mercredi|jeudi|vendredi)[,]?\s+(\d{1,2}\s+\w+\s+\d{2,4})"
-        ]
-        
-        self.location_patterns = [
-            # Les patterns "Où :" et "adresse :" sont prioritaires (plus fiables)
-            r"Où\s*(?::|=)\s*([^\n=]+?)(?:\n|$|=)",
-            r"O=C3=B9\s*(?::|=)\s*([^\n=]+?)(?:\n|$|=)",
-            r"(?:adresse|Adresse|ADRESSE):\s*([^\n]+?)(?:\n|-{2,}|$)",
-            r"(?:lieu|Lieu|LIEU|location):\s*([^\n]+?)(?:\n|-{2,}|$)",
-            r"(?:à|À):\s*([^\n]+?)(?:\n|,|-{2,}|$)",
-            # Pour "au/aux", on doit être plus restrictif et éviter les faux positifs
-            # Ne capture que si suivi d'une majuscule ET ce n'est pas un mot trivial
-            r"(?:Aux|au|Au|Au)\s+(?!hommes|femmes|enfants|personnes|gens)([A-Z][^\n-]*?)(?:\s+-\s+(?:lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche)|(?:\d{1,2}\s+(?:janv|févr|mars|avril|mai|juin|juil|août|sept|oct|nov|déc))|$|\n)"
-        ]
+        # Expressions compilées une fois pour toutes dans le module patterns
+        self.date_patterns = patterns.DATE_PATTERNS
+        self.location_patterns = patterns.LOCATION_STRICT_PATTERNS + patterns.LOCATION_GENERIC_PATTERNS
     
     def _clean_text(self, text: str) -> str:
         """
@@ -240,19 +1105,13 @@ class EventExtractor:
         if not text:
             return text
         
-        # Supprime les émoticons courants (🎭🎪🎨🎬🎤🎸🎹🎺🎻🥁🎵🎶🎼🎧🎙️ etc)
-        # et les caractères problématiques
-        import unicodedata
-        
-        # Enlève les caractères de catégorie "So" (symbols other) qui incluent les émoticons
+        # Supprime les émoticons courants (🎭🎪🎨🎬🎤🎸🎹🎺🎻🥁🎵🎶🎼🎧🎙️ etc) : catégorie "So",
+        # ainsi que les caractères de contrôle et autres non-affichables (catégories "C"),
         # mais garde les caractères utiles comme ©, ®, °, etc.
-        text = ''.join(ch if unicodedata.category(ch) != 'So' else '' for ch in text)
-        
-        # Supprime aussi les caractères de contrôle et autres non-affichables
-        text = ''.join(ch if unicodedata.category(ch)[0] != 'C' else '' for ch in text)
+        text = text.translate(DISPLAY_TEXT_TABLE)
         
         # Réduit les espaces multiples
-        text = re.sub(r'\s+', ' ', text)
+        text = patterns.WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
     
@@ -261,11 +1120,11 @@ class EventExtractor:
         subject = email_dict["subject"]
         body = email_dict["body"]
         sender_from = email_dict.get("from", "")
+        email_datetime = parse_french_date(email_dict["date"])
         
-        # Nettoie le HTML si présent
-        if "<" in body:
-            soup = BeautifulSoup(body, "html.parser")
-            body_text = soup.get_text()
+        # Nettoie le HTML si présent (pas pour les adresses "<nom@domaine>" des digests)
+        if is_html_body(body, email_dict.get("content_type")):
+            body_text = html_to_text(body)
         else:
             body_text = body
         
@@ -274,138 +1133,121 @@ class EventExtractor:
         # Si le sujet contient "Compilation", c'est un digest de mailing list
         if "Compilation" in subject and "crieur" in subject.lower():
             # Cherche TOUS les événements à l'intérieur (marqués par "* X -")
-            import re
-            body_lines = body_text.split('\n')
+            # Le digest est découpé une seule fois : entrées du sommaire et sections Message-ID
+            index = DigestIndex(body_text)
+            links = self._extract_links(body_text)
+            body_preview = self._clean_text(body_text[:500])
             events = []
             processed_titles = set()  # Évite les doublons
             
-            for i, line in enumerate(body_lines):
-                # Cherche un numéro d'événement (format "* 1 -", "* 2 -", etc)
-                match = re.match(r'\*\s*\d+\s*-\s*\[', line)
-                if match:
-                    # NETTOYAGE IMMÉDIAT: supprime les \r\n qui cassent les regex
-                    # Cela évite les problèmes d'extraction quand les titres sont sur plusieurs lignes
-                    line = re.sub(r'[\r\n]+', ' ', line)
-                    line = re.sub(r'\s+', ' ', line)
-                    
-                    # Cherche les deux crochets (catégorie et lieu)
-                    brackets = re.findall(r'\[([^\]]+)\]', line)
-                    
-                    # Combine cette ligne avec les suivantes pour avoir la ligne complète du sommaire
-                    # (souvent multi-lignes pour inclure l'adresse)
-                    full_entry = line
-                    j = i + 1
-                    while j < len(body_lines) and not re.match(r'\*\s*\d+\s*-', body_lines[j].strip()) and not "Message-ID:" in body_lines[j]:
-                        next_line = body_lines[j].strip()
-                        
-                        # Arrête aux marqueurs de fin de sommaire (ligne vide, tirets ou autre événement)
-                        if not next_line or next_line.startswith('-'):
-                            break
-                        
-                        if next_line:
-                            full_entry += " " + next_line
-                        j += 1
-                    
-                    # Extrait le titre :
-                    # Format: * 1 - [crieur-des-sorties] [Chalais] - Atelier conte - samedi 13 décembre 2025
-                    # On veut : "Atelier conte"
-                    
-                    title = ""
-                    if len(brackets) >= 2:
-                        # Après [lieu], cherche le titre avant la date complète (jour + jour-mois-année)
-                        # Pattern strict: cherche un jour + chiffre + mois (format de date valide)
-                        # Pas juste n'importe quel jour/mois isolé dans le titre
-                        after_brackets = re.search(
-                            r'\]\s*-\s*(.+?)(?:\s(?:samedi|dimanche|lundi|mardi|mercredi|jeudi|vendredi)\s+\d{1,2}\s+(?:janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre))',
-                            full_entry,
-                            re.IGNORECASE | re.DOTALL
-                        )
-                        if after_brackets:
-                            title = after_brackets.group(1).strip()
-                            # Nettoie les tirets finaux, espaces et caractères de contrôle
-                            title = title.rstrip('- /').strip()
-                            # Nettoie les \r, \n et espaces en trop
-                            title = re.sub(r'[\r\n]+', ' ', title)  # Remplace retours à la ligne par espace
-                            title = re.sub(r'\s+', ' ', title)  # Réduit espaces multiples en un
-                            title = title.strip()
-                    
-                    # Évite les doublons
-                    if not title or title in processed_titles or len(title) < 2:
-                        continue
-                    processed_titles.add(title)
-                    
-                    # Cherche la date et le lieu
-                    event_block_lines = [full_entry]
-                    date = self._extract_date(full_entry)
-                    
-                    # NOUVELLE STRATÉGIE pour les digests:
-                    # 1. Cherche une adresse après la date dans la ligne du sommaire (often present)
-                    # 2. Sinon, cherche le contexte complet pour un "Où :" avec adresse
-                    # 3. Fallback au bracket si aucune adresse valide trouvée
-                    
-                    location = ""
-                    
-                    # Étape 1: Cherche l'adresse après la date dans le sommaire
-                    # Pattern: jour + date + heure + " - " + adresse jusqu'à email
-                    addr_in_summary = re.search(
-                        r'(?:dimanche|lundi|mardi|mercredi|jeudi|vendredi|samedi).*?à\s+\d{1,2}:\d{2}\s*-\s*([^<\r\n]+)',
-                        full_entry,
-                        re.IGNORECASE
-                    )
-                    if addr_in_summary:
-                        potential_addr = addr_in_summary.group(1).strip()
-                        # Vérifie si c'est une adresse valide (contient code postal OU rue+numéro)
-                        if re.search(r'\d{5}', potential_addr) or re.search(r'^\d+\s+', potential_addr):
-                            location = potential_addr
-                    
-                    # Étape 2: Si pas trouvé dans le sommaire, cherche le contexte complet
-                    if not location or location == "Non spécifié":
-                        event_context = self._find_event_context(body_text, title)
-                        if event_context:
-                            location = self._extract_location(event_context)
-                    
-                    # Vérifie si c'est une adresse valide
-                    has_postal_code = bool(re.search(r'\d{5}', location))
-                    has_street_number = bool(re.search(r'^\d+\s+(?:rue|avenue|boulevard|chemin|place|square|allée|quai|cour|voie)', location, re.IGNORECASE))
-                    is_valid_address = has_postal_code or has_street_number
-                    
-                    # Étape 3: Si pas trouvé ou pas une vraie adresse, utilise le bracket
-                    if location == "Non spécifié" or (not is_valid_address and len(brackets) >= 2):
-                        bracket_location = brackets[1].strip() if len(brackets) >= 2 else ""
-                        if bracket_location:
-                            location = bracket_location
-                    
-                    # Cherche la description en utilisant le titre
-                    description = self._extract_description_from_digest(body_text, title)
-                    
-                    # Extrait l'email de l'organisateur depuis la ligne du sommaire
-                    organizer_email = self._extract_organizer_email(full_entry)
-                    
-                    if date != "Non spécifiée":
-                        events.append({
-                            "subject": self._clean_text(title),
-                            "date": self._clean_text(date),
-                            "location": self._clean_text(location),
-                            "description": self._clean_text(description),
-                            "links": self._extract_links(body_text),
-                            "body_preview": self._clean_text(body_text[:500]),
-                            "email_date": email_dict["date"],
-                            "from": sender_from,
-                            "organizer_email": organizer_email
-                        })
-            
+            for entry in index.entries:
+                # Ligne complète du sommaire (souvent multi-lignes pour inclure l'adresse)
+                full_entry = entry['text']
+                # Cherche les deux crochets (catégorie et lieu) sur la première ligne
+                brackets = entry['brackets']
+                
+                # Extrait le titre :
+                # Format: * 1 - [crieur-des-sorties] [Chalais] - Atelier conte - samedi 13 décembre 2025
+                # On veut : "Atelier conte"
+                
+                title = ""
+                if len(brackets) >= 2:
+                    # Après [lieu], cherche le titre avant la date complète (jour + jour-mois-année)
+                    # Pattern strict: cherche un jour + chiffre + mois (format de date valide)
+                    # Pas juste n'importe quel jour/mois isolé dans le titre
+                    after_brackets = patterns.DIGEST_TITLE_RE.search(full_entry)
+                    if after_brackets:
+                        title = after_brackets.group(1).strip()
+                        # Nettoie les tirets finaux, espaces et caractères de contrôle
+                        title = title.rstrip('- /').strip()
+                        # Nettoie les \r, \n et espaces en trop
+                        title = patterns.LINE_BREAKS_RE.sub(' ', title)  # Remplace retours à la ligne par espace
+                        title = patterns.WHITESPACE_RE.sub(' ', title)  # Réduit espaces multiples en un
+                        title = title.strip()
+                
+                # Évite les doublons
+                if not title or title in processed_titles or len(title) < 2:
+                    continue
+                processed_titles.add(title)
+                
+                # Cherche la date et le lieu
+                event_block_lines = [full_entry]
+                date = self._extract_date(full_entry)
+                
+                # NOUVELLE STRATÉGIE pour les digests:
+                # 1. Cherche une adresse après la date dans la ligne du sommaire (often present)
+                # 2. Sinon, cherche le contexte complet pour un "Où :" avec adresse
+                # 3. Fallback au bracket si aucune adresse valide trouvée
+                
+                location = ""
+                
+                # Étape 1: Cherche l'adresse après la date dans le sommaire
+                # Pattern: jour + date + heure + " - " + adresse jusqu'à email
+                addr_in_summary = patterns.DIGEST_ADDRESS_RE.search(full_entry)
+                if addr_in_summary:
+                    potential_addr = addr_in_summary.group(1).strip()
+                    # Vérifie si c'est une adresse valide (contient code postal OU rue+numéro)
+                    if patterns.POSTAL_CODE_RE.search(potential_addr) or patterns.STARTS_WITH_NUMBER_RE.search(potential_addr):
+                        location = potential_addr
+                
+                # Étape 2: Si pas trouvé dans le sommaire, cherche le contexte complet
+                if not location or location == "Non spécifié":
+                    event_context = index.find_event_context(title, entry['numero'])
+                    if event_context:
+                        location = self._extract_location(event_context)
+                
+                # Vérifie si c'est une adresse valide
+                has_postal_code = bool(patterns.POSTAL_CODE_RE.search(location))
+                has_street_number = bool(patterns.DIGEST_STREET_RE.search(location))
+                is_valid_address = has_postal_code or has_street_number
+                
+                # Étape 3: Si pas trouvé ou pas une vraie adresse, utilise le bracket
+                if location == "Non spécifié" or (not is_valid_address and len(brackets) >= 2):
+                    bracket_location = brackets[1].strip() if len(brackets) >= 2 else ""
+                    if bracket_location:
+                        location = bracket_location
+                
+                # Cherche la description en utilisant le titre
+                description = self._extract_description_from_digest(index, title, entry['numero'])
+                
+                # Extrait l'email de l'organisateur depuis la ligne du sommaire
+                organizer_email = self._extract_organizer_email(full_entry)
+                
+                if date != "Non spécifiée":
+                    date = self._clean_text(date)
+                    start, end = parse_event_period(date)
+                    events.append({
+                        "subject": self._clean_text(title),
+                        "date": date,
+                        "start": start,
+                        "end": end,
+                        "location": self._clean_text(location),
+                        "description": self._clean_text(description),
+                        "links": list(links),
+                        "body_preview": body_preview,
+                        "email_date": email_dict["date"],
+                        "email_datetime": email_datetime,
+                        "from": sender_from,
+                        "organizer_email": organizer_email
+                    })
+        
             # Retourne la liste des événements trouvés
             if events:
                 return events
         
+        date = self._clean_text(self._extract_date(full_text))
+        start, end = parse_event_period(date)
         return {
             "subject": self._clean_text(subject),
-            "date": self._clean_text(self._extract_date(full_text)),
+            "date": date,
+            "start": start,
+            "end": end,
             "location": self._clean_text(self._extract_location(full_text)),
             "description": self._clean_text(self._extract_description(full_text)),
             "links": self._extract_links(full_text),
             "body_preview": self._clean_text(body_text[:500]),
             "email_date": email_dict["date"],
+            "email_datetime": email_datetime,
             "from": sender_from,
             "organizer_email": self._extract_organizer_email(full_text)
         }
@@ -413,20 +1255,14 @@ class EventExtractor:
     def _extract_date(self, text: str) -> str:
         """Extrait la date de l'événement"""
         for pattern in self.date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.UNICODE)
+            match = pattern.search(text)
             if match:
-                date_str = match.group(1).strip()
-                # Nettoie les encodages de emails
-                date_str = date_str.replace("=C3=A9", "é").replace("=C3=A8", "è").replace("=C3=AA", "ê")
-                date_str = date_str.replace("=2E", ".").replace("=3D", "=")
-                return date_str
+                return match.group(1).strip()
         return "Non spécifiée"
     
     def _extract_links(self, text: str) -> list:
         """Extrait les liens URL du texte"""
-        # Pattern pour les URLs
-        url_pattern = r'https?://[^\s\n<>"\\)=]+'
-        links = re.findall(url_pattern, text)
+        links = patterns.URL_RE.findall(text)
         # Nettoie les liens (supprime les caractères de fin problématiques)
         links = [link.rstrip('.,;:)]}') for link in links]
         # Filtre les liens:
@@ -454,10 +1290,7 @@ class EventExtractor:
     def _extract_organizer_email(self, text: str) -> str:
         """Extrait l'adresse email de l'organisateur (généralement en fin de ligne dans les digests)"""
         # Cherche une adresse email: abc@domaine.ext
-        # Limite le TLD à 2-4 caractères (les vrais TLDs font 2-4 caractères typiquement)
-        # Utilise une negative lookahead pour éviter de capturer du texte qui suit
-        email_pattern = r'\b([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,4})(?![a-zA-Z0-9-])'
-        matches = re.findall(email_pattern, text)
+        matches = patterns.ORGANIZER_EMAIL_RE.findall(text)
         
         # Retourne la dernière adresse email trouvée (généralement l'organisateur)
         if matches:
@@ -471,59 +1304,23 @@ class EventExtractor:
     
     def _extract_location(self, text: str) -> str:
         """Extrait le lieu de l'événement"""
-        # Liste des principales communes de Dordogne
-        communes_dordogne = [
-            "Nontron", "Thiviers", "Saint-Yrieix", "Périgueux", "Bergerac", "Sarlat", "Ribérac",
-            "Montbron", "Chalais", "Saint-Pardoux-la-Rivière", "Champs-Romain", "Soudat",
-            "Rudeau-Ladosse", "Saint-Saud-Lacoussière", "Saint-Jory", "Saint-Jory-de-Chalais",
-            "Marval", "Piégut-Pluviers", "Champniers-et-Reilhac", "Champagnac-la-Rivière",
-            "La Rochebeaucourt-et-Argentine", "Milhac-de-Nontron", "Chalard", "Saint-Estèphe",
-            "Saint-Mathieu", "Saint-Pierre-de-Frugie", "La Coquille", "Nexon", "Limoges"
-        ]
-        
-        # Patterns stricts : "Où :", "Adresse :", "Lieu :" 
-        strict_patterns = [
-            r"Où\s*(?::|=)\s*([^\n=]+?)(?:\n|$|=)",
-            r"O=C3=B9\s*(?::|=)\s*([^\n=]+?)(?:\n|$|=)",
-            r"(?:adresse|Adresse|ADRESSE):\s*([^\n]+?)(?:\n|-{2,}|$)",
-            r"(?:lieu|Lieu|LIEU|location):\s*([^\n]+?)(?:\n|-{2,}|$)",
-        ]
-        
-        # Patterns génériques : "à:", "au/aux"  (moins fiables)
-        generic_patterns = [
-            r"(?:à|À):\s*([^\n]+?)(?:\n|,|-{2,}|$)",
-            r"(?:Aux|au|Au|Au)\s+(?!hommes|femmes|enfants|personnes|gens)([A-Z][^\n-]*?)(?:\s+-\s+(?:lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche)|(?:\d{1,2}\s+(?:janv|févr|mars|avril|mai|juin|juil|août|sept|oct|nov|déc))|$|\n)"
-        ]
-        
-        # Mots à ignorer comme locations (jours, mois, mots génériques)
-        rejected_words = [
-            "dimanche", "lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi",
-            "janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août", 
-            "septembre", "octobre", "novembre", "décembre", "format", "non spécifié",
-            "voir ci-après", "voir ci dessous"
-        ]
-        
         addresses_found = []  # Adresses valides (avec code postal ou numéro)
         generic_candidates = []  # Candidats des patterns génériques
         
         # ÉTAPE 1 : Cherche d'abord les patterns stricts
-        for pattern in strict_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE | re.UNICODE):
+        for pattern in patterns.LOCATION_STRICT_PATTERNS:
+            for match in pattern.finditer(text):
                 location = match.group(1).strip()
-                # Nettoie les encodages de emails
-                location = location.replace("=C3=A9", "é").replace("=C3=A8", "è").replace("=C3=AA", "ê")
-                location = location.replace("=C3=B9", "ù").replace("=C3=A0", "à").replace("=2E", ".")
-                location = location.replace("=3D", "").strip()
                 
                 # Nettoie les caractères de contrôle
-                location = re.sub(r'[\r\n]+', ' ', location)
-                location = re.sub(r'\s+', ' ', location)
+                location = patterns.LINE_BREAKS_RE.sub(' ', location)
+                location = patterns.WHITESPACE_RE.sub(' ', location)
                 location = location.strip()
                 
                 # Si le lieu contient un tiret séparateur date => prend avant
                 if " - " in location:
                     parts = location.split(" - ")
-                    if len(parts) > 1 and re.match(r'^(lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche|\d{1,2})', parts[1], re.IGNORECASE):
+                    if len(parts) > 1 and patterns.LOCATION_DATE_PART_RE.match(parts[1]):
                         location = parts[0].strip()
                 
                 # Ignore les résultats avec HTML markers
@@ -531,12 +1328,12 @@ class EventExtractor:
                     continue
                 
                 # Ignore les mots rejetés
-                if location.lower() in rejected_words:
+                if location.lower() in patterns.REJECTED_LOCATIONS:
                     continue
                 
                 if location:
                     # Vérifie si c'est une adresse valide
-                    if re.search(r'\d{5}', location) or re.search(r'^\d+\s+(?:rue|avenue|boulevard|chemin|place|square|allée)', location, re.IGNORECASE):
+                    if patterns.POSTAL_CODE_RE.search(location) or patterns.LOCATION_STREET_RE.search(location):
                         return location  # Retourne immédiatement si adresse valide trouvée
                     # Sinon ajoute aux candidats
                     addresses_found.append(location)
@@ -545,31 +1342,29 @@ class EventExtractor:
         if addresses_found:
             return addresses_found[0]
         
-        # ÉTAPE 2 : Cherche communes de Dordogne dans le texte (plus fiable que patterns génériques)
-        for commune in communes_dordogne:
-            if re.search(r'\b' + re.escape(commune) + r'\b', text, re.IGNORECASE):
-                return commune
+        # ÉTAPE 2 : Cherche les communes connues dans le texte (plus fiable que patterns génériques)
+        # Un seul passage sur le texte ; le nom le plus long l'emporte (Saint-Jory-de-Chalais plutôt que Chalais)
+        commune = get_commune_matcher().find_longest(text)
+        if commune:
+            return commune
         
         # ÉTAPE 3 : Seulement si aucune commune trouvée, essaie les patterns génériques
-        for pattern in generic_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE | re.UNICODE):
+        for pattern in patterns.LOCATION_GENERIC_PATTERNS:
+            for match in pattern.finditer(text):
                 location = match.group(1).strip()
-                location = location.replace("=C3=A9", "é").replace("=C3=A8", "è").replace("=C3=AA", "ê")
-                location = location.replace("=C3=B9", "ù").replace("=C3=A0", "à").replace("=2E", ".")
-                location = location.replace("=3D", "").strip()
-                location = re.sub(r'[\r\n]+', ' ', location)
-                location = re.sub(r'\s+', ' ', location)
+                location = patterns.LINE_BREAKS_RE.sub(' ', location)
+                location = patterns.WHITESPACE_RE.sub(' ', location)
                 location = location.strip()
                 
                 if " - " in location:
                     parts = location.split(" - ")
-                    if len(parts) > 1 and re.match(r'^(lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche|\d{1,2})', parts[1], re.IGNORECASE):
+                    if len(parts) > 1 and patterns.LOCATION_DATE_PART_RE.match(parts[1]):
                         location = parts[0].strip()
                 
                 if "<" in location or "HTML" in location:
                     continue
                 
-                if location.lower() in rejected_words:
+                if location.lower() in patterns.REJECTED_LOCATIONS:
                     continue
                 
                 if location and len(location) < 150:  # Evite les descriptions longues
@@ -590,9 +1385,9 @@ class EventExtractor:
         
         for i, line in enumerate(lines):
             # Cherche le début du descriptif
-            if re.search(r'Descriptif|Description', line, re.IGNORECASE):
+            if patterns.DESCRIPTION_HEADER_RE.search(line):
                 # Vérifie que c'est bien une en-tête (suivi de tirets)
-                if i+1 < len(lines) and re.match(r'^-+$', lines[i+1].strip()):
+                if i+1 < len(lines) and patterns.DASH_LINE_RE.match(lines[i+1].strip()):
                     # Commence à partir de la ligne après les tirets (i+2)
                     start_idx = i + 2
                     # Saute les lignes vides initiales
@@ -604,11 +1399,11 @@ class EventExtractor:
                         curr_line = lines[j].strip()
                         
                         # Arrête si on trouve une séparation majeure
-                        if re.match(r'^-{6,}$', curr_line):
+                        if patterns.SEPARATOR_LINE_RE.match(curr_line):
                             # Mais vérifie qu'on a du contenu avant
                             if description_lines:
                                 break
-                        if re.match(r'^=+$', curr_line):
+                        if patterns.EQUALS_LINE_RE.match(curr_line):
                             break
                         if curr_line.startswith('Message-ID') or curr_line.startswith('Date:'):
                             break
@@ -618,7 +1413,7 @@ class EventExtractor:
                             break
                         
                         # Arrête si on trouve une autre en-tête (tous les caps suivis de tirets)
-                        if j+1 < len(lines) and re.match(r'^-+$', lines[j+1].strip()):
+                        if j+1 < len(lines) and patterns.DASH_LINE_RE.match(lines[j+1].strip()):
                             if curr_line.isupper() and len(curr_line) > 3 and description_lines:
                                 break
                         
@@ -648,31 +1443,14 @@ class EventExtractor:
             
             # Supprime les références administratives gco.ouvaton.org (sauf /wp-content/)
             # Supprime la phrase "📅 Cet événement a été ajouté à l'agenda des sorties des crieurs : [URL]"
-            description = re.sub(r'\s*📅[^:]*:\s*https://gco\.ouvaton\.org/[^/\s]+/[^/\s]+/\s*', ' ', description)
-            description = re.sub(r'\s*Cet événement a été ajouté à l\'agenda[^:]*:\s*https://gco\.ouvaton\.org/[^/\s]+/[^/\s]+/\s*', ' ', description, flags=re.IGNORECASE)
+            description = patterns.AGENDA_NOTICE_RE.sub(' ', description)
+            description = patterns.AGENDA_SENTENCE_RE.sub(' ', description)
             # Nettoie les références "Une pièce jointe est disponible" qui sont déjà dans les liens
-            description = re.sub(r'\s*-->\s*', ' ', description)
-            
-            # Nettoie les encodages QUOTED-PRINTABLE
-            # 1. Décode les caractères spéciaux
-            description = description.replace("=C3=A9", "é").replace("=C3=A8", "è")
-            description = description.replace("=C3=AA", "ê").replace("=C3=A7", "ç")
-            description = description.replace("=E2=80=99", "'").replace("=C3=A0", "à")
-            description = description.replace("=C3=B9", "ù").replace("=C3=A1", "á")
-            description = description.replace("=C3=A4", "ä").replace("=C3=B1", "ñ")
-            description = description.replace("=C3=B6", "ö").replace("=C3=BC", "ü")
-            
-            # 2. Enlève les = qui suivent un espace (soft line break)
-            description = re.sub(r'\s=\s', ' ', description)
-            description = re.sub(r'=\n', '', description)  # Supprime les retours à la ligne encodés
-            
-            # 3. Restaure la casse pour les en-têtes MIME (=?UTF-8?Q?...)
-            description = re.sub(r'=\?UTF-8\?Q\?(.+?)\?=', lambda m: m.group(1).replace('_', ' '), description)
+            description = patterns.ARROW_RE.sub(' ', description)
             
-            # 4. Nettoie les = finaux et autres artifacts
-            description = description.replace("=3D", "=")  # =3D est le code pour =
-            description = re.sub(r'=(?=[^0-9A-F]|$)', '', description)  # Enlève les = solitaires
-            description = re.sub(r'\s+', ' ', description)  # Élimine les espaces multiples
+            # Restaure les en-têtes MIME cités dans le texte (=?UTF-8?Q?...)
+            description = patterns.QUOTED_MIME_HEADER_RE.sub(lambda m: m.group(1).replace('_', ' '), description)
+            description = patterns.WHITESPACE_RE.sub(' ', description)  # Élimine les espaces multiples
             
             # Limite à 800 caractères au lieu de 600
             if len(description) > 800:
@@ -682,91 +1460,15 @@ class EventExtractor:
         
         return ""
     
-    def _find_event_context(self, body_text: str, title: str) -> str:
-        """
-        Cherche le titre exact dans le corps et retourne le contexte complet de l'événement
-        (les lignes qui le suivent jusqu'au prochain Message-ID ou événement)
-        """
-        if not title or len(title.strip()) < 3:
-            return ""
-        
-        lines = body_text.split('\n')
-        title_clean = title.strip().rstrip('-').strip()
-        
-        # Cherche le titre exact dans le texte - cherche l'occurrence APRÈS le sommaire
-        # (pour éviter de capturer la première ligne du sommaire)
-        found_sommaire_end = False
-        for i, line in enumerate(lines):
-            # Détecte la fin du sommaire (ligne avec "------" ou "Message-ID:")
-            if line.startswith("------") or "Message-ID:" in line:
-                found_sommaire_end = True
-            
-            # Cherche le titre APRÈS la fin du sommaire
-            if found_sommaire_end and title_clean.lower() in line.lower():
-                # Collecte le contexte : cette ligne + les suivantes jusqu'à "Message-ID:" ou "---" ou "* N -"
-                context_lines = [line]
-                j = i + 1
-                while j < len(lines) and len(context_lines) < 50:  # Limite à 50 lignes
-                    next_line = lines[j]
-                    # Arrête au Message-ID, aux tirets, ou au prochain événement du sommaire
-                    if ("Message-ID:" in next_line or 
-                        next_line.startswith("------") or
-                        re.match(r'\*\s*\d+\s*-\s*\[', next_line.strip())):
-                        break
-                    context_lines.append(next_line)
-                    j += 1
-                
-                return '\n'.join(context_lines)
-        
-        return ""
-    
-    def _extract_description_from_digest(self, body_text: str, title: str) -> str:
+    def _extract_description_from_digest(self, index: DigestIndex, title: str, numero: int) -> str:
         """
         Extrait la description d'un événement à partir d'une compilation email
-        En cherchant le titre dans les Subject des Message-ID et récupérant le Descriptif qui suit
+        En cherchant le titre dans la section Message-ID de l'événement et récupérant le Descriptif qui suit
         """
-        if not title or len(title.strip()) < 3:
-            return ""
-        
-        lines = body_text.split('\n')
-        title_clean = title.strip().rstrip('-').strip()
-        
-        # Stratégie 1: Cherche le titre dans un Subject: (le plus fiable)
-        for i, line in enumerate(lines):
-            if "Subject:" in line and title_clean.lower() in line.lower():
-                # Trouve la section Descriptif qui suit ce Subject
-                for j in range(i, min(i+80, len(lines))):
-                    if re.search(r'^Descriptif|^Description', lines[j], re.IGNORECASE):
-                        # Vérifie que c'est un en-tête (suivi de tirets ou =)
-                        if j+1 < len(lines) and (re.match(r'^-+$', lines[j+1].strip()) or re.match(r'^=+$', lines[j+1].strip())):
-                            result = self._extract_description_block(lines, j+2)
-                            if result:
-                                return result
-        
-        # Stratégie 2: Cherche dans une en-tête de section (ex: "[KAAG] - [Chalais]")
-        for i, line in enumerate(lines):
-            if line.startswith("[") and title_clean.lower() in line.lower():
-                # Cherche le Descriptif dans les 80 lignes suivantes
-                for j in range(i, min(i+80, len(lines))):
-                    if re.search(r'^Descriptif|^Description', lines[j], re.IGNORECASE):
-                        if j+1 < len(lines) and (re.match(r'^-+$', lines[j+1].strip()) or re.match(r'^=+$', lines[j+1].strip())):
-                            result = self._extract_description_block(lines, j+2)
-                            if result:
-                                return result
-        
-        # Stratégie 3: Cherche le titre suivi d'une ligne de "=" (ex: "groupe de paroles...")
-        # et ensuite cherche le Descriptif
-        for i, line in enumerate(lines):
-            if title_clean.lower() == line.strip().lower():
-                # Vérifie que la ligne suivante est une ligne de tirets ou "="
-                if i+1 < len(lines) and (re.match(r'^-+$', lines[i+1].strip()) or re.match(r'^=+$', lines[i+1].strip())):
-                    # Cherche le Descriptif après ce titre
-                    for j in range(i+2, min(i+100, len(lines))):
-                        if re.search(r'^Descriptif|^Description', lines[j], re.IGNORECASE):
-                            if j+1 < len(lines) and (re.match(r'^-+$', lines[j+1].strip()) or re.match(r'^=+$', lines[j+1].strip())):
-                                result = self._extract_description_block(lines, j+2)
-                                if result:
-                                    return result
+        for start_idx in index.find_description_starts(title, numero):
+            result = self._extract_description_block(index.lines, start_idx)
+            if result:
+                return result
         
         # Retourne vide plutôt que une description incorrecte
         return ""
@@ -785,12 +1487,12 @@ class EventExtractor:
             curr_line = lines[i].strip()
             
             # Arrête sur les séparateurs majeurs
-            if re.match(r'^-{6,}$', curr_line):
+            if patterns.SEPARATOR_LINE_RE.match(curr_line):
                 if description_lines:
                     break
-            if re.match(r'^=+$', curr_line):
+            if patterns.EQUALS_LINE_RE.match(curr_line):
                 break
-            if re.match(r'Message-ID:', curr_line):
+            if patterns.MESSAGE_ID_START_RE.match(curr_line):
                 break
             # Arrête sur en-têtes en majuscules (fin du descriptif)
             if curr_line.isupper() and len(curr_line) > 3 and description_lines:
@@ -814,21 +1516,10 @@ class EventExtractor:
             description = description.replace('   ', ' ').replace('  ', ' ')
             
             # Nettoie les références administratives
-            description = re.sub(r'\s*📅[^:]*:\s*https://gco\.ouvaton\.org/[^/\s]+/[^/\s]+/\s*', ' ', description)
-            description = re.sub(r'\s*Cet événement a été ajouté[^.]*\.\s*', ' ', description, flags=re.IGNORECASE)
+            description = patterns.AGENDA_NOTICE_RE.sub(' ', description)
+            description = patterns.AGENDA_SENTENCE_SHORT_RE.sub(' ', description)
             
-            # Nettoie les encodages QUOTED-PRINTABLE
-            description = description.replace("=C3=A9", "é").replace("=C3=A8", "è")
-            description = description.replace("=C3=AA", "ê").replace("=C3=A7", "ç")
-            description = description.replace("=E2=80=99", "'").replace("=C3=A0", "à")
-            description = description.replace("=C3=B9", "ù").replace("=C3=A1", "á")
-            description = description.replace("=C3=A4", "ä").replace("=C3=B1", "ñ")
-            description = description.replace("=C3=B6", "ö").replace("=C3=BC", "ü")
-            description = re.sub(r'\s=\s', ' ', description)
-            description = re.sub(r'=\n', '', description)
-            description = description.replace("=3D", "=")
-            description = re.sub(r'=(?=[^0-9A-F]|$)', '', description)
-            description = re.sub(r'\s+', ' ', description)
+            description = patterns.WHITESPACE_RE.sub(' ', description)
             
             # Limite à 800 caractères
             if len(description) > 800:
@@ -844,6 +1535,51 @@ class EventExtractor:
         pass
 
 
+class MinifiedHTMLWriter:
+    """
+    Minifie le HTML au fil de l'écriture dans un fichier
+
+    Le résultat est identique à htmlmin.minify appliqué à la page entière,
+    sans que la page ne soit jamais construite en mémoire : le minifieur ne
+    consulte que le dernier fragment produit, les précédents sont écrits
+    dès qu'ils sont complets.
+
+    Utilise le tampon interne de HTMLMinParser (_data_buffer) : htmlmin est
+    figé dans requirements.txt, tests/test_html_generator.py vérifie
+    l'équivalence avec htmlmin.minify.
+    """
+
+    def __init__(self, file):
+        """
+        Args:
+            file: Fichier texte ouvert en écriture
+        """
+        self.file = file
+        self._parser = htmlmin.parser.HTMLMinParser(remove_empty_space=True)
+        # Texte après la dernière balise, fusionné avec le fragment suivant :
+        # les espaces entre deux balises sont réduits comme dans la page entière
+        self._pending = ''
+
+    def write(self, html: str):
+        """Minifie un fragment de la page"""
+        html = self._pending + html
+        tag_end = html.rfind('>') + 1
+        self._pending = html[tag_end:]
+        self._parser.feed(html[:tag_end])
+        buffer = self._parser._data_buffer
+        if len(buffer) > 1:
+            self.file.write(''.join(buffer[:-1]))
+            del buffer[:-1]
+
+    def close(self):
+        """Termine la page (le fichier reste ouvert)"""
+        self._parser.feed(self._pending)
+        self._pending = ''
+        self._parser.close()
+        self.file.write(self._parser.result)
+        self._parser.reset()
+
+
 class HTMLGenerator:
     """Classe pour générer une page HTML des événements"""
     
@@ -857,7 +1593,7 @@ class HTMLGenerator:
         self.events = events
     
     def generate(self, output_file: str = "annonces.html"):
-        """Génère la page HTML"""
+        """Génère la page HTML, écrite et minifiée carte par carte"""
         from datetime import datetime
         
         # Détermine les liens du menu selon le type
@@ -891,7 +1627,13 @@ class HTMLGenerator:
     </div>
 """
         
-        html_content = f"""<!DOCTYPE html>
+        # Communes uniques et triées du filtre
+        communes_sorted = sorted({event.get('commune', '').strip() for event in self.events} - {''})
+        communes_options = "".join(
+            f'                <option value="{commune}">{commune}</option>\n' for commune in communes_sorted
+        ).rstrip('\n')
+        
+        header = f"""<!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
@@ -935,7 +1677,7 @@ class HTMLGenerator:
             <label for="commune-filter">Filtrer par commune:</label>
             <select id="commune-filter" class="commune-selector">
                 <option value="">Afficher toutes les communes</option>
-                COMMUNES_OPTIONS_PLACEHOLDER
+                {communes_options}
             </select>
             {'<label for="date-filter" class="date-filter-label">Afficher:</label><select id="date-filter" class="date-selector"><option value="upcoming" selected>À venir</option><option value="all">Toutes les annonces</option></select>' if self.source_type == "Sorties" else ''}
         </div>
@@ -943,80 +1685,30 @@ class HTMLGenerator:
         <div class="events-grid">
 """
         
-        if not self.events:
-            html_content += """            <div class="empty-state">
+        with open(output_file, "w", encoding="utf-8") as f:
+            writer = MinifiedHTMLWriter(f)
+            writer.write(header)
+            
+            if not self.events:
+                writer.write("""            <div class="empty-state">
                 <p>Aucun événement trouvé</p>
             </div>
-"""
-        else:
-            # Extrait les communes uniques et les trie
-            communes_set = set()
-            for event in self.events:
-                commune = event.get('commune', '').strip()
-                if commune:
-                    communes_set.add(commune)
-            
-            communes_sorted = sorted(list(communes_set))
-            communes_options = ""
-            for commune in communes_sorted:
-                communes_options += f'                <option value="{commune}">{commune}</option>\n'
-            
-            # Remplace le placeholder par les options réelles
-            html_content = html_content.replace('COMMUNES_OPTIONS_PLACEHOLDER', communes_options.rstrip('\n'))
-            
-            # Groupe les événements par date de réception
-            from collections import defaultdict
-            from datetime import datetime
-            
-            events_by_date = defaultdict(list)
-            date_sort_keys = {}  # Pour stocker la clé de tri numérique
-            
-            for event in self.events:
-                date_received = event.get('email_date', 'Non spécifiée')
-                events_by_date[date_received].append(event)
-                
-                # Crée une clé de tri numérique (YYYYMMDDHHMMSS) pour un tri correct
-                if date_received != 'Non spécifiée' and date_received not in date_sort_keys:
-                    try:
-                        # Parse le format "10 décembre 2025 à 14:40"
-                        date_str = date_received.split(' à ')[0] if ' à ' in date_received else date_received
-                        time_str = date_received.split(' à ')[1] if ' à ' in date_received else '00:00'
-                        
-                        # Converti les mois français en numéros
-                        mois_fr = {
-                            "janvier": 1, "février": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6,
-                            "juillet": 7, "août": 8, "septembre": 9, "octobre": 10, "novembre": 11, "décembre": 12
-                        }
-                        
-                        parts = date_str.split()
-                        jour = int(parts[0])
-                        mois = mois_fr.get(parts[1], 1)
-                        annee = int(parts[2])
-                        heures, minutes = map(int, time_str.split(':'))
-                        
-                        # Crée une clé de tri: YYYYMMDDHHMMSS (plus grand = plus récent)
-                        sort_key = f"{annee:04d}{mois:02d}{jour:02d}{heures:02d}{minutes:02d}00"
-                        date_sort_keys[date_received] = sort_key
-                    except:
-                        date_sort_keys[date_received] = "00000000000000"
-            
-            # Trie les dates en ordre décroissant (plus récentes en premier)
-            sorted_dates = sorted(events_by_date.keys(), key=lambda x: date_sort_keys.get(x, "00000000000000"), reverse=True)
+""")
+            else:
+                for date, events in self._group_events_by_email_date():
+                    # Formate la date sans l'heure
+                    date_display = date.split(' à ')[0] if ' à ' in date else date
+                    writer.write(f'        <div class="date-section">\n'
+                                 f'            <div class="date-section-title">📅 {date_display}</div>\n'
+                                 f'            <div class="events-grid-section">\n')
+                    
+                    for event in events:
+                        writer.write(self._generate_event_card(event))
+                    
+                    writer.write(f'            </div>\n'
+                                 f'        </div>\n')
             
-            for date in sorted_dates:
-                # Formate la date sans l'heure
-                date_display = date.split(' à ')[0] if ' à ' in date else date
-                html_content += f'        <div class="date-section">\n'
-                html_content += f'            <div class="date-section-title">📅 {date_display}</div>\n'
-                html_content += f'            <div class="events-grid-section">\n'
-                
-                for event in events_by_date[date]:
-                    html_content += self._generate_event_card(event)
-                
-                html_content += f'            </div>\n'
-                html_content += f'        </div>\n'
-        
-        html_content += """        </div>
+            writer.write("""        </div>
         
         <footer>
             <p>Total: """ + str(len(self.events)) + """ événement(s)</p>
@@ -1026,17 +1718,34 @@ class HTMLGenerator:
     <script src="../public/script.js"></script>
 </body>
 </html>
-"""
-        
-        # Minifie le HTML pour réduire la taille du fichier
-        html_content = htmlmin.minify(html_content, remove_empty_space=True)
-        
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(html_content)
+""")
+            writer.close()
         
         print(f"✓ Page HTML générée: {output_file}")
         return output_file
     
+    def _group_events_by_email_date(self) -> List[Tuple[str, List[Dict]]]:
+        """Groupe les événements par date de réception, les plus récentes en premier"""
+        from collections import defaultdict
+        
+        events_by_date = defaultdict(list)
+        date_sort_keys = {}  # Date de réception (datetime) de chaque groupe
+        
+        for event in self.events:
+            date_received = event.get('email_date', 'Non spécifiée')
+            events_by_date[date_received].append(event)
+            
+            # Datetime calculé à l'extraction ; les événements sans date vont en dernier
+            if date_received not in date_sort_keys:
+                received = event.get('email_datetime')
+                if received is None and date_received != 'Non spécifiée':
+                    received = parse_french_date(date_received)
+                date_sort_keys[date_received] = received or datetime.min
+        
+        # Trie les dates en ordre décroissant (plus récentes en premier)
+        sorted_dates = sorted(events_by_date.keys(), key=date_sort_keys.get, reverse=True)
+        return [(date, events_by_date[date]) for date in sorted_dates]
+    
     def _generate_event_card(self, event: Dict) -> str:
         """Génère la carte HTML d'un événement"""
         # Vérifie si c'est un événement d'expression libre
@@ -1166,7 +1875,11 @@ class HTMLGenerator:
             if ' à ' in email_date_formatted:
                 email_date_formatted = email_date_formatted.split(' à ')[0]
             
-            return f"""            <div class="event-card" data-commune="{event.get('commune', '')}" data-event-date="{event.get('date', '')}">
+            # Dates de début et de fin (ISO) pour le filtre "À venir", sans analyse côté navigateur
+            event_start = event['start'].date().isoformat() if event.get('start') else ''
+            event_end = event['end'].date().isoformat() if event.get('end') else ''
+            
+            return f"""            <div class="event-card" data-commune="{event.get('commune', '')}" data-event-start="{event_start}" data-event-end="{event_end}">
                 <h3>{event['subject']}</h3>
                 {tooltip_html}
                 
@@ -1224,7 +1937,7 @@ class HTMLGenerator:
         # Génère les marqueurs
         markers_json = self._generate_markers_json(events_on_map)
         
-        html_content = f"""<!DOCTYPE html>
+        header = f"""<!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
@@ -1268,24 +1981,29 @@ class HTMLGenerator:
             <div class="sidebar-title">📍 Annonces ({len(events_on_map)})</div>
 """
         
-        if events_on_map:
-            for event in events_on_map:
-                html_content += f"""            <div class="event-list-item" onclick="focusEvent({event['latitude']}, {event['longitude']})">
+        # La page est écrite et minifiée au fil de la liste des annonces
+        with open(output_file, "w", encoding="utf-8") as f:
+            writer = MinifiedHTMLWriter(f)
+            writer.write(header)
+        
+            if events_on_map:
+                for event in events_on_map:
+                    writer.write(f"""            <div class="event-list-item" onclick="focusEvent({event['latitude']}, {event['longitude']})">
                 <div class="event-list-item-title">{event['subject']}</div>
                 <div class="event-list-item-meta">
                     <div class="event-list-item-meta-item">📍 {event['location']}</div>
                     <div class="event-list-item-meta-item">📅 {event['date']}</div>
                 </div>
             </div>
-"""
-        else:
-            html_content += """            <div class="no-locations">
+""")
+            else:
+                writer.write("""            <div class="no-locations">
                 <p>Aucune annonce n'a pu être géolocalisée.</p>
                 <p style="font-size: 0.85em; margin-top: 10px;">Les lieux doivent être spécifiés dans les emails.</p>
             </div>
-"""
+""")
         
-        html_content += f"""        </div>
+            writer.write(f"""        </div>
     </div>
     
     <div class="map-footer">
@@ -1309,13 +2027,8 @@ class HTMLGenerator:
     <script src="../public/script_carte.js"></script>
 </body>
 </html>
-"""
-        
-        # Minifie le HTML pour réduire la taille du fichier
-        html_content = htmlmin.minify(html_content, remove_empty_space=True)
-        
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(html_content)
+""")
+            writer.close()
         
         print(f"✓ Carte générée: {output_file} ({len(events_on_map)} événement(s) localisé(s))")
         return output_file
@@ -0,0 +1,140 @@
+"""
+Registre des digests déjà traités
+Conserve d'une exécution à l'autre les événements extraits de chaque message,
+pour ne relancer l'extraction que sur les nouveaux digests
+"""
+
+import copy
+import hashlib
+import inspect
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+# Format du fichier ; un registre d'un autre format est ignoré
+LEDGER_FORMAT = 2
+
+
+def _encode_value(value):
+    """Sérialise les dates des événements ({"$datetime": "2025-12-13T19:05:00"})"""
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+def _decode_object(obj: dict):
+    """Restaure les dates sérialisées par _encode_value"""
+    if len(obj) == 1 and '$datetime' in obj:
+        return datetime.fromisoformat(obj['$datetime'])
+    return obj
+
+
+def extraction_fingerprint(*sources) -> str:
+    """
+    Empreinte du code d'extraction : modules, classes, fonctions, expressions
+    régulières compilées ou chaînes (ex: bibliothèque utilisée pour le HTML)
+
+    Toute modification de ce code change l'empreinte, et donc la version
+    sous laquelle les résultats sont rangés dans le registre.
+    """
+    digest = hashlib.sha256()
+    for source in sources:
+        if isinstance(source, str):
+            text = source
+        elif isinstance(source, re.Pattern):
+            text = f"{source.pattern!r} {source.flags}"
+        else:
+            text = inspect.getsource(source)
+        digest.update(text.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:12]
+
+
+class ExtractionLedger:
+    """
+    Cache persistant des événements extraits, dans un fichier JSON
+
+    Chaque entrée est identifiée par l'extracteur (source), sa version et le
+    hash du contenu : un message corrigé est donc extrait à nouveau, et une
+    modification de l'extraction rend les anciens résultats inaccessibles.
+    Au-delà de MAX_ENTRIES, les entrées les moins récemment utilisées sont
+    supprimées (LRU).
+    """
+
+    # Nombre maximal d'entrées conservées
+    MAX_ENTRIES = 5000
+
+    def __init__(self, ledger_file: str = None, version: str = "1", max_entries: int = None):
+        """
+        Initialise le registre
+
+        Args:
+            ledger_file: Fichier JSON du registre (par défaut data/extraction_ledger.json)
+            version: Version de l'extraction (voir extraction_fingerprint)
+            max_entries: Nombre maximal d'entrées (par défaut MAX_ENTRIES)
+        """
+        if ledger_file is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            ledger_file = os.path.join(base_dir, "data", "extraction_ledger.json")
+
+        self.ledger_file = ledger_file
+        self.version = str(version)
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        # Dictionnaire ordonné du moins au plus récemment utilisé
+        self.entries = self._load_entries(ledger_file)
+        self.hits = 0
+        self.misses = 0
+
+    def _load_entries(self, ledger_file: str) -> dict:
+        """Charge les entrées du registre (aucune si le format a changé)"""
+        try:
+            with open(ledger_file, 'r', encoding='utf-8') as f:
+                data = json.load(f, object_hook=_decode_object)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        if data.get('format') != LEDGER_FORMAT:
+            return {}
+        return data.get('entries', {})
+
+    def _key(self, extractor: str, content: str) -> str:
+        """Clé d'un contenu : extracteur, version de l'extraction et hash du contenu"""
+        content_hash = hashlib.sha256(content.encode('utf-8', errors='surrogatepass')).hexdigest()
+        return f"{extractor}|{self.version}|{content_hash}"
+
+    def get(self, extractor: str, content: str) -> Optional[Dict | List[Dict]]:
+        """Retourne une copie des événements déjà extraits de ce contenu (ou None)"""
+        key = self._key(extractor, content)
+        events = self.entries.pop(key, None)
+        if events is None:
+            self.misses += 1
+            return None
+
+        # Réinsérée en fin : entrée la plus récemment utilisée
+        self.entries[key] = events
+        self.hits += 1
+        return copy.deepcopy(events)
+
+    def put(self, extractor: str, content: str, events: Dict | List[Dict]):
+        """Enregistre les événements extraits d'un contenu (avant toute correction)"""
+        key = self._key(extractor, content)
+        self.entries.pop(key, None)
+        self.entries[key] = copy.deepcopy(events)
+
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+    def save(self):
+        """Sauvegarde le registre, dans l'ordre d'utilisation"""
+        try:
+            os.makedirs(os.path.dirname(self.ledger_file), exist_ok=True)
+            tmp_file = self.ledger_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'format': LEDGER_FORMAT, 'entries': self.entries}, f, ensure_ascii=False,
+                          default=_encode_value)
+            os.replace(tmp_file, self.ledger_file)
+        except OSError as e:
+            print(f"⚠ Erreur lors de la sauvegarde du registre des digests: {e}")
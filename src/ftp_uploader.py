@@ -5,7 +5,7 @@ Supporte FTP et FTPS (FTP sécurisé)
 
 import os
 import ftplib
-from typing import Tuple
+from typing import List, Tuple
 
 
 class FTPUploader:
@@ -89,13 +89,14 @@ class FTPUploader:
         except Exception as e:
             return False, f"✗ Erreur: {str(e)}"
     
-    def upload_directory(self, local_dir: str, remote_dir: str) -> Tuple[int, int]:
+    def upload_directory(self, local_dir: str, remote_dir: str, filenames: List[str] = None) -> Tuple[int, int]:
         """
         Upload tous les fichiers d'un répertoire
         
         Args:
             local_dir: Répertoire local
             remote_dir: Répertoire distant
+            filenames: Limite l'upload à ces fichiers du répertoire (optionnel)
         
         Returns:
             Tuple (fichiers_uploadés: int, fichiers_échoués: int)
@@ -127,6 +128,8 @@ class FTPUploader:
             # Liste les fichiers locaux (en excluant certains fichiers techniques)
             files = [f for f in os.listdir(local_dir) 
                     if os.path.isfile(os.path.join(local_dir, f)) and f not in excluded_files]
+            if filenames is not None:
+                files = [f for f in files if f in filenames]
             
             for filename in files:
                 local_path = os.path.join(local_dir, filename)
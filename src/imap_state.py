@@ -0,0 +1,108 @@
+"""
+État de synchronisation IMAP incrémentale
+Mémorise par dossier l'UIDVALIDITY, le plus grand UID traité et la fenêtre
+des derniers emails récupérés, pour ne télécharger que les nouveaux messages
+La fenêtre ne contient que des références (Message-ID, UID) vers le magasin
+local des messages : les corps ne sont pas recopiés dans l'état
+"""
+
+import json
+import os
+import threading
+from datetime import date
+from typing import Dict, List, Optional
+
+
+class ImapSyncState:
+    """Persiste l'état de synchronisation IMAP dans un fichier JSON"""
+
+    def __init__(self, state_file: str = None):
+        """
+        Initialise l'état de synchronisation
+
+        Args:
+            state_file: Fichier JSON de l'état (par défaut data/imap_state.json)
+        """
+        if state_file is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            state_file = os.path.join(base_dir, "data", "imap_state.json")
+
+        self.state_file = state_file
+        self.folders = self._load_state(state_file)
+        # L'état peut être partagé entre les sessions de plusieurs dossiers
+        self._lock = threading.Lock()
+
+    def _load_state(self, state_file: str) -> dict:
+        """Charge l'état depuis le fichier JSON"""
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('folders', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self):
+        """Sauvegarde l'état dans le fichier JSON"""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+                tmp_file = self.state_file + ".tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump({'folders': self.folders}, f, ensure_ascii=False)
+                os.replace(tmp_file, self.state_file)
+            except OSError as e:
+                print(f"⚠ Erreur lors de la sauvegarde de l'état IMAP: {e}")
+
+    def get_folder(self, folder: str, uidvalidity: int, criteria: dict, since: date = None) -> Optional[Dict]:
+        """
+        Retourne l'état d'un dossier s'il est encore valide
+
+        L'état est invalidé (resynchronisation complète) si l'UIDVALIDITY du
+        serveur a changé, si les critères de récupération ne sont plus les mêmes
+        ou si la limite de date recule (la fenêtre ne contient pas les messages
+        plus anciens). Une limite qui avance, elle, ne fait que réduire la fenêtre.
+
+        Returns:
+            Dictionnaire {uidvalidity, last_uid, criteria, since, window} ou None
+        """
+        folder_state = self.folders.get(folder)
+        if not folder_state or 'window' not in folder_state:
+            return None
+
+        if folder_state.get('uidvalidity') != uidvalidity:
+            print(f"⚠ UIDVALIDITY du dossier '{folder}' modifiée, resynchronisation complète")
+            return None
+
+        if folder_state.get('criteria') != criteria:
+            print(f"⚠ Critères de récupération modifiés pour '{folder}', resynchronisation complète")
+            return None
+
+        window_since = folder_state.get('since')
+        if window_since and (since is None or since.isoformat() < window_since):
+            print(f"⚠ Limite de date élargie pour '{folder}', resynchronisation complète")
+            return None
+
+        return folder_state
+
+    def update_folder(self, folder: str, uidvalidity: int, last_uid: int, criteria: dict,
+                      window: List[Dict], since: date = None):
+        """
+        Enregistre le nouvel état d'un dossier
+
+        Args:
+            window: Références des emails de la fenêtre, les plus récents en
+                premier ({"message_id": clé dans le magasin local, "uid": UID})
+            since: Limite de date utilisée pour cette synchronisation
+        """
+        with self._lock:
+            self.folders[folder] = {
+                'uidvalidity': uidvalidity,
+                'last_uid': last_uid,
+                'criteria': criteria,
+                'since': since.isoformat() if since else None,
+                'window': window
+            }
+
+    def reset_folder(self, folder: str):
+        """Oublie l'état d'un dossier : la prochaine lecture le resynchronise entièrement"""
+        with self._lock:
+            self.folders.pop(folder, None)
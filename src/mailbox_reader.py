@@ -0,0 +1,240 @@
+"""
+Lecture des archives de listes (mbox et Maildir)
+Les messages sont lus un par un à la demande : une archive de plusieurs Go
+est traitée sans être chargée en mémoire
+"""
+
+import email
+import hashlib
+import json
+import mmap
+import os
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from email.parser import BytesHeaderParser
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List
+
+from email_reader import MessageParser
+
+
+class ArchiveReader(MessageParser, ABC):
+    """Base des lecteurs d'archives, avec le même contrat que EmailReader.get_emails"""
+
+    @abstractmethod
+    def iter_messages(self) -> Iterator[bytes]:
+        """Produit les messages bruts, les plus récents en premier"""
+
+    def get_emails(self, folder: str = None, limit: int = 10, domain_filter: str = None,
+                   subject_filters: List[str] = None, since: date = None) -> List[Dict]:
+        """Récupère les emails de l'archive dans une liste (voir iter_emails)"""
+        emails = list(self.iter_emails(folder, limit, domain_filter, subject_filters, since))
+        print(f"✓ {len(emails)} email(s) lu(s) depuis l'archive")
+        return emails
+
+    def iter_emails(self, folder: str = None, limit: int = 10, domain_filter: str = None,
+                    subject_filters: List[str] = None, since: date = None) -> Iterator[Dict]:
+        """
+        Produit les emails de l'archive un par un
+
+        Seuls les en-têtes sont analysés pour filtrer ; le message complet
+        n'est décodé que s'il est retenu.
+
+        Args:
+            folder: Ignoré (une archive correspond à un seul dossier)
+            limit: Nombre d'emails à récupérer
+            domain_filter: Filtrer par domaine (ex: "gco.ouvaton.net")
+            subject_filters: Garder les sujets contenant l'un de ces textes
+            since: Ne garder que les messages reçus à partir de cette date
+
+        Yields:
+            Emails avec métadonnées, les plus récents en premier
+        """
+        header_parser = BytesHeaderParser()
+        since_datetime = datetime(since.year, since.month, since.day) if since else None
+
+        count = 0
+        for raw_message in self.iter_messages():
+            header_end = raw_message.find(b"\n\n")
+            headers = header_parser.parsebytes(raw_message[:header_end + 1] if header_end != -1 else raw_message)
+
+            # L'ordre de l'archive ne suit pas forcément les en-têtes Date : un
+            # message ancien n'arrête pas la lecture, des plus récents peuvent suivre
+            if since_datetime and self._is_before(headers.get("Date", ""), since_datetime):
+                continue
+
+            if not self._matches_filters(headers, domain_filter, subject_filters):
+                continue
+
+            yield self._parse_email(email.message_from_bytes(raw_message))
+            count += 1
+            if count >= limit:
+                break
+
+    def _is_before(self, date_str: str, since_datetime: datetime) -> bool:
+        """Indique si un en-tête Date est antérieur à la date limite (False si illisible)"""
+        try:
+            message_datetime = parsedate_to_datetime(date_str)
+        except (TypeError, ValueError, IndexError):
+            return False
+        if message_datetime.tzinfo is not None:
+            message_datetime = message_datetime.astimezone().replace(tzinfo=None)
+        return message_datetime < since_datetime
+
+    def close(self):
+        """Rien à fermer par défaut"""
+        pass
+
+
+class MboxReader(ArchiveReader):
+    """
+    Lit une archive mbox par projection mémoire (mmap)
+
+    Un index des positions des séparateurs "From " est conservé dans
+    data/mbox_index/ : il n'est recalculé que pour les messages ajoutés à la
+    fin de l'archive depuis la lecture précédente.
+    """
+
+    def __init__(self, mbox_path: str, index_dir: str = None):
+        """
+        Args:
+            mbox_path: Fichier mbox
+            index_dir: Répertoire des index (par défaut data/mbox_index)
+        """
+        if index_dir is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            index_dir = os.path.join(base_dir, "data", "mbox_index")
+
+        self.mbox_path = os.path.abspath(mbox_path)
+        path_hash = hashlib.sha256(self.mbox_path.encode("utf-8")).hexdigest()[:12]
+        self.index_file = os.path.join(index_dir, f"{os.path.basename(mbox_path)}-{path_hash}.json")
+
+        self._file = open(self.mbox_path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.offsets = self._load_offsets()
+
+    def _load_offsets(self) -> List[int]:
+        """Charge l'index et le complète avec les messages ajoutés depuis"""
+        size = len(self._mmap)
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = {}
+
+        offsets = index.get("offsets", [])
+        indexed_size = index.get("size", 0)
+
+        if offsets and indexed_size == size:
+            return offsets
+
+        # L'archive a seulement grandi : l'index reste valable, seule la fin est parcourue
+        if offsets and indexed_size < size and self._mmap[offsets[-1]:offsets[-1] + 5] == b"From ":
+            offsets = offsets + self._scan_offsets(indexed_size)
+        else:
+            offsets = self._scan_offsets(0)
+
+        self._save_offsets(offsets, size)
+        return offsets
+
+    def _scan_offsets(self, start: int) -> List[int]:
+        """Positions des lignes "From " à partir de `start`"""
+        offsets = []
+        if start == 0 and self._mmap[:5] == b"From ":
+            offsets.append(0)
+
+        position = self._mmap.find(b"\nFrom ", max(start - 1, 0))
+        while position != -1:
+            offsets.append(position + 1)
+            position = self._mmap.find(b"\nFrom ", position + 1)
+        return offsets
+
+    def _save_offsets(self, offsets: List[int], size: int):
+        """Sauvegarde l'index des positions"""
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            tmp_file = self.index_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"path": self.mbox_path, "size": size, "offsets": offsets}, f)
+            os.replace(tmp_file, self.index_file)
+        except OSError as e:
+            print(f"⚠ Erreur lors de la sauvegarde de l'index mbox: {e}")
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def get_message(self, position: int) -> bytes:
+        """Retourne le message brut n° `position` (dans l'ordre de l'archive), sans sa ligne "From " """
+        start = self.offsets[position]
+        end = self.offsets[position + 1] if position + 1 < len(self.offsets) else len(self._mmap)
+
+        # Ligne vide de séparation avant le message suivant
+        if self._mmap[end - 2:end] == b"\n\n":
+            end -= 1
+
+        body_start = self._mmap.find(b"\n", start, end) + 1
+        return self._mmap[body_start:end]
+
+    def iter_messages(self) -> Iterator[bytes]:
+        """Produit les messages du plus récent (fin de l'archive) au plus ancien"""
+        for position in range(len(self.offsets) - 1, -1, -1):
+            yield self.get_message(position)
+
+    def close(self):
+        """Libère la projection mémoire et le fichier"""
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+
+class MaildirReader(ArchiveReader):
+    """Lit un répertoire Maildir (sous-répertoires cur/ et new/)"""
+
+    def __init__(self, maildir_path: str):
+        """
+        Args:
+            maildir_path: Répertoire Maildir
+        """
+        self.maildir_path = maildir_path
+
+    def _list_messages(self) -> List[str]:
+        """
+        Chemins des messages, les plus récents en premier
+
+        Les noms Maildir commencent par l'heure de livraison ("1733842800.M1P2.hote"),
+        ce qui permet de trier sans lire les fichiers.
+        """
+        entries = []
+        for subdir in ("new", "cur"):
+            directory = os.path.join(self.maildir_path, subdir)
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as scan:
+                for entry in scan:
+                    if entry.name.startswith(".") or not entry.is_file():
+                        continue
+                    delivery_time = entry.name.split(".", 1)[0]
+                    sort_key = int(delivery_time) if delivery_time.isdigit() else int(entry.stat().st_mtime)
+                    entries.append((sort_key, entry.path))
+
+        entries.sort(reverse=True)
+        return [path for _, path in entries]
+
+    def iter_messages(self) -> Iterator[bytes]:
+        """Produit les messages du plus récent au plus ancien"""
+        for path in self._list_messages():
+            try:
+                with open(path, 'rb') as f:
+                    yield f.read()
+            except FileNotFoundError:
+                continue  # Déplacé par le client mail entre new/ et cur/
+
+
+def open_archive(path: str) -> ArchiveReader:
+    """Ouvre une archive mbox (fichier) ou Maildir (répertoire avec cur/ ou new/)"""
+    if os.path.isdir(path):
+        if not any(os.path.isdir(os.path.join(path, subdir)) for subdir in ("cur", "new")):
+            raise ValueError(f"{path} n'est pas un répertoire Maildir (cur/ et new/ absents)")
+        return MaildirReader(path)
+    return MboxReader(path)
@@ -8,29 +8,41 @@ Script principal v2 - Traite deux sources d'annonces
 
 import sys
 import os
-import re
 import json
-import unicodedata
-from email_reader import EmailReader, HTMLGenerator
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import islice
+from typing import Iterable, Iterator
+from email_reader import EmailReader, HTMLGenerator, HTML_TAG_RE, HTML_TEXT_BACKEND, html_to_text, is_html_body
+from imap_state import ImapSyncState
+from async_reader import get_emails_from_folders
+from message_store import MessageStore, StoreReader
+from mailbox_reader import open_archive
+from extraction_ledger import ExtractionLedger, extraction_fingerprint
+import patterns
+import text_cleaner
+from commune_matcher import get_commune_matcher
+import date_parser
+from date_parser import parse_event_period, parse_french_date
 
 
 # ==================== EXTRACTION FUNCTIONS ====================
 
+
 def extract_phone_number(text: str) -> str:
     """Extrait un numéro de téléphone du texte"""
-    phone_pattern = r'0[1-9](?:[\s\.\-]?\d{2}){4}'
-    matches = re.findall(phone_pattern, text)
+    matches = patterns.PHONE_RE.findall(text)
     if matches:
         phone = matches[0]
-        phone_clean = re.sub(r'[\s\.\-]', '', phone)
+        phone_clean = patterns.PHONE_SEPARATORS_RE.sub('', phone)
         return phone_clean
     return ""
 
 
 def extract_whatsapp_link(text: str) -> str:
     """Extrait un lien WhatsApp du texte"""
-    whatsapp_pattern = r'https://chat\.whatsapp\.com/[^\s\n<>]+'
-    match = re.search(whatsapp_pattern, text)
+    match = patterns.WHATSAPP_LINK_RE.search(text)
     if match:
         return match.group(0).strip()
     return ""
@@ -38,8 +50,7 @@ def extract_whatsapp_link(text: str) -> str:
 
 def extract_second_email(text: str) -> str:
     """Extrait une adresse email du descriptif"""
-    email_pattern = r'\b([a-zA-Z0-9._%+-]+\s*@\s*[a-zA-Z0-9.\s-]+\.[a-zA-Z]{2,4})'
-    matches = re.findall(email_pattern, text)
+    matches = patterns.CONTACT_EMAIL_RE.findall(text)
     if matches and len(matches) > 0:
         email = matches[0].replace(' ', '')
         return email
@@ -48,8 +59,7 @@ def extract_second_email(text: str) -> str:
 
 def extract_http_links(text: str) -> list:
     """Extrait tous les liens HTTP/HTTPS du texte"""
-    link_pattern = r'https?://[^\s\n<>"]+'
-    matches = re.findall(link_pattern, text)
+    matches = patterns.HTTP_LINK_RE.findall(text)
     # Enlève les doublons tout en préservant l'ordre
     seen = set()
     unique_links = []
@@ -62,18 +72,9 @@ def extract_http_links(text: str) -> list:
 
 def clean_text(text: str) -> str:
     """Nettoie le texte"""
-    text = text.replace('\r', '')
-    cleaned = []
-    for char in text:
-        category = unicodedata.category(char)
-        if category[0] in ('L', 'N', 'P', 'Z'):
-            cleaned.append(char)
-        elif ord(char) < 128 and char.isprintable():
-            cleaned.append(char)
-        elif char == '\n':
-            cleaned.append(char)  # Préserve les retours à la ligne
-    text = ''.join(cleaned)
-    text = re.sub(r' +', ' ', text)
+    # Garde lettres, chiffres, ponctuation, espaces, ASCII imprimable et retours à la ligne
+    text = text.translate(text_cleaner.CLEAN_TEXT_TABLE)
+    text = patterns.SPACES_RE.sub(' ', text)
     return text.strip()
 
 
@@ -82,22 +83,8 @@ def extract_commune_from_location(location: str) -> str:
     if not location:
         return ''
     
-    # Charge la liste des communes depuis le fichier JSON
-    try:
-        communes_file = os.path.join(os.path.dirname(__file__), '..', 'communes_coordinates.json')
-        if os.path.exists(communes_file):
-            with open(communes_file, 'r', encoding='utf-8') as f:
-                communes_data = json.load(f)
-                communes_list = list(communes_data.keys())
-                
-                # Cherche si le nom de la commune est dans le texte du lieu
-                for commune in communes_list:
-                    if commune.lower() in location.lower():
-                        return commune
-    except:
-        pass
-    
-    return ''
+    # Automate des communes connues, construit une seule fois (mots entiers, nom le plus long)
+    return get_commune_matcher().find_longest(location) or ''
 
 
 def clean_libre_expression_text(text: str) -> str:
@@ -146,18 +133,14 @@ def clean_libre_expression_text(text: str) -> str:
     result = '\n'.join(cleaned_lines)
     
     # Enlève les doublons de retours à la ligne
-    result = re.sub(r'\n\n\n+', '\n\n', result)
+    result = patterns.MULTIPLE_BLANK_LINES_RE.sub('\n\n', result)
     
     return result.strip()
 
 
 def extract_sommaire(email_content: str) -> str:
     """Extrait le sommaire entre "Sommaire :" et "------..." """
-    match = re.search(
-        r'Sommaire\s*:\s*\n(.*?)(?:\n\s*\n\s*-{10,}|\nMessage-ID:)',
-        email_content,
-        re.DOTALL
-    )
+    match = patterns.SOMMAIRE_RE.search(email_content)
     if match:
         sommaire = match.group(1)
         return sommaire.strip()
@@ -173,14 +156,14 @@ def parse_events_from_sommaire(sommaire_text: str) -> list:
     for line in lines:
         line = line.strip()
         
-        if re.match(r'^\*\s+\d+', line):
+        num_match = patterns.SOMMAIRE_ENTRY_RE.match(line)
+        if num_match:
             if current_event:
                 events.append(current_event)
             
-            num_match = re.match(r'^\*\s+(\d+)', line)
-            numero = int(num_match.group(1)) if num_match else 0
+            numero = int(num_match.group(1))
             
-            line = re.sub(r'^\*\s+\d+\s*-?\s*', '', line)
+            line = patterns.SOMMAIRE_ENTRY_PREFIX_RE.sub('', line)
             
             current_event = {
                 'numero': numero,
@@ -208,15 +191,15 @@ def parse_event_fields(event: dict):
     """Parse les champs d'un événement"""
     text = event['texte_complet']
     
-    types = re.findall(r'\[([^\]]+)\]', text)
+    types = patterns.BRACKETS_RE.findall(text)
     event['types'] = types
     
     # Enlève les types au début
-    remaining = re.sub(r'^\s*(\[([^\]]+)\]\s*)+', '', text)
-    remaining = re.sub(r'^\s*-\s*', '', remaining)
+    remaining = patterns.LEADING_BRACKETS_RE.sub('', text)
+    remaining = patterns.LEADING_DASH_RE.sub('', remaining)
     
     # Extrait l'email et tout ce qui le suit (auteur, etc.)
-    email_match = re.search(r'<([^>]+)>', remaining)
+    email_match = patterns.ANGLE_EMAIL_RE.search(remaining)
     if email_match:
         event['email'] = email_match.group(1).strip()
         # Enlève tout depuis l'email jusquà la fin (l'auteur et le reste)
@@ -269,33 +252,21 @@ def extract_message_fields(message: dict):
     content = message['content']
     
     # Extrait "Quand : "
-    quand_match = re.search(
-        r'Quand\s*:\s*(.*?)(?=Où\s*:)',
-        content,
-        re.DOTALL
-    )
+    quand_match = patterns.QUAND_RE.search(content)
     if quand_match:
         quand_text = quand_match.group(1).strip()
         quand_text = clean_text(quand_text)
         message['quand'] = quand_text
     
     # Extrait "Où : "
-    lieu_match = re.search(
-        r'Où\s*:\s*(.*?)(?=Descriptif)',
-        content,
-        re.DOTALL
-    )
+    lieu_match = patterns.LIEU_RE.search(content)
     if lieu_match:
         lieu_text = lieu_match.group(1).strip()
         lieu_text = clean_text(lieu_text)
         message['lieu'] = lieu_text
     
     # Extrait "Descriptif"
-    descriptif_match = re.search(
-        r'Descriptif\s*\n\s*-+\s*\n+(.*?)(?:-->\s*Visitez|-->\s*Une pièce jointe|📅\s*Cet événement|^-{10,})',
-        content,
-        re.DOTALL | re.MULTILINE
-    )
+    descriptif_match = patterns.DESCRIPTIF_RE.search(content)
     if descriptif_match:
         descriptif_text = descriptif_match.group(1).strip()
         # Extraits AVANT nettoyage
@@ -310,35 +281,23 @@ def extract_message_fields(message: dict):
         message['descriptif'] = descriptif_text
     
     # Extrait les liens
-    lien_match = re.search(
-        r'-->\s*Visitez le site internet de l\'événement\s*:\s*(\S+)',
-        content,
-        re.DOTALL
-    )
+    lien_match = patterns.LIEN_RE.search(content)
     if lien_match:
         lien = lien_match.group(1).strip()
         message['lien'] = lien
     
     # Extrait le lien agenda
-    agenda_match = re.search(
-        r'📅\s*Cet événement a été ajouté à l\'agenda des sorties des crieurs\s*:\s*(\S+)',
-        content,
-        re.DOTALL
-    )
+    agenda_match = patterns.AGENDA_RE.search(content)
     if agenda_match:
         agenda_lien = agenda_match.group(1).strip()
         message['agenda'] = agenda_lien
     
     # Extrait les pièces jointes
     pièces_jointes = []
-    pj_match = re.search(
-        r'-->\s*Une pièce jointe est disponible\s*:\s*(.*?)(?:^-{10,}|Contactez|Ne répondez)',
-        content,
-        re.DOTALL | re.MULTILINE
-    )
+    pj_match = patterns.PIECES_JOINTES_RE.search(content)
     if pj_match:
         pj_section = pj_match.group(1).strip()
-        liens = re.findall(r'https://gco\.ouvaton\.org/wp-content/[^\s\n<>]*', pj_section)
+        liens = patterns.ATTACHMENT_LINK_RE.findall(pj_section)
         pièces_jointes = liens
     
     message['pièces_jointes'] = pièces_jointes
@@ -356,6 +315,11 @@ def consolidate_events(sommaire_events: list, messages: list) -> list:
         if message:
             extract_message_fields(message)
             
+            # Début et fin analysés une fois pour toutes ("Quand", sinon date du sommaire)
+            debut, fin = parse_event_period(message['quand'])
+            if debut is None:
+                debut, fin = parse_event_period(event['date_heure'])
+            
             consolidated_event = {
                 'numero': numero,
                 'types': event['types'],
@@ -364,6 +328,8 @@ def consolidate_events(sommaire_events: list, messages: list) -> list:
                 'organisateur': event['organisateur'],
                 'mailorga': event['email'],
                 'quand_detail': message['quand'],
+                'debut': debut,
+                'fin': fin,
                 'lieu_detail': message['lieu'],
                 'descriptif': message['descriptif'],
                 'telephone': message['telephone'],
@@ -425,18 +391,14 @@ def extract_libre_expression_events(email_content: str) -> list:
         # 1. Avec HTML : [ Texte initialement au format HTML ]\n[Auteur] - [Lieu]\n-----...texte...
         # 2. Simple : texte direct sans préambule
         
-        texte_match = re.search(
-            r'Subject:.*?\n(.*?)\n\-{10,}',
-            message_content,
-            re.DOTALL | re.IGNORECASE
-        )
+        texte_match = patterns.LIBRE_TEXT_RE.search(message_content)
         
         if texte_match:
             texte_brut = texte_match.group(1).strip()
             
             # Ignore les lignes à supprimer :
             # 1. "[ Texte initialement au format HTML ]"
-            texte_brut = re.sub(r'\[\s*Texte initialement au format HTML\s*\]', '', texte_brut, flags=re.IGNORECASE)
+            texte_brut = patterns.HTML_MARKER_RE.sub('', texte_brut)
             
             # 2. Les champs entre crochets (ex: [Bruno Duguenet] - [Coulaures])
             #    Mais garde le texte qui suit après les tirets
@@ -446,12 +408,12 @@ def extract_libre_expression_events(email_content: str) -> list:
             
             for line in lines:
                 # Si c'est une ligne avec seulement des crochets ou tirets, skip
-                if re.match(r'^\s*(\[.*?\]\s*-?\s*)+\s*$', line):
+                if patterns.BRACKETS_ONLY_LINE_RE.match(line):
                     skip_until_separator = True
                     continue
                 
                 # Si la ligne précédente était des crochets et celle-ci est vide/tirets, skip aussi
-                if skip_until_separator and re.match(r'^\s*\-+\s*$', line):
+                if skip_until_separator and patterns.DASHES_ONLY_LINE_RE.match(line):
                     skip_until_separator = False
                     continue
                 
@@ -460,7 +422,7 @@ def extract_libre_expression_events(email_content: str) -> list:
             texte_brut = '\n'.join(filtered_lines).strip()
             
             # Nettoie les espaces inutiles
-            texte_brut = re.sub(r'\n\s*\n', '\n', texte_brut).strip()
+            texte_brut = patterns.BLANK_LINES_RE.sub('\n', texte_brut).strip()
             
             # Extrait les infos de contact du texte
             phone = extract_phone_number(texte_brut)
@@ -482,6 +444,8 @@ def extract_libre_expression_events(email_content: str) -> list:
                 'date_heure_sommaire': '',
                 'lieu_detail': lieu,  # ✅ Lieu du sommaire
                 'quand_detail': '',
+                'debut': None,
+                'fin': None,
                 'organisateur': '',
                 'descriptif': '',
                 'lien': '',
@@ -493,87 +457,327 @@ def extract_libre_expression_events(email_content: str) -> list:
     
     return events
 
+
+def extract_email_events(email_content: str, source_filter: str) -> list:
+    """
+    Extrait les événements d'un digest selon la logique de sa source
+    (sans la date de l'email, ajoutée par l'appelant)
+    """
+    if source_filter == 'crieur-libre-expression':
+        # Expression libre: texte libre entre tirets
+        return extract_libre_expression_events(email_content)
+    
+    # Sorties: extraction sommaire + messages structurés
+    sommaire = extract_sommaire(email_content)
+    if not sommaire:
+        return []
+    
+    events_sommaire = parse_events_from_sommaire(sommaire)
+    messages = extract_messages(email_content)
+    
+    # Consolide les événements
+    return consolidate_events(events_sommaire, messages)
+
+
+# Version de l'extraction : empreinte du code des fonctions ci-dessus, des modules
+# qu'elles utilisent et de la conversion HTML partagée avec EventExtractor.
+# Toute modification invalide les résultats du registre des digests
+EXTRACTION_VERSION = extraction_fingerprint(
+    extract_phone_number, extract_whatsapp_link, extract_second_email, extract_http_links,
+    clean_text, clean_libre_expression_text, extract_sommaire, parse_events_from_sommaire,
+    parse_event_fields, extract_messages, extract_message_fields, consolidate_events,
+    extract_libre_expression_events, extract_email_events, patterns, text_cleaner, date_parser,
+    is_html_body, html_to_text, HTML_TAG_RE, HTML_TEXT_BACKEND
+)
+
 # ==================== END EXTRACTION FUNCTIONS ====================
 
 
-def process_annonces_source(email: str, password: str, imap_server: str, imap_port: int,
-                           mail_folder: str, email_limit: int, domain_filter: str,
-                           source: dict) -> bool:
+# Configuration des quatre sources
+SOURCES = [
+    {
+        'name': 'Sorties',
+        'filter': 'crieur-des-sorties',
+        'output_html': 'annonces.html',
+        'output_map': 'carte_des_annonces.html',
+        'title': 'Annonces Crieur'
+    },
+    {
+        'name': 'Expression Libre',
+        'filter': 'crieur-libre-expression',
+        'output_html': 'expression_libre.html',
+        'output_map': 'carte_expression_libre.html',
+        'title': 'Expression Libre Crieur'
+    },
+    {
+        'name': 'Solidaire',
+        'filter': 'crieur-solidaire',
+        'output_html': 'solidaire.html',
+        'output_map': 'carte_solidaire.html',
+        'title': 'Annonces Solidaire Crieur'
+    },
+    {
+        'name': 'Annonces Commerciales',
+        'filter': 'crieur-annonces-commerciales',
+        'output_html': 'annonces_commerciales.html',
+        'output_map': 'carte_annonces_commerciales.html',
+        'title': 'Annonces Commerciales Crieur'
+    }
+]
+
+# En dessous de ce nombre de digests à extraire (ou avec un seul processus), le
+# démarrage du pool coûte plus cher que l'extraction : elle reste séquentielle
+PARALLEL_EXTRACTION_THRESHOLD = 8
+
+# Digests confiés à un processus par tâche (amortit les échanges entre processus)
+EXTRACTION_CHUNK_SIZE = 4
+
+# Digests traités par lot : seuls les corps d'un lot sont gardés en mémoire,
+# quel que soit le nombre d'emails lus
+EXTRACTION_BATCH_SIZE = 64
+
+
+def extract_events_parallel(email_contents: list, source_filters: list,
+                            executor: ProcessPoolExecutor = None) -> list:
     """
-    Traite une source d'annonces (sorties ou expression libre)
-    Retourne True si succès, False sinon
+    Extrait les événements de plusieurs digests, répartis sur un pool de processus
+    
+    Chaque digest est indépendant : les extractions (expressions régulières,
+    donc limitées par le CPU) s'exécutent en parallèle sur tous les cœurs.
+    
+    Args:
+        email_contents: Corps des digests
+        source_filters: Filtre de la source de chaque digest (logique d'extraction)
+        executor: Pool de processus (extraction séquentielle si None)
+    
+    Returns:
+        Liste des événements de chaque digest, dans l'ordre de `email_contents`
+    """
+    if executor is None:
+        return [extract_email_events(content, source_filter)
+                for content, source_filter in zip(email_contents, source_filters)]
+    
+    return list(executor.map(extract_email_events, email_contents, source_filters,
+                             chunksize=EXTRACTION_CHUNK_SIZE))
+
+
+def fetch_emails(email: str, password: str, imap_server: str, imap_port: int,
+                 mail_folders: list, email_limit: int, domain_filter: str,
+                 subject_filters: list = None, since: date = None,
+                 incremental: bool = False, store: MessageStore = None) -> Iterator[dict]:
     """
+    Récupère les emails des dossiers (un seul téléchargement partagé par toutes les sources)
+    Un seul dossier est lu en une session IMAP, et chaque email est produit dès
+    son téléchargement ; plusieurs dossiers sont lus simultanément, avec une
+    session par dossier
+    Les filtres domaine/sujets/date sont appliqués côté serveur (SEARCH)
+    En mode incrémental, seuls les nouveaux UID sont téléchargés
+    Les messages téléchargés sont conservés dans le magasin local s'il est fourni
+    """
+    sync_state = ImapSyncState() if incremental else None
+    
+    print(f"\n📧 Connexion à {email} sur {imap_server}...")
+    if domain_filter:
+        print(f"🔍 Filtre domaine: *{domain_filter}")
+    if since:
+        print(f"🔍 Filtre date: depuis le {since.strftime('%d/%m/%Y')}")
+    if incremental:
+        print("🔄 Synchronisation incrémentale")
+    
+    count = 0
+    if len(mail_folders) > 1:
+        for email_msg in get_emails_from_folders(
+            email, password, imap_server, imap_port, mail_folders,
+            limit=email_limit, domain_filter=domain_filter,
+            subject_filters=subject_filters, since=since,
+            sync_state=sync_state, store=store
+        ):
+            count += 1
+            yield email_msg
+    else:
+        reader = EmailReader(email, password, imap_server, imap_port, sync_state=sync_state, store=store)
+        try:
+            # Récupère les emails du dossier spécifié
+            print(f"📂 Lecture du dossier '{mail_folders[0]}'...")
+            for email_msg in reader.iter_emails(folder=mail_folders[0], limit=email_limit, domain_filter=domain_filter,
+                                                subject_filters=subject_filters, since=since):
+                count += 1
+                yield email_msg
+        finally:
+            reader.close()
+    
+    if count:
+        print(f"✓ {count} email(s) récupéré(s)" + (f" du domaine {domain_filter}" if domain_filter else ""))
+    else:
+        print(f"❌ Aucun email trouvé dans le(s) dossier(s) {', '.join(mail_folders)}")
+
+
+def load_stored_emails(store: MessageStore, mail_folders: list, email_limit: int, domain_filter: str,
+                       subject_filters: list = None, since: date = None) -> Iterator[dict]:
+    """
+    Lit les emails depuis le magasin local (mode hors ligne), un par un
+    Permet de régénérer les pages sans connexion IMAP
+    """
+    print(f"\n💾 Mode hors ligne: lecture du magasin local {store.store_dir}")
+    reader = StoreReader(store)
+    
+    count = 0
+    for mail_folder in mail_folders:
+        for email_msg in reader.iter_emails(folder=mail_folder, limit=email_limit, domain_filter=domain_filter,
+                                            subject_filters=subject_filters, since=since):
+            count += 1
+            yield email_msg
+    
+    if count:
+        print(f"✓ {count} email(s) lu(s) depuis le magasin local")
+    else:
+        print(f"❌ Aucun email du/des dossier(s) {', '.join(mail_folders)} dans le magasin local")
+
+
+def load_archive_emails(archive_path: str, email_limit: int, domain_filter: str,
+                        subject_filters: list = None, since: date = None) -> Iterator[dict]:
+    """
+    Lit les emails depuis une archive mbox ou Maildir (sans connexion IMAP)
+    Les messages sont lus et produits un par un, l'archive n'est jamais chargée en mémoire
+    """
+    print(f"\n📦 Lecture de l'archive {archive_path}")
+    reader = open_archive(archive_path)
+    
+    count = 0
     try:
-        # Étape 1: Connexion et récupération des emails
-        print(f"\n📧 Connexion à {email} sur {imap_server}...")
-        reader = EmailReader(email, password, imap_server, imap_port)
-        
-        # Récupère les emails du dossier spécifié
-        print(f"📂 Lecture du dossier '{mail_folder}'...")
-        if domain_filter:
-            print(f"🔍 Filtre domaine: *{domain_filter}")
-        
-        emails = reader.get_emails(folder=mail_folder, limit=email_limit, domain_filter=domain_filter)
+        for email_msg in reader.iter_emails(limit=email_limit, domain_filter=domain_filter,
+                                            subject_filters=subject_filters, since=since):
+            count += 1
+            yield email_msg
+    finally:
         reader.close()
-        
-        if not emails:
-            print(f"❌ Aucun email trouvé dans le dossier '{mail_folder}'")
-            return False
-        
-        # Filtre les emails pour le sujet spécifié
-        print(f"🔍 Filtre sujet: '{source['filter']}'")
-        emails_filtered = [e for e in emails if source['filter'] in e.get('subject', '').lower()]
-        print(f"✓ {len(emails_filtered)}/{len(emails)} email(s) trouvé(s)")
-        
-        if not emails_filtered:
-            print(f"⚠️  Aucun email avec le sujet '{source['filter']}'")
-            return False
-        
-        emails = emails_filtered
-        
-        # Étape 2: Extraction consolidée des événements
-        print("\n🔍 Extraction consolidée des événements...")
-        all_events_consolidated = []
-        
-        # Utilise la logique d'extraction appropriée selon la source
-        if source['filter'] == 'crieur-libre-expression':
-            # Expression libre: texte libre entre tirets
-            for email_msg in emails:
-                email_content = email_msg['body']
-                email_date = email_msg['date']
-                
-                events = extract_libre_expression_events(email_content)
-                
-                # Ajoute la date de l'email à chaque événement
+    
+    if count:
+        print(f"✓ {count} email(s) lu(s) depuis l'archive")
+    else:
+        print(f"❌ Aucun email trouvé dans l'archive {archive_path}")
+
+
+_subject_routers = {}
+
+
+def subject_router(source_filters: tuple) -> re.Pattern:
+    """
+    Table de routage des sujets : une seule expression compilée qui reconnaît
+    tous les filtres de sujet (mise en cache par ensemble de filtres)
+    
+    Les filtres les plus longs sont essayés d'abord, pour qu'un filtre qui en
+    contient un autre l'emporte à la même position.
+    """
+    router = _subject_routers.get(source_filters)
+    if router is None:
+        alternatives = sorted(set(source_filters), key=len, reverse=True)
+        router = re.compile('|'.join(re.escape(source_filter) for source_filter in alternatives))
+        _subject_routers[source_filters] = router
+    return router
+
+
+def route_email(email_msg: dict, router: re.Pattern) -> list:
+    """Filtres des sources dont le sujet de l'email contient le nom (sans doublon, dans l'ordre du sujet)"""
+    subject = email_msg.get('subject', '').lower()
+    return list(dict.fromkeys(match.group(0) for match in router.finditer(subject)))
+
+
+def route_emails_by_source(emails: list, sources: list) -> dict:
+    """
+    Répartit les emails entre les sources selon leur sujet, en un seul passage
+    Retourne un dictionnaire {filtre de la source: liste d'emails}
+    """
+    routed = {source['filter']: [] for source in sources}
+    router = subject_router(tuple(routed))
+    
+    for email_msg in emails:
+        for source_filter in route_email(email_msg, router):
+            routed[source_filter].append(email_msg)
+    
+    return routed
+
+
+def extract_events_by_source(emails: Iterable[dict], sources: list, ledger: ExtractionLedger = None,
+                             workers: int = None) -> dict:
+    """
+    Extrait en un seul passage sur les emails les événements de toutes les sources
+    
+    Chaque email est attribué à sa source par la table de routage des sujets,
+    puis confié à la logique d'extraction de cette source (sorties ou expression
+    libre). Ajouter une source n'ajoute donc aucun parcours des emails.
+    
+    Les emails sont consommés par lots de EXTRACTION_BATCH_SIZE : les digests
+    déjà présents dans le registre ne sont pas réextraits, les autres, toutes
+    sources confondues, sont extraits en parallèle (`workers` processus, par
+    défaut un par CPU). Seuls les événements sont conservés : le corps d'un
+    email est libéré dès que son lot est traité.
+    
+    Returns:
+        Dictionnaire {filtre de la source: événements, dans l'ordre des emails}
+    """
+    router = subject_router(tuple(source['filter'] for source in sources))
+    email_counts = {source['filter']: 0 for source in sources}
+    events_by_source = {source['filter']: [] for source in sources}
+    
+    def routed_emails():
+        for email_msg in emails:
+            for source_filter in route_email(email_msg, router):
+                email_counts[source_filter] += 1
+                yield email_msg, source_filter
+    
+    workers = workers or os.cpu_count() or 1
+    executor = None
+    routed = routed_emails()
+    try:
+        while True:
+            batch = list(islice(routed, EXTRACTION_BATCH_SIZE))
+            if not batch:
+                break
+            
+            # Réutilise l'extraction d'une exécution précédente si le digest est connu
+            events_batch = [ledger.get(source_filter, email_msg['body']) if ledger else None
+                            for email_msg, source_filter in batch]
+            
+            # Extrait les autres digests, en parallèle dès que le volume le justifie
+            missing = [index for index, events in enumerate(events_batch) if events is None]
+            if executor is None and workers > 1 and len(missing) >= PARALLEL_EXTRACTION_THRESHOLD:
+                print(f"⚙️  Extraction sur {workers} processus")
+                executor = ProcessPoolExecutor(max_workers=workers)
+            
+            extracted = extract_events_parallel([batch[index][0]['body'] for index in missing],
+                                                [batch[index][1] for index in missing], executor)
+            for index, events in zip(missing, extracted):
+                events_batch[index] = events
+                if ledger:
+                    ledger.put(batch[index][1], batch[index][0]['body'], events)
+            
+            for (email_msg, source_filter), events in zip(batch, events_batch):
+                # Ajoute la date de l'email à chaque événement (texte et datetime)
+                email_datetime = parse_french_date(email_msg['date'])
                 for event in events:
-                    event['email_date'] = email_date
-                
-                all_events_consolidated.extend(events)
-        else:
-            # Sorties: extraction sommaire + messages structurés
-            for email_msg in emails:
-                email_content = email_msg['body']
-                email_date = email_msg['date']
-                
-                # Extrait sommaire et messages
-                sommaire = extract_sommaire(email_content)
-                if not sommaire:
-                    continue
-                
-                events_sommaire = parse_events_from_sommaire(sommaire)
-                messages = extract_messages(email_content)
-                
-                # Consolide les événements
-                events_consolidated = consolidate_events(events_sommaire, messages)
-                
-                # Ajoute la date de l'email à chaque événement
-                for event in events_consolidated:
-                    event['email_date'] = email_date
-                
-                all_events_consolidated.extend(events_consolidated)
-        
-        print(f"✓ {len(all_events_consolidated)} événement(s) extrait(s)")
+                    event['email_date'] = email_msg['date']
+                    event['email_datetime'] = email_datetime
+                events_by_source[source_filter].extend(events)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    for source in sources:
+        print(f"🔍 {source['name']}: {email_counts[source['filter']]} email(s) avec le sujet '{source['filter']}'")
+    
+    return events_by_source
 
+
+def process_annonces_source(all_events_consolidated: list, source: dict) -> bool:
+    """
+    Traite une source d'annonces (sorties ou expression libre)
+    à partir des événements extraits de ses emails (voir extract_events_by_source)
+    Les événements sont convertis sur place au format HTMLGenerator, sans copie de la liste
+    Retourne True si succès, False sinon
+    """
+    try:
+        print(f"✓ {len(all_events_consolidated)} événement(s) extrait(s)")
         
         if not all_events_consolidated:
             print(f"⚠️  Aucun événement extrait")
@@ -596,6 +800,7 @@ def process_annonces_source(email: str, password: str, imap_server: str, imap_po
                             for field, value in corrections[event_title].items():
                                 if field == "date":
                                     event['date_heure_sommaire'] = value
+                                    event['debut'], event['fin'] = parse_event_period(value)
                                 else:
                                     event[field] = value
             except json.JSONDecodeError:
@@ -604,9 +809,8 @@ def process_annonces_source(email: str, password: str, imap_server: str, imap_po
         # Étape 3: Génération HTML
         print(f"\n🎨 Génération HTML pour {source['name']}...")
         
-        # Convertit au format HTMLGenerator
-        events_html_format = []
-        for event in all_events_consolidated:
+        # Convertit au format HTMLGenerator (chaque événement remplace l'original)
+        for position, event in enumerate(all_events_consolidated):
             if source['filter'] == 'crieur-libre-expression':
                 # Expression libre: structure simplifiée
                 # Convertit les liens HTTP en liste (ou None si vide)
@@ -624,6 +828,7 @@ def process_annonces_source(email: str, password: str, imap_server: str, imap_po
                     'whatsapp': event['whatsapp'],
                     'mailcontact': event['mailcontact'],
                     'email_date': event.get('email_date', 'Non spécifiée'),
+                    'email_datetime': event.get('email_datetime'),
                     'organizer_email': event['mailorga'],
                     'is_libre_expression': True,  # Marqueur pour le template
                     'commune': commune  # ✅ Ajoute la commune
@@ -649,6 +854,8 @@ def process_annonces_source(email: str, password: str, imap_server: str, imap_po
                 event_html = {
                     'subject': event['titre'],
                     'date': event['date_heure_sommaire'],
+                    'start': event.get('debut'),
+                    'end': event.get('fin'),
                     'location': event['lieu_detail'] or (event.get('types', [])[1] if len(event.get('types', [])) > 1 else ''),  # Utilise la commune comme fallback
                     'description': event['descriptif'],
                     'links': links if links else None,
@@ -656,14 +863,15 @@ def process_annonces_source(email: str, password: str, imap_server: str, imap_po
                     'whatsapp': event['whatsapp'],
                     'mailcontact': event['mailcontact'],
                     'email_date': event.get('email_date', 'Non spécifiée'),
+                    'email_datetime': event.get('email_datetime'),
                     'organizer_email': event['mailorga'],
                     'is_libre_expression': False,
                     'commune': commune  # ✅ Ajoute la commune
                 }
-            events_html_format.append(event_html)
+            all_events_consolidated[position] = event_html
         
         generator = HTMLGenerator(source['title'])
-        generator.add_events(events_html_format)
+        generator.add_events(all_events_consolidated)
         # Définit le type de source pour le menu de navigation
         generator.source_type = source['name']  # 'Sorties' ou 'Expression Libre'
         
@@ -693,8 +901,11 @@ def process_annonces_source(email: str, password: str, imap_server: str, imap_po
         return False
 
 
-def ftp_upload(output_dir: str):
-    """Upload les fichiers HTML vers le serveur FTP"""
+def ftp_upload(output_dir: str, filenames: list = None):
+    """
+    Upload les fichiers HTML vers le serveur FTP
+    (seulement `filenames` s'ils sont indiqués, sinon tout le répertoire)
+    """
     from ftp_uploader import FTPUploader
     
     enable_ftp = os.getenv("ENABLE_FTP_UPLOAD", "false").lower() == "true"
@@ -730,7 +941,7 @@ def ftp_upload(output_dir: str):
         # Ajoute /output au chemin distant pour les fichiers HTML
         remote_output_path = os.path.join(ftp_remote_path, "output").replace('\\', '/')
         print(f"  📁 Uploading vers {remote_output_path}...")
-        uploaded, failed = uploader.upload_directory(output_dir, remote_output_path)
+        uploaded, failed = uploader.upload_directory(output_dir, remote_output_path, filenames)
         
         if uploaded > 0:
             print(f"  ✓ {uploaded} fichier(s) uploadé(s)")
@@ -811,13 +1022,21 @@ def main():
     PASSWORD = os.getenv("EMAIL_PASSWORD", "").strip()
     IMAP_SERVER = os.getenv("IMAP_SERVER", "imap.free.fr")
     IMAP_PORT = int(os.getenv("IMAP_PORT", "993"))
-    MAIL_FOLDER = os.getenv("MAIL_FOLDER", "CE")
+    MAIL_FOLDERS = [folder.strip() for folder in os.getenv("MAIL_FOLDER", "CE").split(",") if folder.strip()] or ["CE"]
     EMAIL_LIMIT = int(os.getenv("EMAIL_LIMIT", "50"))
     DOMAIN_FILTER = os.getenv("DOMAIN_FILTER", "").strip() or None
     PROMPT_FOR_CREDENTIALS = os.getenv("PROMPT_FOR_CREDENTIALS", "false").lower() == "true"
+    INCREMENTAL_SYNC = os.getenv("INCREMENTAL_SYNC", "false").lower() == "true"
+    SINCE_DAYS = int(os.getenv("SINCE_DAYS", "0") or "0")
+    MESSAGE_STORE = os.getenv("MESSAGE_STORE", "true").lower() == "true"
+    OFFLINE_MODE = os.getenv("OFFLINE_MODE", "false").lower() == "true"
+    EXTRACTION_LEDGER = os.getenv("EXTRACTION_LEDGER", "true").lower() == "true"
+    MAILBOX_PATH = os.getenv("MAILBOX_PATH", "").strip()
+    EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0") or "0")
+    NEEDS_IMAP = not OFFLINE_MODE and not MAILBOX_PATH
     
-    # Demander les identifiants si nécessaire
-    if PROMPT_FOR_CREDENTIALS or not EMAIL or not PASSWORD:
+    # Demander les identifiants si nécessaire (inutile en mode hors ligne ou archive)
+    if NEEDS_IMAP and (PROMPT_FOR_CREDENTIALS or not EMAIL or not PASSWORD):
         if PROMPT_FOR_CREDENTIALS:
             print("\n🔐 Mode saisie interactive\n")
         
@@ -828,55 +1047,54 @@ def main():
             import getpass
             PASSWORD = getpass.getpass("🔑 Mot de passe: ")
     
-    if not EMAIL or not PASSWORD:
+    if NEEDS_IMAP and (not EMAIL or not PASSWORD):
         print("❌ Email et mot de passe requis")
         return
     
     try:
-        # Configuration des quatre sources
-        sources = [
-            {
-                'name': 'Sorties',
-                'filter': 'crieur-des-sorties',
-                'output_html': 'annonces.html',
-                'output_map': 'carte_des_annonces.html',
-                'title': 'Annonces Crieur'
-            },
-            {
-                'name': 'Expression Libre',
-                'filter': 'crieur-libre-expression',
-                'output_html': 'expression_libre.html',
-                'output_map': 'carte_expression_libre.html',
-                'title': 'Expression Libre Crieur'
-            },
-            {
-                'name': 'Solidaire',
-                'filter': 'crieur-solidaire',
-                'output_html': 'solidaire.html',
-                'output_map': 'carte_solidaire.html',
-                'title': 'Annonces Solidaire Crieur'
-            },
-            {
-                'name': 'Annonces Commerciales',
-                'filter': 'crieur-annonces-commerciales',
-                'output_html': 'annonces_commerciales.html',
-                'output_map': 'carte_annonces_commerciales.html',
-                'title': 'Annonces Commerciales Crieur'
-            }
-        ]
+        sources = SOURCES
+        
+        # Récupère les emails une seule fois pour toutes les sources
+        subject_filters = [source['filter'] for source in sources]
+        since = date.today() - timedelta(days=SINCE_DAYS) if SINCE_DAYS > 0 else None
+        store = MessageStore() if MESSAGE_STORE or OFFLINE_MODE else None
+        
+        if MAILBOX_PATH:
+            emails = load_archive_emails(
+                MAILBOX_PATH, EMAIL_LIMIT, DOMAIN_FILTER,
+                subject_filters=subject_filters, since=since
+            )
+        elif OFFLINE_MODE:
+            emails = load_stored_emails(
+                store, MAIL_FOLDERS, EMAIL_LIMIT, DOMAIN_FILTER,
+                subject_filters=subject_filters, since=since
+            )
+        else:
+            emails = fetch_emails(
+                EMAIL, PASSWORD, IMAP_SERVER, IMAP_PORT,
+                MAIL_FOLDERS, EMAIL_LIMIT, DOMAIN_FILTER,
+                subject_filters=subject_filters, since=since,
+                incremental=INCREMENTAL_SYNC, store=store
+            )
+        ledger = ExtractionLedger(version=EXTRACTION_VERSION) if EXTRACTION_LEDGER else None
+        
+        # Extraction de toutes les sources en un seul passage
+        print("\n🔍 Extraction consolidée des événements...")
+        events_by_source = extract_events_by_source(emails, sources, ledger, workers=EXTRACTION_WORKERS or None)
+        
+        if ledger:
+            print(f"♻️  Registre des digests: {ledger.hits} réutilisé(s), {ledger.misses} extrait(s)")
+            ledger.save()
         
-        # Traite chaque source
+        # Génère les pages de chaque source
         results = []
         for source in sources:
             print(f"\n{'='*60}")
             print(f"📰 {source['name']}")
             print(f"{'='*60}")
             
-            success = process_annonces_source(
-                EMAIL, PASSWORD, IMAP_SERVER, IMAP_PORT,
-                MAIL_FOLDER, EMAIL_LIMIT, DOMAIN_FILTER,
-                source
-            )
+            # Les événements de la source ne sont plus référencés une fois sa page écrite
+            success = process_annonces_source(events_by_source.pop(source['filter']), source)
             results.append((source['name'], success))
         
         # Upload FTP
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mode veille - traite les digests du crieur dès leur arrivée
+La connexion IMAP reste ouverte (IDLE) : à chaque nouveau message, seuls les
+nouveaux UID sont téléchargés, et seules les sources concernées sont
+régénérées puis uploadées
+"""
+
+import os
+import sys
+import time
+import imaplib
+from datetime import date, timedelta
+from email_reader import EmailReader
+from imap_state import ImapSyncState
+from message_store import MessageStore
+from extraction_ledger import ExtractionLedger
+from main_v2 import SOURCES, EXTRACTION_VERSION, route_emails_by_source, extract_events_by_source, process_annonces_source, ftp_upload
+
+
+# Délai avant une nouvelle connexion après une coupure (secondes)
+RECONNECT_DELAY = 30
+
+
+class DigestWatcher:
+    """Surveille un dossier IMAP et met à jour les pages des sources concernées"""
+
+    def __init__(self, email_address: str, password: str, imap_server: str, imap_port: int,
+                 folder: str, limit: int, domain_filter: str = None, since_days: int = 0,
+                 idle_timeout: int = 29 * 60, store: MessageStore = None):
+        """
+        Args:
+            email_address: Adresse email
+            password: Mot de passe (conservé pour les reconnexions)
+            imap_server: Serveur IMAP
+            imap_port: Port IMAP
+            folder: Dossier surveillé
+            limit: Nombre d'emails affichés par les pages
+            domain_filter: Filtrer par domaine (ex: "gco.ouvaton.net")
+            since_days: Ne garder que les emails des N derniers jours (0 = tous)
+            idle_timeout: Durée d'un cycle IDLE en secondes
+            store: Magasin local où conserver les messages (optionnel)
+        """
+        self.email_address = email_address
+        self.password = password
+        self.imap_server = imap_server
+        self.imap_port = imap_port
+        self.folder = folder
+        self.limit = limit
+        self.domain_filter = domain_filter
+        self.since_days = since_days
+        self.idle_timeout = idle_timeout
+        self.store = store
+        self.sync_state = ImapSyncState()
+        self.ledger = ExtractionLedger(version=EXTRACTION_VERSION)
+        self.subject_filters = [source['filter'] for source in SOURCES]
+        # Plus grand UID déjà publié (0 = pages jamais générées par ce processus)
+        self.published_uid = 0
+
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.output_dir = os.path.join(base_dir, "output")
+
+    def run(self):
+        """
+        Surveille le dossier indéfiniment, en se reconnectant après une coupure
+
+        Une erreur IMAP (UIDVALIDITY modifiée pendant une reconnexion, IDLE
+        terminé par NO/BAD...) provoque une resynchronisation complète du
+        dossier plutôt que l'arrêt. Seul l'échec de la toute première connexion
+        (identifiants, serveur) est propagé.
+        """
+        connected = False
+        while True:
+            reader = None
+            try:
+                print(f"\n📧 Connexion à {self.email_address} sur {self.imap_server}...")
+                reader = EmailReader(self.email_address, self.password, self.imap_server, self.imap_port,
+                                     sync_state=self.sync_state, store=self.store)
+                connected = True
+                self._watch(reader)
+            except (imaplib.IMAP4.abort, OSError) as e:
+                print(f"⚠ Connexion perdue: {e}")
+            except imaplib.IMAP4.error as e:
+                if not connected:
+                    raise
+                print(f"⚠ Erreur IMAP: {e}")
+                self._reset_folder()
+            finally:
+                if reader is not None:
+                    reader.close()
+
+            print(f"🔄 Reconnexion dans {RECONNECT_DELAY}s...")
+            time.sleep(RECONNECT_DELAY)
+
+    def _reset_folder(self):
+        """Oublie l'état du dossier et les UID publiés : tout est relu et republié"""
+        print(f"🔄 Resynchronisation complète du dossier '{self.folder}'")
+        self.sync_state.reset_folder(self.folder)
+        self.sync_state.save()
+        self.published_uid = 0
+
+    def _watch(self, reader: EmailReader):
+        """Publie les nouveaux emails puis attend les suivants (IDLE)"""
+        while True:
+            self._publish_new_emails(reader)
+
+            print(f"👀 En attente de nouveaux messages dans '{self.folder}'...")
+            while not reader.idle(self.idle_timeout):
+                pass  # Délai expiré sans nouveau message : IDLE est relancé
+
+    def _publish_new_emails(self, reader: EmailReader):
+        """Récupère les nouveaux UID et régénère les sources qu'ils concernent"""
+        since = date.today() - timedelta(days=self.since_days) if self.since_days > 0 else None
+        emails = reader.get_emails(folder=self.folder, limit=self.limit, domain_filter=self.domain_filter,
+                                   subject_filters=self.subject_filters, since=since)
+
+        new_emails = [email_msg for email_msg in emails if email_msg.get('uid', 0) > self.published_uid]
+        if not new_emails:
+            return
+
+        # Seules les sources ayant reçu un nouveau digest sont régénérées
+        new_by_source = route_emails_by_source(new_emails, SOURCES)
+        sources = [source for source in SOURCES if new_by_source[source['filter']]]
+        events_by_source = extract_events_by_source(emails, sources, self.ledger)
+        self.ledger.save()
+
+        filenames = []
+        for source in sources:
+            print(f"\n{'='*60}")
+            print(f"📰 {source['name']}")
+            print(f"{'='*60}")
+
+            if process_annonces_source(events_by_source.pop(source['filter']), source):
+                filenames.extend([source['output_html'], source['output_map']])
+
+        if filenames:
+            print("📤 Upload FTP")
+            ftp_upload(self.output_dir, filenames)
+
+        self.published_uid = max(email_msg.get('uid', 0) for email_msg in new_emails)
+
+
+def main():
+    """Fonction principale"""
+
+    # Configuration
+    EMAIL = os.getenv("EMAIL_ADDRESS", "").strip()
+    PASSWORD = os.getenv("EMAIL_PASSWORD", "").strip()
+    IMAP_SERVER = os.getenv("IMAP_SERVER", "imap.free.fr")
+    IMAP_PORT = int(os.getenv("IMAP_PORT", "993"))
+    MAIL_FOLDERS = [folder.strip() for folder in os.getenv("MAIL_FOLDER", "CE").split(",") if folder.strip()] or ["CE"]
+    EMAIL_LIMIT = int(os.getenv("EMAIL_LIMIT", "50"))
+    DOMAIN_FILTER = os.getenv("DOMAIN_FILTER", "").strip() or None
+    SINCE_DAYS = int(os.getenv("SINCE_DAYS", "0") or "0")
+    MESSAGE_STORE = os.getenv("MESSAGE_STORE", "true").lower() == "true"
+    IDLE_TIMEOUT_MINUTES = int(os.getenv("IDLE_TIMEOUT_MINUTES", "29"))
+
+    if not EMAIL or not PASSWORD:
+        print("❌ EMAIL_ADDRESS et EMAIL_PASSWORD requis dans .env pour le mode veille")
+        sys.exit(1)
+
+    # Une connexion IDLE ne surveille qu'un dossier
+    if len(MAIL_FOLDERS) > 1:
+        print(f"⚠ Mode veille: seul le dossier '{MAIL_FOLDERS[0]}' est surveillé")
+
+    # Sans magasin, la fenêtre mémorisée ne peut pas être relue : chaque
+    # nouveau message fait retélécharger et réextraire tous les emails
+    if not MESSAGE_STORE:
+        print(f"⚠ Mode veille sans magasin local (MESSAGE_STORE=false): à chaque nouveau message, "
+              f"les {EMAIL_LIMIT} derniers emails seront retéléchargés. Activez MESSAGE_STORE=true")
+
+    watcher = DigestWatcher(
+        EMAIL, PASSWORD, IMAP_SERVER, IMAP_PORT,
+        MAIL_FOLDERS[0], EMAIL_LIMIT, DOMAIN_FILTER,
+        since_days=SINCE_DAYS,
+        idle_timeout=IDLE_TIMEOUT_MINUTES * 60,
+        store=MessageStore() if MESSAGE_STORE else None
+    )
+
+    try:
+        watcher.run()
+    except imaplib.IMAP4.error as e:
+        print(f"❌ Erreur IMAP: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt du mode veille")
+
+
+if __name__ == "__main__":
+    main()
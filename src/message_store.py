@@ -0,0 +1,203 @@
+"""
+Magasin local des messages bruts
+Conserve les messages téléchargés (adressés par leur contenu) pour pouvoir
+régénérer les pages hors ligne, sans connexion IMAP
+"""
+
+import email
+import hashlib
+import json
+import os
+import threading
+from datetime import date, datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Tuple
+
+from email_reader import MessageParser
+
+
+class MessageStore:
+    """
+    Stocke les messages bruts sur disque
+
+    Chaque message est écrit une seule fois dans un fichier nommé par le hash
+    SHA-256 de son contenu ; un index JSON associe chaque Message-ID au hash,
+    à la date de réception, au dossier et à l'UID d'origine.
+    """
+
+    def __init__(self, store_dir: str = None):
+        """
+        Initialise le magasin
+
+        Args:
+            store_dir: Répertoire du magasin (par défaut data/messages)
+        """
+        if store_dir is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            store_dir = os.path.join(base_dir, "data", "messages")
+
+        self.store_dir = store_dir
+        self.index_file = os.path.join(store_dir, "index.json")
+        self.index = self._load_index(self.index_file)
+        self._dirty = False
+        # Le magasin peut être partagé entre les sessions de plusieurs dossiers
+        self._lock = threading.Lock()
+
+    def _load_index(self, index_file: str) -> dict:
+        """Charge l'index Message-ID → métadonnées"""
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _message_path(self, digest: str) -> str:
+        """Chemin du fichier d'un message (réparti en sous-répertoires par préfixe)"""
+        return os.path.join(self.store_dir, digest[:2], f"{digest}.eml")
+
+    def put(self, raw_message: bytes, message_id: str = "", date_str: str = "",
+            folder: str = None, uid: int = None) -> str:
+        """
+        Ajoute un message au magasin (sans réécrire un contenu déjà présent)
+
+        Args:
+            raw_message: Message RFC822 tel que téléchargé
+            message_id: En-tête Message-ID (le hash sert de clé s'il est absent)
+            date_str: En-tête Date, pour trier les messages
+            folder: Dossier IMAP d'origine
+            uid: UID IMAP d'origine
+
+        Returns:
+            Hash SHA-256 du contenu
+        """
+        digest = hashlib.sha256(raw_message).hexdigest()
+        path = self._message_path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(raw_message)
+            os.replace(tmp_path, path)
+
+        try:
+            timestamp = parsedate_to_datetime(date_str).timestamp()
+        except (TypeError, ValueError, IndexError):
+            timestamp = 0
+
+        with self._lock:
+            self.index[message_id.strip() or digest] = {
+                "hash": digest,
+                "timestamp": timestamp,
+                "folder": folder,
+                "uid": uid
+            }
+            self._dirty = True
+        return digest
+
+    def has(self, message_id: str) -> bool:
+        """Indique si le message d'un Message-ID est présent dans le magasin"""
+        entry = self.index.get(message_id.strip())
+        return bool(entry) and os.path.exists(self._message_path(entry["hash"]))
+
+    def timestamp(self, message_id: str) -> float:
+        """Date de réception (timestamp) d'un message du magasin (0 si inconnue)"""
+        entry = self.index.get(message_id.strip())
+        return entry.get("timestamp", 0) if entry else 0
+
+    def get(self, message_id: str) -> bytes:
+        """Retourne le message brut associé à un Message-ID (ou None)"""
+        entry = self.index.get(message_id.strip())
+        if not entry:
+            return None
+        try:
+            with open(self._message_path(entry["hash"]), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def iter_messages(self, folder: str = None) -> Iterator[Tuple[str, Dict, bytes]]:
+        """
+        Parcourt les messages du magasin, les plus récents en premier
+
+        Yields:
+            Tuples (Message-ID, métadonnées, message brut)
+        """
+        entries = sorted(self.index.items(), key=lambda item: item[1].get("timestamp", 0), reverse=True)
+        for message_id, entry in entries:
+            if folder and entry.get("folder") not in (None, folder):
+                continue
+            raw_message = self.get(message_id)
+            if raw_message is not None:
+                yield message_id, entry, raw_message
+
+    def save(self):
+        """Sauvegarde l'index s'il a été modifié"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(self.store_dir, exist_ok=True)
+                tmp_file = self.index_file + ".tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.index, f, ensure_ascii=False)
+                os.replace(tmp_file, self.index_file)
+                self._dirty = False
+            except OSError as e:
+                print(f"⚠ Erreur lors de la sauvegarde de l'index des messages: {e}")
+
+
+class StoreReader(MessageParser):
+    """Lit les emails depuis le magasin local (mode hors ligne, sans IMAP)"""
+
+    def __init__(self, store: MessageStore):
+        """
+        Args:
+            store: Magasin des messages déjà téléchargés
+        """
+        self.store = store
+
+    def get_emails(self, folder: str = None, limit: int = 10, domain_filter: str = None,
+                   subject_filters: List[str] = None, since: date = None) -> List[Dict]:
+        """Récupère les emails du magasin dans une liste (voir iter_emails)"""
+        emails = list(self.iter_emails(folder, limit, domain_filter, subject_filters, since))
+        print(f"✓ {len(emails)} email(s) lu(s) depuis le magasin local")
+        return emails
+
+    def iter_emails(self, folder: str = None, limit: int = 10, domain_filter: str = None,
+                    subject_filters: List[str] = None, since: date = None) -> Iterator[Dict]:
+        """
+        Produit les emails du magasin un par un, avec le même contrat que EmailReader.iter_emails
+
+        Args:
+            folder: Dossier IMAP d'origine (tous si None)
+            limit: Nombre d'emails à récupérer
+            domain_filter: Filtrer par domaine (ex: "gco.ouvaton.net")
+            subject_filters: Garder les sujets contenant l'un de ces textes
+            since: Ne garder que les messages reçus à partir de cette date
+
+        Yields:
+            Emails avec métadonnées, les plus récents en premier
+        """
+        since_timestamp = datetime(since.year, since.month, since.day).timestamp() if since else None
+
+        count = 0
+        for _, entry, raw_message in self.store.iter_messages(folder):
+            if since_timestamp and entry.get("timestamp", 0) < since_timestamp:
+                break
+
+            msg = email.message_from_bytes(raw_message)
+            if not self._matches_filters(msg, domain_filter, subject_filters):
+                continue
+
+            email_dict = self._parse_email(msg)
+            email_dict["uid"] = entry.get("uid")
+            yield email_dict
+
+            count += 1
+            if count >= limit:
+                break
+
+    def close(self):
+        """Rien à fermer en mode hors ligne"""
+        pass
@@ -0,0 +1,165 @@
+"""
+Expressions régulières de l'extraction des annonces
+Toutes les expressions utilisées par EventExtractor et par les fonctions
+d'extraction de main_v2 sont compilées une seule fois, à l'import du module,
+au lieu de dépendre du cache limité du module re
+"""
+
+import re
+
+
+JOURS = r"(?:lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche)"
+MOIS = r"(?:janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)"
+
+
+# ==================== TEXTE ====================
+
+WHITESPACE_RE = re.compile(r'\s+')
+SPACES_RE = re.compile(r' +')
+LINE_BREAKS_RE = re.compile(r'[\r\n]+')
+BLANK_LINES_RE = re.compile(r'\n\s*\n')
+MULTIPLE_BLANK_LINES_RE = re.compile(r'\n\n\n+')
+DASH_LINE_RE = re.compile(r'^-+$')
+EQUALS_LINE_RE = re.compile(r'^=+$')
+SEPARATOR_LINE_RE = re.compile(r'^-{6,}$')
+POSTAL_CODE_RE = re.compile(r'\d{5}')
+STARTS_WITH_NUMBER_RE = re.compile(r'^\d+\s+')
+
+
+# ==================== CONTACTS ET LIENS ====================
+
+PHONE_RE = re.compile(r'0[1-9](?:[\s\.\-]?\d{2}){4}')
+PHONE_SEPARATORS_RE = re.compile(r'[\s\.\-]')
+WHATSAPP_LINK_RE = re.compile(r'https://chat\.whatsapp\.com/[^\s\n<>]+')
+CONTACT_EMAIL_RE = re.compile(r'\b([a-zA-Z0-9._%+-]+\s*@\s*[a-zA-Z0-9.\s-]+\.[a-zA-Z]{2,4})')
+HTTP_LINK_RE = re.compile(r'https?://[^\s\n<>"]+')
+# Le TLD est limité à 2-4 caractères, sans capturer le texte qui suit l'adresse
+ORGANIZER_EMAIL_RE = re.compile(r'\b([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,4})(?![a-zA-Z0-9-])')
+URL_RE = re.compile(r'https?://[^\s\n<>"\\)=]+')
+ATTACHMENT_LINK_RE = re.compile(r'https://gco\.ouvaton\.org/wp-content/[^\s\n<>]*')
+
+
+# ==================== SOMMAIRE DES DIGESTS ====================
+
+SOMMAIRE_RE = re.compile(r'Sommaire\s*:\s*\n(.*?)(?:\n\s*\n\s*-{10,}|\nMessage-ID:)', re.DOTALL)
+SOMMAIRE_ENTRY_RE = re.compile(r'^\*\s+(\d+)')
+SOMMAIRE_ENTRY_PREFIX_RE = re.compile(r'^\*\s+\d+\s*-?\s*')
+# Entrée du sommaire telle qu'elle apparaît dans le corps ("* 1 - [crieur-des-sorties]...")
+DIGEST_ENTRY_RE = re.compile(r'\*\s*(\d+)\s*-\s*\[')
+DIGEST_ENTRY_START_RE = re.compile(r'\*\s*\d+\s*-')
+BRACKETS_RE = re.compile(r'\[([^\]]+)\]')
+LEADING_BRACKETS_RE = re.compile(r'^\s*(\[([^\]]+)\]\s*)+')
+LEADING_DASH_RE = re.compile(r'^\s*-\s*')
+ANGLE_EMAIL_RE = re.compile(r'<([^>]+)>')
+# Titre : après "[lieu] -", jusqu'à une date complète (jour + numéro + mois)
+DIGEST_TITLE_RE = re.compile(
+    r'\]\s*-\s*(.+?)(?:\s' + JOURS + r'\s+\d{1,2}\s+' + MOIS + r')',
+    re.IGNORECASE | re.DOTALL
+)
+# Adresse après la date et l'heure : "samedi 13 décembre 2025 à 19:05 - 12 rue..."
+DIGEST_ADDRESS_RE = re.compile(
+    r'(?:dimanche|lundi|mardi|mercredi|jeudi|vendredi|samedi).*?à\s+\d{1,2}:\d{2}\s*-\s*([^<\r\n]+)',
+    re.IGNORECASE
+)
+DIGEST_STREET_RE = re.compile(
+    r'^\d+\s+(?:rue|avenue|boulevard|chemin|place|square|allée|quai|cour|voie)',
+    re.IGNORECASE
+)
+
+
+# ==================== MESSAGES DES DIGESTS ====================
+
+QUAND_RE = re.compile(r'Quand\s*:\s*(.*?)(?=Où\s*:)', re.DOTALL)
+LIEU_RE = re.compile(r'Où\s*:\s*(.*?)(?=Descriptif)', re.DOTALL)
+DESCRIPTIF_RE = re.compile(
+    r'Descriptif\s*\n\s*-+\s*\n+(.*?)(?:-->\s*Visitez|-->\s*Une pièce jointe|📅\s*Cet événement|^-{10,})',
+    re.DOTALL | re.MULTILINE
+)
+LIEN_RE = re.compile(r'-->\s*Visitez le site internet de l\'événement\s*:\s*(\S+)', re.DOTALL)
+AGENDA_RE = re.compile(
+    r'📅\s*Cet événement a été ajouté à l\'agenda des sorties des crieurs\s*:\s*(\S+)',
+    re.DOTALL
+)
+PIECES_JOINTES_RE = re.compile(
+    r'-->\s*Une pièce jointe est disponible\s*:\s*(.*?)(?:^-{10,}|Contactez|Ne répondez)',
+    re.DOTALL | re.MULTILINE
+)
+
+
+# ==================== EXPRESSION LIBRE ====================
+
+LIBRE_TEXT_RE = re.compile(r'Subject:.*?\n(.*?)\n\-{10,}', re.DOTALL | re.IGNORECASE)
+HTML_MARKER_RE = re.compile(r'\[\s*Texte initialement au format HTML\s*\]', re.IGNORECASE)
+BRACKETS_ONLY_LINE_RE = re.compile(r'^\s*(\[.*?\]\s*-?\s*)+\s*$')
+DASHES_ONLY_LINE_RE = re.compile(r'^\s*\-+\s*$')
+
+
+# ==================== DATES ====================
+
+# Les motifs avec une année à 4 chiffres d'abord, car plus spécifiques
+# Format Zimbra: "Quand : du samedi 13 décembre 2025 à 19:05"
+DATE_PATTERNS = [re.compile(pattern, re.IGNORECASE | re.UNICODE) for pattern in (
+    r"(?:dimanche|lundi|mardi|mercredi|jeudi|vendredi|samedi)\s+(\d{1,2}\s+\w+\s+\d{4})(?:\s|$)",
+    r"Quand\s*(?::|=)\s*du\s+(?:\w+\s+)?(\d{1,2}\s+" + MOIS + r"\s+\d{4})",
+    r"(?:Quand|QUAND|quand)\s*(?::|=)\s*du\s+(?:\w+\s+)?(\d{1,2}\s+[a-zàâäéèêëïîôöùûüœæç]+\s+\d{4})",
+    # Années de 2 à 4 chiffres (moins spécifiques, pour compatibilité)
+    r"(?:date|Date|DATE|le|le\s):\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
+    r"(\d{1,2}\s+" + MOIS + r"\s+\d{4})(?:\s|$)",
+    r"(\d{1,2}\s+" + MOIS + r"\s+\d{2})(?:\s|$)",
+    r"(?:samedi|dimanche|lundi|mardi|mercredi|jeudi|vendredi)[,]?\s+(\d{1,2}\s+\w+\s+\d{2,4})",
+)]
+
+
+# Date française complète ou partielle, avec plage de jours et heure optionnelles :
+# "13 décembre 2025", "1er au 3 mars 2026", "décembre 2025", "13 décembre 2025 à 19:05"
+FRENCH_DATE_RE = re.compile(
+    r'(?:(\d{1,2})(?:er)?\s+(?:au\s+(\d{1,2})(?:er)?\s+)?)?(' + MOIS + r')\s+(\d{4})'
+    r'(?:\s+à\s+(\d{1,2})[:h](\d{2}))?',
+    re.IGNORECASE
+)
+
+
+# ==================== LIEUX ====================
+
+# Motifs stricts : "Où :", "Adresse :", "Lieu :"
+LOCATION_STRICT_PATTERNS = [re.compile(pattern, re.IGNORECASE | re.UNICODE) for pattern in (
+    r"Où\s*(?::|=)\s*([^\n=]+?)(?:\n|$|=)",
+    r"(?:adresse|Adresse|ADRESSE):\s*([^\n]+?)(?:\n|-{2,}|$)",
+    r"(?:lieu|Lieu|LIEU|location):\s*([^\n]+?)(?:\n|-{2,}|$)",
+)]
+
+# Motifs génériques : "à:", "au/aux" (moins fiables)
+LOCATION_GENERIC_PATTERNS = [re.compile(pattern, re.IGNORECASE | re.UNICODE) for pattern in (
+    r"(?:à|À):\s*([^\n]+?)(?:\n|,|-{2,}|$)",
+    # "au/aux" seulement suivi d'une majuscule et d'un mot non trivial
+    r"(?:Aux|au|Au|Au)\s+(?!hommes|femmes|enfants|personnes|gens)([A-Z][^\n-]*?)(?:\s+-\s+" + JOURS
+    + r"|(?:\d{1,2}\s+(?:janv|févr|mars|avril|mai|juin|juil|août|sept|oct|nov|déc))|$|\n)",
+)]
+
+# Partie qui suit " - " dans un lieu et qui est en fait une date
+LOCATION_DATE_PART_RE = re.compile(r'^(lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche|\d{1,2})', re.IGNORECASE)
+LOCATION_STREET_RE = re.compile(r'^\d+\s+(?:rue|avenue|boulevard|chemin|place|square|allée)', re.IGNORECASE)
+
+# Mots à ignorer comme lieux (jours, mois, mots génériques)
+REJECTED_LOCATIONS = frozenset([
+    "dimanche", "lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi",
+    "janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août",
+    "septembre", "octobre", "novembre", "décembre", "format", "non spécifié",
+    "voir ci-après", "voir ci dessous"
+])
+
+
+# ==================== DESCRIPTIFS ====================
+
+DESCRIPTION_HEADER_RE = re.compile(r'Descriptif|Description', re.IGNORECASE)
+DESCRIPTION_HEADER_START_RE = re.compile(r'^Descriptif|^Description', re.IGNORECASE)
+MESSAGE_ID_START_RE = re.compile(r'Message-ID:')
+AGENDA_NOTICE_RE = re.compile(r'\s*📅[^:]*:\s*https://gco\.ouvaton\.org/[^/\s]+/[^/\s]+/\s*')
+AGENDA_SENTENCE_RE = re.compile(
+    r'\s*Cet événement a été ajouté à l\'agenda[^:]*:\s*https://gco\.ouvaton\.org/[^/\s]+/[^/\s]+/\s*',
+    re.IGNORECASE
+)
+AGENDA_SENTENCE_SHORT_RE = re.compile(r'\s*Cet événement a été ajouté[^.]*\.\s*', re.IGNORECASE)
+ARROW_RE = re.compile(r'\s*-->\s*')
+# En-têtes MIME cités dans le texte (=?UTF-8?Q?...?=)
+QUOTED_MIME_HEADER_RE = re.compile(r'=\?UTF-8\?Q\?(.+?)\?=')
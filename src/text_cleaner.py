@@ -0,0 +1,52 @@
+"""
+Tables de nettoyage du texte des annonces
+Le filtrage par catégorie Unicode se fait avec str.translate : chaque
+caractère n'est classé qu'une seule fois, puis le nettoyage d'un texte est
+un seul passage en C au lieu d'un appel à unicodedata par caractère
+"""
+
+import unicodedata
+
+
+class CategoryFilter(dict):
+    """
+    Table de traduction qui supprime les caractères refusés par `keep`
+
+    Les points de code sont classés à leur première rencontre puis mémorisés :
+    la table ne contient que les caractères réellement vus.
+    """
+
+    def __init__(self, keep):
+        """
+        Args:
+            keep: Fonction (caractère -> bool) indiquant si le caractère est conservé
+        """
+        super().__init__()
+        self.keep = keep
+
+    def __missing__(self, codepoint: int):
+        value = codepoint if self.keep(chr(codepoint)) else None
+        self[codepoint] = value
+        return value
+
+
+def _keep_for_clean_text(char: str) -> bool:
+    """Lettres, chiffres, ponctuation, espaces, ASCII imprimable et retours à la ligne"""
+    if unicodedata.category(char)[0] in ('L', 'N', 'P', 'Z'):
+        return True
+    if ord(char) < 128 and char.isprintable():
+        return True
+    return char == '\n'
+
+
+def _keep_for_display(char: str) -> bool:
+    """Tout sauf les symboles "So" (émoticônes) et les caractères de contrôle"""
+    category = unicodedata.category(char)
+    return category != 'So' and category[0] != 'C'
+
+
+# Table de main_v2.clean_text
+CLEAN_TEXT_TABLE = CategoryFilter(_keep_for_clean_text)
+
+# Table de EventExtractor._clean_text (garde ©, ®, °...)
+DISPLAY_TEXT_TABLE = CategoryFilter(_keep_for_display)
@@ -0,0 +1,43 @@
+"""
+Configuration des tests : les modules de src/ s'importent comme dans les scripts
+(`from email_reader import ...`)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from email_reader import EmailReader  # noqa: E402
+
+
+class OfflineReader(EmailReader):
+    """
+    EmailReader sans connexion au serveur (ni thread de maintien) : les tests
+    fournissent une connexion simulée ou remplacent les commandes IMAP
+    """
+
+    def __init__(self, connection=None, sync_state=None, store=None):
+        self.email_address = "test@example.org"
+        self.imap_server = "imap.example.org"
+        self.imap_port = 993
+        self.sync_state = sync_state
+        self.store = store
+        self.compress = False
+        self.connection = connection
+        self._password = "secret"
+        self._folder = None
+        self._uidvalidity = None
+        self._last_activity = time.monotonic()
+        self._lock = threading.RLock()
+        self._stop_keepalive = threading.Event()
+
+
+@pytest.fixture
+def reader():
+    """Lecteur sans connexion, pour les méthodes d'analyse"""
+    return OfflineReader()
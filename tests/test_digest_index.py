@@ -0,0 +1,50 @@
+"""Tests de l'index d'un digest (sommaire et sections Message-ID)"""
+
+from digest_index import DigestIndex
+
+
+def make_digest(message_ids: bool = True) -> str:
+    sections = []
+    for numero, title in ((1, "Concert au parc"), (2, "Bal folk")):
+        sections.append(
+            ("------------------------------\n" if numero > 1 else "")
+            + (f"Message-ID: <{numero}@gco.ouvaton.org>\n" if message_ids or numero > 1 else "")
+            + f"Subject: [crieur-des-sorties] {title}\n"
+            + "\n"
+            + f"{title}\n"
+            + "===============\n"
+            + "Descriptif :\n"
+            + "-------------\n"
+            + "\n"
+            + f"Texte de {title}\n"
+        )
+    return (
+        "Sommaire :\n"
+        "\n"
+        "  1. Concert au parc - [Grenoble]\n"
+        "  2. Bal folk - [Meylan]\n"
+        "\n"
+        "------------------------------\n"
+        + "".join(sections)
+    )
+
+
+def test_lookup_in_section():
+    index = DigestIndex(make_digest())
+
+    assert index.find_event_context("Bal folk", 2).startswith("Subject: [crieur-des-sorties] Bal folk")
+    starts = index.find_description_starts("Bal folk", 2)
+    assert starts and "Texte de Bal folk" in index.lines[starts[0]:starts[0] + 2]
+
+
+def test_lookup_falls_back_to_body_when_sections_are_shifted():
+    # Message-ID manquant pour le premier message : la section n° 2 n'existe pas
+    # et la section n° 1 est celle du "Bal folk"
+    index = DigestIndex(make_digest(message_ids=False))
+    assert len(index.sections) == 1
+
+    assert index.find_event_context("Concert au parc", 1).startswith("Subject: [crieur-des-sorties] Concert")
+    starts = index.find_description_starts("Concert au parc", 1)
+    assert starts and "Texte de Concert au parc" in index.lines[starts[0]:starts[0] + 2]
+    assert index.find_event_context("Inconnu", 1) == ""
+    assert index.find_description_starts("Inconnu", 1) == []
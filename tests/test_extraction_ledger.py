@@ -0,0 +1,18 @@
+"""Tests de l'empreinte du code d'extraction (version du registre)"""
+
+import re
+
+import email_reader
+from extraction_ledger import extraction_fingerprint
+
+
+def test_fingerprint_covers_regex_and_backend():
+    base = extraction_fingerprint(email_reader.html_to_text, email_reader.HTML_TAG_RE, "beautifulsoup4 4.12.2")
+
+    assert base == extraction_fingerprint(email_reader.html_to_text, email_reader.HTML_TAG_RE,
+                                          "beautifulsoup4 4.12.2")
+    assert base != extraction_fingerprint(email_reader.html_to_text, email_reader.HTML_TAG_RE, "lxml 5.3.0")
+    assert base != extraction_fingerprint(email_reader.html_to_text, re.compile(r"<p>"), "beautifulsoup4 4.12.2")
+    assert base != extraction_fingerprint(email_reader.html_to_text,
+                                          re.compile(email_reader.HTML_TAG_RE.pattern), "beautifulsoup4 4.12.2")
+
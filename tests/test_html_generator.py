@@ -0,0 +1,91 @@
+"""Tests de la génération des pages HTML (minification au fil de l'écriture)"""
+
+import io
+from datetime import datetime
+
+import htmlmin
+import pytest
+
+import email_reader
+from email_reader import HTMLGenerator, MinifiedHTMLWriter
+
+
+def make_event(index: int, received: datetime, **fields) -> dict:
+    event = {
+        "subject": f"Concert n°{index} &amp; bal <em>folk</em>",
+        "date": "samedi 13 décembre 2025 à 20h30",
+        "location": "Salle des fêtes, 38000 Grenoble",
+        "commune": "Grenoble",
+        "description": f"Première ligne   avec  espaces\nDeuxième ligne {index}",
+        "links": [f"https://example.org/{index}"],
+        "telephone": "06 12 34 56 78",
+        "email_date": received.strftime("%d/%m/%Y à %H:%M"),
+        "email_datetime": received,
+        "start": datetime(2025, 12, 13, 20, 30),
+        "end": None,
+    }
+    event.update(fields)
+    return event
+
+
+EVENTS = [
+    make_event(1, datetime(2025, 12, 1, 9, 15)),
+    make_event(2, datetime(2025, 12, 1, 9, 15), links=[], telephone=None),
+    make_event(3, datetime(2025, 12, 8, 18, 0), whatsapp="06 98 76 54 32", mailcontact="contact@example.org"),
+    make_event(4, datetime(2025, 12, 8, 18, 0), is_libre_expression=True, organizer_email="auteur@example.org"),
+]
+
+
+class RecordingWriter(MinifiedHTMLWriter):
+    """Conserve les fragments écrits pour reconstituer la page non minifiée"""
+
+    pages = []
+
+    def __init__(self, file):
+        super().__init__(file)
+        self.fragments = []
+        RecordingWriter.pages.append(self.fragments)
+
+    def write(self, html: str):
+        self.fragments.append(html)
+        super().write(html)
+
+
+@pytest.fixture
+def recording_writer(monkeypatch):
+    RecordingWriter.pages = []
+    monkeypatch.setattr(email_reader, "MinifiedHTMLWriter", RecordingWriter)
+    return RecordingWriter
+
+
+@pytest.mark.parametrize("source_type, events", [
+    ("Sorties", EVENTS),
+    ("Expression Libre", EVENTS[3:]),
+    ("Sorties", []),
+], ids=["sorties", "expression-libre", "vide"])
+def test_generate_matches_htmlmin(tmp_path, recording_writer, source_type, events):
+    generator = HTMLGenerator()
+    generator.source_type = source_type
+    generator.add_events(events)
+    output_file = tmp_path / "annonces.html"
+
+    generator.generate(str(output_file))
+
+    page, = recording_writer.pages
+    assert len(page) > 1
+    assert output_file.read_text(encoding="utf-8") == htmlmin.minify("".join(page), remove_empty_space=True)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096])
+def test_writer_chunks_match_htmlmin(chunk_size):
+    page = ('<!DOCTYPE html>\n<html>\n<head>\n  <title>Annonces</title>\n</head>\n<body>\n'
+            '    <div class="events-grid">\n        <p>Entrée   libre <b>20h</b> - 1 &lt; 2</p>\n'
+            '        <pre>  garder   les   espaces  </pre>\n    </div>\n</body>\n</html>\n')
+    output = io.StringIO()
+    writer = MinifiedHTMLWriter(output)
+
+    for start in range(0, len(page), chunk_size):
+        writer.write(page[start:start + chunk_size])
+    writer.close()
+
+    assert output.getvalue() == htmlmin.minify(page, remove_empty_space=True)
@@ -0,0 +1,136 @@
+"""Tests de l'attente IDLE (RFC 2177) sur une connexion simulée"""
+
+import imaplib
+import threading
+
+import pytest
+
+from conftest import OfflineReader
+from email_reader import CompressedIMAP4_SSL
+
+
+class FakeConnection(CompressedIMAP4_SSL):
+    """Connexion sans socket : readline renvoie les réponses prévues, send les mémorise"""
+
+    def __init__(self, lines):
+        # Attributs d'imaplib utilisés par _new_tag
+        self._encoding = "ascii"
+        self.tagpre = b"TEST"
+        self.tagnum = 0
+        self.tagged_commands = {}
+        self.capabilities = ("IMAP4REV1", "IDLE")
+        self.lines = list(lines)
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def readline(self):
+        line = self.lines.pop(0)
+        if isinstance(line, Exception):
+            raise line
+        return line
+
+    def socket(self):
+        return None
+
+    def has_buffered_data(self):
+        return bool(self.lines)
+
+
+def test_idle_returns_true_on_exists():
+    connection = FakeConnection([b"+ idling\r\n", b"* 12 EXISTS\r\n", b"TEST0 OK IDLE terminated\r\n"])
+
+    assert OfflineReader(connection).idle(timeout=1) is True
+    assert connection.sent == [b"TEST0 IDLE\r\n", b"DONE\r\n"]
+    assert connection.tagged_commands == {}
+
+
+def test_idle_collects_responses_received_after_done():
+    connection = FakeConnection([b"+ idling\r\n", b"* 3 EXPUNGE\r\n",
+                                 b"* 11 EXISTS\r\n", b"TEST0 OK IDLE terminated\r\n"])
+    reader = OfflineReader(connection)
+    # Réponse non pertinente, puis plus rien avant le délai : DONE
+    waits = iter([True, False])
+    reader._wait_for_data = lambda sock, timeout: next(waits)
+
+    assert reader.idle(timeout=1) is True
+    assert connection.sent == [b"TEST0 IDLE\r\n", b"DONE\r\n"]
+
+
+@pytest.mark.parametrize("status", [b"NO", b"BAD"])
+def test_idle_raises_on_tagged_error(status):
+    connection = FakeConnection([b"+ idling\r\n", b"* 12 EXISTS\r\n", b"TEST0 " + status + b" IDLE failed\r\n"])
+
+    with pytest.raises(imaplib.IMAP4.error, match="IDLE terminé en erreur"):
+        OfflineReader(connection).idle(timeout=1)
+    assert connection.tagged_commands == {}
+
+
+def test_idle_refused():
+    connection = FakeConnection([b"TEST0 BAD unknown command\r\n"])
+
+    with pytest.raises(imaplib.IMAP4.error, match="IDLE refusé"):
+        OfflineReader(connection).idle(timeout=1)
+    assert connection.sent == [b"TEST0 IDLE\r\n"]
+    assert connection.tagged_commands == {}
+
+
+def test_idle_socket_error_is_not_masked_by_done():
+    connection = FakeConnection([b"+ idling\r\n", ConnectionResetError("reset")])
+
+    with pytest.raises(ConnectionResetError):
+        OfflineReader(connection).idle(timeout=1)
+    assert connection.sent == [b"TEST0 IDLE\r\n"]
+
+
+def test_idle_bye_aborts_without_done():
+    connection = FakeConnection([b"+ idling\r\n", b"* BYE server shutting down\r\n"])
+
+    with pytest.raises(imaplib.IMAP4.abort, match="BYE"):
+        OfflineReader(connection).idle(timeout=1)
+    assert connection.sent == [b"TEST0 IDLE\r\n"]
+
+
+def test_finish_idle_connection_closed():
+    connection = FakeConnection([b""])
+
+    with pytest.raises(imaplib.IMAP4.abort, match="Connexion fermée"):
+        connection.finish_idle(b"TEST0")
+
+
+class NoopConnection:
+    def __init__(self):
+        self.noops = 0
+
+    def noop(self):
+        self.noops += 1
+        return "OK", [b"NOOP completed"]
+
+
+def test_keepalive_sends_noop_after_inactivity():
+    connection = NoopConnection()
+    reader = OfflineReader(connection)
+
+    reader._keepalive()
+    assert connection.noops == 0
+
+    reader._last_activity -= reader.KEEPALIVE_INTERVAL + 1
+    reader._keepalive()
+    assert connection.noops == 1
+    reader._keepalive()
+    assert connection.noops == 1
+
+
+def test_keepalive_waits_for_running_command():
+    connection = NoopConnection()
+    reader = OfflineReader(connection)
+    reader._last_activity -= reader.KEEPALIVE_INTERVAL + 1
+
+    with reader._lock:
+        thread = threading.Thread(target=reader._keepalive)
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive() and connection.noops == 0
+    thread.join()
+    assert connection.noops == 1
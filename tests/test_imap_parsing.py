@@ -0,0 +1,243 @@
+"""Tests de l'analyse des réponses IMAP (BODYSTRUCTURE, FETCH par lots)"""
+
+import pytest
+
+from conftest import OfflineReader
+
+
+# Structures telles que renvoyées par les serveurs (Dovecot, Gmail)
+TEXT_PLAIN = (
+    '("TEXT" "PLAIN" ("CHARSET" "ISO-8859-1") NIL NIL "QUOTED-PRINTABLE" 1532 40 NIL NIL NIL NIL)'
+)
+
+ALTERNATIVE = (
+    '(("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "QUOTED-PRINTABLE" 2210 58 NIL NIL NIL NIL)'
+    '("TEXT" "HTML" ("CHARSET" "UTF-8") NIL NIL "BASE64" 9350 121 NIL NIL NIL NIL)'
+    ' "ALTERNATIVE" ("BOUNDARY" "000000000000a1b2c3d4e5") NIL NIL NIL)'
+)
+
+MIXED_WITH_ATTACHMENT = (
+    '((("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "8BIT" 812 25 NIL NIL NIL NIL)'
+    '("TEXT" "HTML" ("CHARSET" "windows-1252") NIL NIL "QUOTED-PRINTABLE" 3004 60 NIL NIL NIL NIL)'
+    ' "ALTERNATIVE" ("BOUNDARY" "----=_Part_alt") NIL NIL NIL)'
+    '("APPLICATION" "PDF" ("NAME" "programme.pdf") NIL NIL "BASE64" 183422 NIL'
+    ' ("ATTACHMENT" ("FILENAME" "programme.pdf")) NIL NIL)'
+    ' "MIXED" ("BOUNDARY" "----=_Part_mixed") NIL NIL NIL)'
+)
+
+# Corps texte et pièce jointe HTML : la pièce jointe ne doit pas être retenue
+HTML_ATTACHMENT = (
+    '(("TEXT" "PLAIN" ("CHARSET" "windows-1252") NIL NIL "QUOTED-PRINTABLE" 500 12 NIL ("INLINE" NIL) NIL NIL)'
+    '("TEXT" "HTML" ("CHARSET" "utf-8" "NAME" "agenda.html") NIL NIL "BASE64" 4000 52 NIL'
+    ' ("ATTACHMENT" ("FILENAME" "agenda.html")) NIL NIL)'
+    ' "MIXED" ("BOUNDARY" "b1") NIL NIL NIL)'
+)
+
+QUOTED_PARENTHESES = (
+    '(("TEXT" "HTML" ("CHARSET" "UTF-8") NIL "Sorties (semaine 12) \\"ciné\\"" "QUOTED-PRINTABLE" 1200 30'
+    ' NIL NIL NIL NIL)'
+    '("IMAGE" "JPEG" ("NAME" "affiche (1).jpg") NIL NIL "BASE64" 52000 NIL'
+    ' ("ATTACHMENT" ("FILENAME" "affiche (1).jpg")) NIL NIL)'
+    ' "MIXED" ("BOUNDARY" "=_b(2)") NIL NIL NIL)'
+)
+
+FORWARDED = (
+    '(("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 120 4 NIL NIL NIL NIL)'
+    '("MESSAGE" "RFC822" NIL NIL NIL "7BIT" 2400'
+    ' ("Mon, 1 Dec 2025 10:00:00 +0100" "Programme" (("GCO" NIL "liste" "gco.ouvaton.org"))'
+    ' NIL NIL NIL NIL NIL NIL "<1@gco.ouvaton.org>")'
+    ' ("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 100 3 NIL NIL NIL NIL) 40 NIL NIL NIL NIL)'
+    ' "MIXED" ("BOUNDARY" "fwd") NIL NIL NIL)'
+)
+
+
+def fetch_text(structure: str) -> str:
+    """Partie texte d'une réponse FETCH de la phase 1 (hors littéral d'en-têtes)"""
+    return f"12 (UID 42 BODYSTRUCTURE {structure} BODY[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)] )"
+
+
+def charset(part: list) -> str:
+    params = part[2] or []
+    return dict(zip(params[::2], params[1::2]))["CHARSET"]
+
+
+def test_parse_single_part(reader):
+    structure = reader._parse_bodystructure(fetch_text(TEXT_PLAIN))
+
+    assert structure == ["TEXT", "PLAIN", ["CHARSET", "ISO-8859-1"], None, None,
+                         "QUOTED-PRINTABLE", "1532", "40", None, None, None, None]
+
+
+def test_parse_quoted_strings_with_parentheses(reader):
+    structure = reader._parse_bodystructure(fetch_text(QUOTED_PARENTHESES))
+
+    html, image = structure[0], structure[1]
+    assert html[4] == 'Sorties (semaine 12) "ciné"'
+    assert image[2] == ["NAME", "affiche (1).jpg"]
+    assert image[8] == ["ATTACHMENT", ["FILENAME", "affiche (1).jpg"]]
+    assert structure[2:4] == ["MIXED", ["BOUNDARY", "=_b(2)"]]
+
+
+def test_parse_without_bodystructure(reader):
+    assert reader._parse_bodystructure("12 (UID 42 RFC822.SIZE 1532)") is None
+    assert reader._parse_bodystructure('12 (UID 42 BODYSTRUCTURE ("TEXT" "PLAIN"') is None
+
+
+@pytest.mark.parametrize("structure, sections", [
+    (TEXT_PLAIN, ["1"]),
+    (ALTERNATIVE, ["1", "2"]),
+    (MIXED_WITH_ATTACHMENT, ["1.1", "1.2", "2"]),
+    (QUOTED_PARENTHESES, ["1", "2"]),
+    (FORWARDED, ["1", "2", "2.1"]),
+], ids=["text", "alternative", "mixed", "parentheses", "forwarded"])
+def test_walk_sections(reader, structure, sections):
+    parsed = reader._parse_bodystructure(fetch_text(structure))
+
+    assert [section for section, _ in reader._walk_bodystructure(parsed, "")] == sections
+
+
+@pytest.mark.parametrize("structure, section, content_type, expected_charset, encoding", [
+    (TEXT_PLAIN, "1", "TEXT/PLAIN", "ISO-8859-1", "QUOTED-PRINTABLE"),
+    (ALTERNATIVE, "2", "TEXT/HTML", "UTF-8", "BASE64"),
+    (MIXED_WITH_ATTACHMENT, "1.2", "TEXT/HTML", "windows-1252", "QUOTED-PRINTABLE"),
+    (HTML_ATTACHMENT, "1", "TEXT/PLAIN", "windows-1252", "QUOTED-PRINTABLE"),
+    (QUOTED_PARENTHESES, "1", "TEXT/HTML", "UTF-8", "QUOTED-PRINTABLE"),
+    (FORWARDED, "2.1", "TEXT/PLAIN", "UTF-8", "7BIT"),
+], ids=["text", "alternative", "mixed", "html-attachment", "parentheses", "forwarded"])
+def test_find_text_part(reader, structure, section, content_type, expected_charset, encoding):
+    found_section, part = reader._find_text_part({"text": fetch_text(structure)})
+
+    assert found_section == section
+    assert f"{part[0]}/{part[1]}" == content_type
+    assert charset(part) == expected_charset
+    assert part[5] == encoding
+
+
+def test_find_text_part_without_text(reader):
+    structure = ('(("IMAGE" "PNG" ("NAME" "plan.png") NIL NIL "BASE64" 2048 NIL ("ATTACHMENT" NIL) NIL NIL)'
+                 ' "MIXED" ("BOUNDARY" "x") NIL NIL NIL)')
+
+    assert reader._find_text_part({"text": fetch_text(structure)}) is None
+    assert reader._find_text_part({"text": "12 (UID 42)"}) is None
+
+
+# Réponses d'un UID FETCH par lots telles que les renvoie imaplib : un tuple
+# (préfixe, littéral) par littéral, puis la fin de la ligne en bytes
+HEADER_ITEM = "BODY[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)]"
+
+
+def header(uid: int) -> bytes:
+    return f"Subject: [crieur-des-sorties] Compilation {uid}\r\n\r\n".encode()
+
+
+def header_response(sequence: int, uid: int) -> list:
+    return [(f"{sequence} (UID {uid} BODYSTRUCTURE {TEXT_PLAIN} {HEADER_ITEM} {{{len(header(uid))}}}".encode(),
+             header(uid)), b")"]
+
+
+class BatchReader(OfflineReader):
+    """Renvoie une réponse FETCH prédéfinie pour chaque commande"""
+
+    def __init__(self, data: list):
+        super().__init__()
+        self.data = data
+
+    def _run_command(self, name, *args):
+        return "OK", self.data
+
+
+def test_parse_batch(reader):
+    data = header_response(1, 5) + header_response(2, 7)
+
+    responses = list(reader._parse_fetch_response(data))
+
+    assert [fetched["uid"] for fetched in responses] == [5, 7]
+    assert responses[1]["items"] == {HEADER_ITEM: header(7)}
+    assert reader._find_text_part(responses[0])[0] == "1"
+
+
+def test_parse_uid_after_literal(reader):
+    # L'UID peut suivre les littéraux, et les lignes de plusieurs messages s'enchaînent
+    data = [(b"3 (BODY[1] {5}", b"Hello"), b" UID 12)",
+            (b"4 (BODY[1] {6}", b"Salut!"), b" FLAGS (\\Seen) UID 15)"]
+
+    responses = list(reader._parse_fetch_response(data))
+
+    assert [(fetched["uid"], fetched["items"]) for fetched in responses] == [
+        (12, {"BODY[1]": b"Hello"}), (15, {"BODY[1]": b"Salut!"})]
+
+
+def test_parse_literal_inside_bodystructure(reader):
+    # Nom de fichier envoyé en littéral au milieu de BODYSTRUCTURE
+    data = [(b'1 (UID 9 BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 10 1 NIL NIL NIL NIL)'
+             b'("APPLICATION" "PDF" ("NAME" {14}', b'agenda (1).pdf'),
+            b') NIL NIL "BASE64" 2048 NIL ("ATTACHMENT" NIL) NIL NIL) "MIXED" ("BOUNDARY" "x") NIL NIL NIL))']
+
+    fetched, = reader._parse_fetch_response(data)
+
+    assert fetched["uid"] == 9
+    assert fetched["items"] == {}
+    structure = reader._parse_bodystructure(fetched["text"])
+    assert structure[1][2] == ["NAME", "agenda (1).pdf"]
+
+
+def test_parse_missing_uid(reader):
+    data = header_response(1, 5) + [(b"2 (BODY[HEADER] {4}", b"X\r\n\r"), b")"] + header_response(3, 8)
+
+    responses = list(reader._parse_fetch_response(data))
+
+    assert [fetched["uid"] for fetched in responses] == [5, None, 8]
+
+
+def test_fetch_batch_skips_missing_uid():
+    data = header_response(1, 5) + [(b"2 (BODY[HEADER] {4}", b"X\r\n\r"), b")"] + header_response(3, 8)
+    reader = BatchReader(data)
+
+    assert [fetched["uid"] for fetched in reader._fetch_messages([8, 6, 5], "(BODY.PEEK[HEADER])")] == [8, 5]
+
+
+def test_fetch_batch_with_unsolicited_flags():
+    # Changements de drapeaux annoncés au milieu du lot, avec ou sans UID,
+    # y compris pour un message déjà reçu dans ce lot
+    data = (header_response(1, 5)
+            + [b"4 (FLAGS (\\Seen))"]
+            + header_response(2, 7)
+            + [b"1 (UID 5 FLAGS (\\Seen \\Flagged))", b"9 (UID 30 FLAGS ())"])
+    reader = BatchReader(data)
+
+    responses = list(reader._fetch_messages([7, 5], f"({HEADER_ITEM} BODYSTRUCTURE)"))
+
+    assert [fetched["uid"] for fetched in responses] == [7, 5]
+    assert all(reader._get_fetched_header(fetched) == header(fetched["uid"]) for fetched in responses)
+    assert reader._find_text_part(responses[1])[0] == "1"
+
+
+class TextFetchReader(OfflineReader):
+    """Renvoie la partie texte demandée et mémorise les lots téléchargés"""
+
+    FETCH_BATCH_SIZE = 2
+
+    def __init__(self):
+        super().__init__()
+        self.fetched_batches = []
+
+    def _fetch_messages(self, uids, items, batch_size=None):
+        if uids:
+            self.fetched_batches.append(list(uids))
+        for uid in uids:
+            yield {"uid": uid, "items": {"BODY[1]": f"Digest {uid}\r\n".encode()}}
+
+
+def test_fetch_text_messages_streams_batches():
+    reader = TextFetchReader()
+    selected = [{"uid": uid, "text": fetch_text(TEXT_PLAIN), "items": {HEADER_ITEM: header(uid)}}
+                for uid in (9, 7, 5, 3, 1)]
+
+    messages = reader._fetch_text_messages(selected)
+
+    uid, raw_message = next(messages)
+    assert uid == 9 and raw_message.endswith(b"Digest 9\r\n")
+    # Seul le premier lot est téléchargé tant que ses messages ne sont pas consommés
+    assert reader.fetched_batches == [[9, 7]]
+    assert [uid for uid, _ in messages] == [7, 5, 3, 1]
+    assert reader.fetched_batches == [[9, 7], [5, 3], [1]]
@@ -0,0 +1,134 @@
+"""Tests de la synchronisation IMAP incrémentale (fenêtre des emails mémorisés)"""
+
+from datetime import date, datetime
+from email.utils import format_datetime
+
+import pytest
+
+from conftest import OfflineReader
+from imap_state import ImapSyncState
+from message_store import MessageStore
+
+
+CRITERIA = {"limit": 10, "domain_filter": None, "subject_filters": ["crieur-des-sorties"]}
+
+
+def make_message(uid: int, received: datetime) -> bytes:
+    """Message brut minimal d'un digest"""
+    return (
+        f"From: liste@gco.ouvaton.org\r\n"
+        f"Subject: [crieur-des-sorties] Compilation {uid}\r\n"
+        f"Date: {format_datetime(received)}\r\n"
+        f"Message-ID: <{uid}@gco.ouvaton.org>\r\n"
+        f"Content-Type: text/plain; charset=utf-8\r\n"
+        f"\r\n"
+        f"Digest {uid}\r\n"
+    ).encode("utf-8")
+
+
+class FolderReader(OfflineReader):
+    """Lecteur sans connexion : le dossier est une liste de messages {uid: bytes}"""
+
+    def __init__(self, messages: dict, sync_state: ImapSyncState, store: MessageStore):
+        super().__init__(sync_state=sync_state, store=store)
+        self.messages = messages
+        self.downloaded = []
+
+    def _run_command(self, name, *args):
+        if name == "select":
+            return "OK", [b""]
+        # UID SEARCH : tous les UID au-delà du dernier traité ("UID n:*")
+        return "OK", [" ".join(str(uid) for uid in sorted(self.messages)).encode()]
+
+    def _get_uidvalidity(self, folder):
+        return 1
+
+    def _fetch_messages(self, uids, items, batch_size=None):
+        for uid in uids:
+            header = self.messages[uid].split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n"
+            yield {"uid": uid, "items": {"BODY[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)]": header}}
+
+    def _fetch_text_messages(self, selected):
+        for fetched in selected:
+            self.downloaded.append(fetched["uid"])
+            yield fetched["uid"], self.messages[fetched["uid"]]
+
+
+@pytest.fixture
+def sync_state(tmp_path):
+    return ImapSyncState(str(tmp_path / "imap_state.json"))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MessageStore(str(tmp_path / "messages"))
+
+
+def test_window_is_stored_as_references(tmp_path, sync_state, store):
+    messages = {1: make_message(1, datetime(2025, 12, 1, 10, 0).astimezone()),
+                2: make_message(2, datetime(2025, 12, 10, 10, 0).astimezone())}
+    reader = FolderReader(messages, sync_state, store)
+
+    emails = list(reader.iter_emails("CE", limit=10, subject_filters=["crieur-des-sorties"]))
+
+    assert [email_dict["uid"] for email_dict in emails] == [2, 1]
+    window = ImapSyncState(sync_state.state_file).folders["CE"]["window"]
+    assert window == [{"message_id": "<2@gco.ouvaton.org>", "uid": 2},
+                      {"message_id": "<1@gco.ouvaton.org>", "uid": 1}]
+    assert "Digest" not in (tmp_path / "imap_state.json").read_text(encoding="utf-8")
+
+
+def test_cached_window_is_rebuilt_from_store(sync_state, store):
+    messages = {1: make_message(1, datetime(2025, 12, 1, 10, 0).astimezone())}
+    list(FolderReader(messages, sync_state, store).iter_emails("CE", limit=10,
+                                                             subject_filters=["crieur-des-sorties"]))
+
+    messages[2] = make_message(2, datetime(2025, 12, 10, 10, 0).astimezone())
+    reader = FolderReader(messages, sync_state, store)
+    emails = list(reader.iter_emails("CE", limit=10, subject_filters=["crieur-des-sorties"]))
+
+    assert reader.downloaded == [2]
+    assert [(email_dict["uid"], email_dict["body"].strip()) for email_dict in emails] == [(2, "Digest 2"),
+                                                                                           (1, "Digest 1")]
+
+
+def test_cached_emails_older_than_since_are_dropped(sync_state, store):
+    messages = {1: make_message(1, datetime(2025, 12, 1, 10, 0).astimezone()),
+                2: make_message(2, datetime(2025, 12, 10, 10, 0).astimezone())}
+    list(FolderReader(messages, sync_state, store).iter_emails("CE", limit=10,
+                                                             subject_filters=["crieur-des-sorties"],
+                                                             since=date(2025, 11, 20)))
+
+    # La limite de date avance (SINCE_DAYS glissant) : le digest du 1er décembre sort de la fenêtre
+    reader = FolderReader(messages, sync_state, store)
+    emails = list(reader.iter_emails("CE", limit=10, subject_filters=["crieur-des-sorties"],
+                                     since=date(2025, 12, 5)))
+
+    assert reader.downloaded == []
+    assert [email_dict["uid"] for email_dict in emails] == [2]
+
+
+def test_earlier_since_forces_full_resync(sync_state):
+    sync_state.update_folder("CE", 1, 42, CRITERIA, [], since=date(2025, 12, 5))
+
+    assert sync_state.get_folder("CE", 1, CRITERIA, since=date(2025, 12, 6)) is not None
+    assert sync_state.get_folder("CE", 1, CRITERIA, since=date(2025, 12, 1)) is None
+    assert sync_state.get_folder("CE", 1, CRITERIA, since=None) is None
+
+
+def test_missing_store_message_forces_full_resync(sync_state, store):
+    messages = {1: make_message(1, datetime(2025, 12, 1, 10, 0).astimezone())}
+    list(FolderReader(messages, sync_state, store).iter_emails("CE", limit=10,
+                                                             subject_filters=["crieur-des-sorties"]))
+
+    reader = FolderReader(messages, sync_state, MessageStore(store.store_dir + "-vide"))
+    emails = list(reader.iter_emails("CE", limit=10, subject_filters=["crieur-des-sorties"]))
+
+    assert reader.downloaded == [1]
+    assert [email_dict["uid"] for email_dict in emails] == [1]
+
+
+def test_old_state_with_email_copies_is_ignored(sync_state):
+    sync_state.folders["CE"] = {"uidvalidity": 1, "last_uid": 42, "criteria": CRITERIA, "emails": []}
+
+    assert sync_state.get_folder("CE", 1, CRITERIA) is None
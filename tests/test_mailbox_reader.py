@@ -0,0 +1,73 @@
+"""Tests de la lecture des archives mbox et Maildir"""
+
+from datetime import date, datetime
+from email.utils import format_datetime
+
+import pytest
+
+from mailbox_reader import ArchiveReader, MaildirReader, MboxReader
+
+
+def make_message(number: int, sent: datetime) -> bytes:
+    return (
+        f"From: liste@gco.ouvaton.org\n"
+        f"Subject: [crieur-des-sorties] Compilation {number}\n"
+        f"Date: {format_datetime(sent)}\n"
+        f"Message-ID: <{number}@gco.ouvaton.org>\n"
+        f"\n"
+        f"Digest {number}\n"
+    ).encode("utf-8")
+
+
+# Ordre d'arrivée dans l'archive, qui ne suit pas les en-têtes Date
+# (message renvoyé en retard, import d'une autre boîte...)
+MESSAGES = [
+    make_message(1, datetime(2025, 12, 1, 9, 0)),
+    make_message(2, datetime(2025, 12, 10, 9, 0)),
+    make_message(3, datetime(2025, 11, 2, 9, 0)),
+    make_message(4, datetime(2025, 12, 12, 9, 0)),
+]
+
+
+@pytest.fixture
+def mbox(tmp_path):
+    path = tmp_path / "crieur.mbox"
+    path.write_bytes(b"".join(b"From liste@gco.ouvaton.org Mon Dec  1 09:00:00 2025\n" + message + b"\n"
+                              for message in MESSAGES))
+    reader = MboxReader(str(path), index_dir=str(tmp_path / "index"))
+    yield reader
+    reader.close()
+
+
+@pytest.fixture
+def maildir(tmp_path):
+    for subdir in ("cur", "new", "tmp"):
+        (tmp_path / "maildir" / subdir).mkdir(parents=True)
+    for delivery, message in enumerate(MESSAGES, 1733000000):
+        (tmp_path / "maildir" / "cur" / f"{delivery}.M1P1.hote:2,S").write_bytes(message)
+    return MaildirReader(str(tmp_path / "maildir"))
+
+
+def subjects(emails) -> list:
+    return [email_dict["subject"].rsplit(" ", 1)[1] for email_dict in emails]
+
+
+def test_archive_reader_is_abstract():
+    with pytest.raises(TypeError):
+        ArchiveReader()
+
+
+@pytest.mark.parametrize("reader_fixture", ["mbox", "maildir"])
+def test_since_skips_old_messages_without_stopping(request, reader_fixture):
+    reader = request.getfixturevalue(reader_fixture)
+
+    emails = reader.get_emails(limit=10, subject_filters=["crieur-des-sorties"], since=date(2025, 12, 1))
+
+    assert subjects(emails) == ["4", "2", "1"]
+
+
+@pytest.mark.parametrize("reader_fixture", ["mbox", "maildir"])
+def test_limit(request, reader_fixture):
+    reader = request.getfixturevalue(reader_fixture)
+
+    assert subjects(reader.get_emails(limit=2, subject_filters=["crieur-des-sorties"])) == ["4", "3"]
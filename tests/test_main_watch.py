@@ -0,0 +1,73 @@
+"""Tests du mode veille : reprise après les erreurs IMAP"""
+
+import imaplib
+
+import pytest
+
+import main_watch
+from imap_state import ImapSyncState
+
+
+class StopWatching(Exception):
+    """Interrompt la boucle de surveillance au moment de la reconnexion"""
+
+
+class FakeReader:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+def stop_sleep(delay):
+    raise StopWatching()
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(main_watch, "EmailReader", FakeReader)
+    monkeypatch.setattr(main_watch.time, "sleep", stop_sleep)
+
+    watcher = main_watch.DigestWatcher("test@example.org", "secret", "imap.example.org", 993, "CE", limit=10)
+    watcher.sync_state = ImapSyncState(str(tmp_path / "imap_state.json"))
+    watcher.sync_state.update_folder("CE", 1, 42, {}, [{"message_id": "<1@example.org>", "uid": 42}])
+    watcher.published_uid = 42
+    return watcher
+
+
+@pytest.mark.parametrize("error", [
+    imaplib.IMAP4.error("UIDVALIDITY du dossier 'CE' modifiée pendant la reconnexion"),
+    imaplib.IMAP4.error("IDLE terminé en erreur: A1 NO [UNAVAILABLE] try later"),
+], ids=["uidvalidity", "idle-no"])
+def test_imap_error_resyncs_instead_of_exiting(watcher, monkeypatch, error):
+    def watch(reader):
+        raise error
+    monkeypatch.setattr(watcher, "_watch", watch)
+
+    with pytest.raises(StopWatching):
+        watcher.run()
+
+    assert "CE" not in ImapSyncState(watcher.sync_state.state_file).folders
+    assert watcher.published_uid == 0
+
+
+def test_connection_lost_keeps_state(watcher, monkeypatch):
+    def watch(reader):
+        raise imaplib.IMAP4.abort("socket error: EOF")
+    monkeypatch.setattr(watcher, "_watch", watch)
+
+    with pytest.raises(StopWatching):
+        watcher.run()
+
+    assert watcher.sync_state.folders["CE"]["last_uid"] == 42
+    assert watcher.published_uid == 42
+
+
+def test_first_connection_error_is_raised(watcher, monkeypatch):
+    def refuse(*args, **kwargs):
+        raise imaplib.IMAP4.error("[AUTHENTICATIONFAILED] Authentication failed.")
+    monkeypatch.setattr(main_watch, "EmailReader", refuse)
+
+    with pytest.raises(imaplib.IMAP4.error, match="AUTHENTICATIONFAILED"):
+        watcher.run()
@@ -0,0 +1,25 @@
+"""Tests du décodage des messages (en-têtes, corps)"""
+
+import email
+
+import pytest
+
+from email_reader import MessageParser
+
+
+@pytest.mark.parametrize("raw_subject, expected", [
+    (b"Soir\xc3\xa9e d\xc3\xa9bat", "Soirée débat"),
+    (b"Soir\xe9e d\xc3\xa9bat", "Soir�e débat"),
+    (b"=?x-inconnu?q?Soir=E9e?=", "Soir�e"),
+], ids=["utf8-brut", "latin1-brut", "charset-inconnu"])
+def test_parse_email_with_raw_8bit_headers(raw_subject, expected):
+    raw_message = (b"From: Caf\xc3\xa9 des Arts <contact@example.org>\r\n"
+                   b"Subject: " + raw_subject + b"\r\n"
+                   b"Date: Mon, 1 Dec 2025 10:00:00 +0100\r\n"
+                   b"\r\n"
+                   b"Programme\r\n")
+
+    email_dict = MessageParser()._parse_email(email.message_from_bytes(raw_message))
+
+    assert email_dict["subject"] == expected
+    assert email_dict["from"] == "Café des Arts <contact@example.org>"
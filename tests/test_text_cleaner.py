@@ -0,0 +1,86 @@
+"""
+Tests du nettoyage du texte par tables de traduction (text_cleaner)
+Le résultat doit être identique aux boucles unicodedata d'origine, sur les
+digests d'exemple (test, test2, test3) et sur tous les points de code
+"""
+
+import os
+import re
+import sys
+import unicodedata
+
+import pytest
+
+from email_reader import EventExtractor
+from main_v2 import clean_text
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIGESTS = ("test", "test2", "test3")
+
+
+def reference_clean_text(text: str) -> str:
+    """main_v2.clean_text d'origine (une catégorie Unicode par caractère)"""
+    text = text.replace('\r', '')
+    cleaned = []
+    for char in text:
+        category = unicodedata.category(char)
+        if category[0] in ('L', 'N', 'P', 'Z'):
+            cleaned.append(char)
+        elif ord(char) < 128 and char.isprintable():
+            cleaned.append(char)
+        elif char == '\n':
+            cleaned.append(char)
+    text = ''.join(cleaned)
+    text = re.sub(r' +', ' ', text)
+    return text.strip()
+
+
+def reference_display_text(text: str) -> str:
+    """EventExtractor._clean_text d'origine (deux passages unicodedata)"""
+    if not text:
+        return text
+    text = ''.join(ch if unicodedata.category(ch) != 'So' else '' for ch in text)
+    text = ''.join(ch if unicodedata.category(ch)[0] != 'C' else '' for ch in text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def load_digest(name: str) -> str:
+    with open(os.path.join(BASE_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def digest_samples() -> list:
+    """Texte entier et ligne par ligne de chaque digest"""
+    samples = []
+    for name in DIGESTS:
+        body = load_digest(name)
+        samples.append(pytest.param(body, id=name))
+        for number, line in enumerate(body.split('\n'), 1):
+            samples.append(pytest.param(line, id=f"{name}:{number}"))
+    return samples
+
+
+EVERY_CODEPOINT = ''.join(chr(codepoint) for codepoint in range(sys.maxunicode + 1)
+                          if not 0xD800 <= codepoint <= 0xDFFF)
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return EventExtractor()
+
+
+@pytest.mark.parametrize("text", digest_samples())
+def test_clean_text_matches_reference(text):
+    assert clean_text(text) == reference_clean_text(text)
+
+
+@pytest.mark.parametrize("text", digest_samples())
+def test_display_text_matches_reference(extractor, text):
+    assert extractor._clean_text(text) == reference_display_text(text)
+
+
+def test_every_codepoint(extractor):
+    assert clean_text(EVERY_CODEPOINT) == reference_clean_text(EVERY_CODEPOINT)
+    assert extractor._clean_text(EVERY_CODEPOINT) == reference_display_text(EVERY_CODEPOINT)